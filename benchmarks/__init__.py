@@ -0,0 +1,52 @@
+# benchmarks/__init__.py
+"""Benchmark suite for the API services, run against an in-process stub backend
+
+Usage (from the repository root)::
+
+    python -m benchmarks --movements 10000 --users 5000 --json before.json
+    python -m benchmarks --compare before.json
+
+The settings below are applied before the app modules are imported, so the
+services talk to the stub host, keep downloaded documents and queued
+offline changes in a temporary directory and are not throttled by the request scheduler. Environment
+variables already set win over these defaults. Every report states the
+scheduler limits it ran with; ``load_sessions`` uses the production ones.
+"""
+import os
+import sys
+import tempfile
+
+SRC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+BENCH_DEFAULTS = {
+    "SERVER_ROUTE": "http://stub.local",
+    "DOCUMENT_CACHE_DIR": os.path.join(tempfile.gettempdir(), "satanica_bench_docs"),
+    "OUTBOX_PATH": os.path.join(tempfile.gettempdir(), "satanica_bench_outbox.sqlite3"),
+    "SESSION_PERSIST_ENABLED": "false",
+    "TOKEN_REFRESH_ENABLED": "false",
+    # Sin límite de ritmo: se mide el cliente, no el token bucket
+    "SCHEDULER_RATE": "1000000",
+    "SCHEDULER_BURST": "1000000",
+}
+for _name, _value in BENCH_DEFAULTS.items():
+    os.environ.setdefault(_name, _value)
+
+
+def use_production_scheduler():
+    """Restore the production token bucket limits (call before the first request)"""
+    from config.settings import Settings, settings
+    settings.SCHEDULER_RATE = Settings.model_fields["SCHEDULER_RATE"].default
+    settings.SCHEDULER_BURST = Settings.model_fields["SCHEDULER_BURST"].default
+
+
+def scheduler_note() -> str:
+    """One line with the token bucket limits of the run (and production's, if they differ)"""
+    from config.settings import Settings, settings
+    rate, burst = settings.SCHEDULER_RATE, settings.SCHEDULER_BURST
+    production = Settings.model_fields["SCHEDULER_RATE"].default, Settings.model_fields["SCHEDULER_BURST"].default
+    if (rate, burst) == production:
+        return f"Scheduler: límites de producción ({rate:.0f} pet/s, ráfaga {burst:.0f})"
+    return (f"Scheduler: {rate:.0f} pet/s, ráfaga {burst:.0f} (producción: {production[0]:.0f} pet/s, "
+            f"ráfaga {production[1]:.0f}; los tiempos no incluyen la espera del token bucket)")
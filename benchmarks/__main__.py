@@ -0,0 +1,64 @@
+# benchmarks/__main__.py
+import argparse
+import platform
+import sys
+import time
+
+from services.metrics import metrics
+
+from . import harness, scheduler_note
+from .bench_services import SUITES, run_suites
+from .stub_backend import StubBackend
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks",
+                                     description="Benchmarks de los servicios contra un backend simulado")
+    parser.add_argument("--suite", action="append", choices=sorted(SUITES),
+                        help="Suite a ejecutar (repetible; por defecto todas)")
+    parser.add_argument("-k", "--select", default="", help="Solo benchmarks cuyo nombre contenga este texto")
+    parser.add_argument("--movements", type=int, default=10000)
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--events", type=int, default=200)
+    parser.add_argument("--organizations", type=int, default=500)
+    parser.add_argument("--latency", type=float, default=0.0, help="Latencia simulada por petición (ms)")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--cache", action="store_true", help="Dejar activa la caché de recursos")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--gzip", action="store_true", help="El stub comprime con gzip las respuestas de más de 500 B")
+    parser.add_argument("--json", dest="json_path", help="Guardar los resultados en este fichero")
+    parser.add_argument("--compare", help="Resultados anteriores (JSON) con los que comparar")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    backend = StubBackend(movements=args.movements, users=args.users, events=args.events,
+                          organizations=args.organizations, latency=args.latency / 1000, seed=args.seed,
+                          gzip_min_size=500 if args.gzip else None)
+    print(f"Datos sintéticos: {args.movements} movimientos, {args.users} usuarios, {args.events} eventos "
+          f"({time.perf_counter() - started:.1f} s)")
+
+    suites = args.suite or list(SUITES)
+    results = run_suites(backend, suites, repeat=args.repeat, warmup=args.warmup,
+                         cache=args.cache, select=args.select)
+    baseline = harness.load_json(args.compare) if args.compare else None
+    print(harness.format_table(results, baseline))
+    print(f"Peticiones servidas por el stub: {backend.requests}")
+    print(scheduler_note())
+    received = sum(m["response_bytes"] for m in metrics.snapshot().values())
+    wire = sum(m["response_wire_bytes"] for m in metrics.snapshot().values())
+    if wire:
+        print(f"Bytes recibidos: {received / 1e6:.1f} MB, por la red {wire / 1e6:.1f} MB "
+              f"(compresión {received / wire:.1f}x)")
+
+    if args.json_path:
+        meta = {key: value for key, value in vars(args).items() if key not in ("json_path", "compare")}
+        meta.update(python=platform.python_version(), timestamp=time.strftime("%Y-%m-%dT%H:%M:%S"),
+                    scheduler=scheduler_note())
+        harness.write_json(results, args.json_path, meta)
+        print(f"Resultados guardados en {args.json_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,161 @@
+# benchmarks/bench_services.py
+import json
+from typing import Callable, List, Tuple
+
+from models.economic import (
+    EconomicMovementCreate,
+    EconomicMovementFilters,
+    EconomicMovementListItem,
+    EconomicMovementUpdate,
+)
+from models.organization import OrganizationShortView
+from models.user import UserShortView
+from services.json_codec import BACKENDS, JSONCodec
+from services.service_container import ServiceContainer
+
+from .harness import BenchResult, bench
+from .stub_backend import StubBackend
+
+Case = Tuple[str, str, Callable[[], object]]
+
+
+def make_container(backend: StubBackend, cache: bool = False) -> ServiceContainer:
+    """Services wired to the stub; the resource cache is off unless ``cache``"""
+    services = ServiceContainer(transport=backend.transport())
+    services.api_client.set_token("bench-token")
+    if not cache:
+        services.cache.ttl = 0
+        services.cache.ttls = {}
+    return services
+
+
+def service_cases(services: ServiceContainer, backend: StubBackend) -> List[Case]:
+    """One case per service read, plus the common writes"""
+    movement_id = len(backend.movements) // 2 or 1
+    user_id = len(backend.users) // 2 or 1
+    event = backend.events[0] if backend.events else {"event_id": 1, "year": 2024}
+    filters = EconomicMovementFilters(fecha_creacion_from="2024-01-01", id_evento=event["event_id"])
+    all_movements = EconomicMovementFilters(fecha_creacion_from="2024-01-01")
+    update = EconomicMovementUpdate(concepto="Actualizado en benchmark")
+    create = EconomicMovementCreate(id_evento=event["event_id"], concepto="Nuevo", cantidad_total_ctm=1000,
+                                    ano_ejercicio=2024, categorias_subvencion_id=1, ind_movimiento=12)
+
+    def download_invoice():
+        # Sin la copia local: descarga completa y escritura en la caché de documentos
+        services.documents.invalidate("invoice", movement_id * 100)
+        return services.invoices.download_invoice(movement_id * 100)
+
+    return [
+        ("auth.get_current_user", "services", lambda: services.auth.get_current_user(refresh=True)),
+        ("permissions.load_user_permissions", "services", services.permissions.load_user_permissions),
+        ("home.get_notifications", "services", services.home.get_notifications),
+        ("economic.get_last_movements", "services", services.economic.get_last_movements),
+        ("economic.get_movements_list[event]", "services", lambda: services.economic.get_movements_list(filters)),
+        ("economic.get_movements_list[all]", "services",
+         lambda: services.economic.get_movements_list(all_movements)),
+        ("economic.get_movement_detail", "services", lambda: services.economic.get_movement_detail(movement_id)),
+        ("economic.get_categories", "services", services.economic.get_categories),
+        ("economic.update_movement", "services", lambda: services.economic.update_movement(movement_id, update)),
+        ("economic.create_movement", "services", lambda: services.economic.create_movement(create)),
+        ("invoices.get_invoices_by_movement", "services",
+         lambda: services.invoices.get_invoices_by_movement(movement_id)),
+        ("invoices.download_invoice", "services", download_invoice),
+        ("accounting.get_accounting_docs_by_movement", "services",
+         lambda: services.accounting.get_accounting_docs_by_movement(movement_id)),
+        ("events.get_events_list", "services", lambda: services.events.get_events_list(event["year"])),
+        ("events.get_event_details", "services", lambda: services.events.get_event_details(event["event_id"])),
+        ("users.get_users_list", "services", services.users.get_users_list),
+        ("users.get_user_details", "services", lambda: services.users.get_user_details(user_id)),
+        ("organizations.get_organizations_list", "services", services.organizations.get_organizations_list),
+        ("organizations.get_organization_details", "services",
+         lambda: services.organizations.get_organization_details(1)),
+        ("roles.get_roles_list", "services", services.roles.get_roles_list),
+        ("roles.get_user_roles", "services", lambda: services.roles.get_user_roles(user_id)),
+    ]
+
+
+def decode_cases(services: ServiceContainer, backend: StubBackend) -> List[Case]:
+    """Decoding and model construction of the biggest list bodies, without HTTP
+
+    Each available JSON backend decodes the same bodies; ``model_validate``
+    builds models from decoded dicts and ``validate_json`` straight from the
+    bytes (what APIClient does with ``JSON_VALIDATE_RAW``).
+    """
+    payloads = [
+        ("movements", EconomicMovementListItem, backend.movements),
+        ("users", UserShortView, [StubBackend._short_user(u) for u in backend.users]),
+        ("organizations", OrganizationShortView, [
+            {key: o[key] for key in ("id_organizacion", "nif", "nombre", "telefono", "email")}
+            for o in backend.organizations
+        ]),
+    ]
+    codec = JSONCodec(validate_raw=True)
+    cases: List[Case] = []
+    for name, model, items in payloads:
+        body = json.dumps(items).encode()
+        decoded = json.loads(body)
+        for label, loads in BACKENDS.items():
+            label = "json" if label == "stdlib" else label
+            cases.append((f"{label}.loads[{name}]", "decode", lambda loads=loads, body=body: loads(body)))
+        cases.append((f"model_validate[{name}]", "decode",
+                      lambda model=model, decoded=decoded: [model.model_validate(item) for item in decoded]))
+        cases.append((f"validate_json[{name}]", "decode",
+                      lambda model=model, body=body: codec.validate_list(body, model)))
+    return cases
+
+
+def view_cases(services: ServiceContainer, backend: StubBackend) -> List[Case]:
+    """The service calls each screen makes when it loads, in the same order"""
+    movement_id = len(backend.movements) // 2 or 1
+    user_id = len(backend.users) // 2 or 1
+    year = backend.events[0]["year"] if backend.events else 2024
+
+    def movements_list():
+        services.economic.get_last_movements()
+        services.events.get_events_list(year)
+
+    def movement_detail():
+        movement = services.economic.get_movement_detail(movement_id)
+        services.events.get_event_details(movement.id_evento)
+        services.economic.get_categories()
+        services.events.get_events_list(movement.ano_ejercicio)
+        services.invoices.get_invoices_by_movement(movement_id)
+        services.accounting.get_accounting_docs_by_movement(movement_id)
+
+    def user_detail():
+        services.users.get_user_details(user_id)
+        services.roles.get_user_roles(user_id)
+        services.roles.get_roles_list()
+
+    def login():
+        services.auth.get_current_user(refresh=True)
+        services.permissions.load_user_permissions()
+        services.home.get_notifications()
+
+    return [
+        ("view.login", "views", login),
+        ("view.movements_list", "views", movements_list),
+        ("view.movement_detail", "views", movement_detail),
+        ("view.users_list", "views", services.users.get_users_list),
+        ("view.user_detail", "views", user_detail),
+        ("view.organizations_list", "views", services.organizations.get_organizations_list),
+    ]
+
+
+SUITES = {
+    "services": service_cases,
+    "decode": decode_cases,
+    "views": view_cases,
+}
+
+
+def run_suites(backend: StubBackend, suites: List[str], repeat: int = 20, warmup: int = 2,
+               cache: bool = False, select: str = "") -> List[BenchResult]:
+    services = make_container(backend, cache=cache)
+    results = []
+    for suite in suites:
+        for name, group, fn in SUITES[suite](services, backend):
+            if select and select not in name:
+                continue
+            results.append(bench(name, fn, group=group, repeat=repeat, warmup=warmup))
+    return results
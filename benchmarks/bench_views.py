@@ -0,0 +1,282 @@
+# benchmarks/bench_views.py
+"""Headless rendering benchmarks of the views
+
+Each scenario builds a view on a FakePage with services wired to the stub
+backend, calls ``show()`` and then a few interactions. Every step is timed
+over several runs, then run once more under tracemalloc to count
+allocations. Usage (from the repository root)::
+
+    python -m benchmarks.bench_views --json views.json
+    python -m benchmarks.bench_views --thresholds benchmarks/view_thresholds.json
+
+With ``--thresholds`` the exit code is 1 when a step goes over its limits.
+With ``--har`` the views are served a recorded session (see
+``TRAFFIC_RECORD_PATH``) instead of the synthetic stub data.
+"""
+import argparse
+import importlib
+import json
+import math
+import sys
+import time
+import tracemalloc
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from config.constants import Permissions
+from core.session_manager import SessionManager
+
+from . import scheduler_note
+from .bench_services import make_container
+from .fake_page import FakePage, FakeRouter
+from services.traffic_recorder import ReplayTransport
+
+from .stub_backend import StubBackend
+
+Step = Tuple[str, Callable[[Any], None]]
+
+
+class ViewScenario:
+    """A view, the session values it needs before show() and its interactions"""
+
+    def __init__(self, name: str, view_path: str, session: Optional[Dict[str, Any]] = None,
+                 interactions: Optional[List[Step]] = None):
+        self.name = name
+        self.view_path = view_path  # "modulo:Clase"
+        self.session = session or {}
+        self.interactions = interactions or []
+
+    def load_class(self):
+        module, cls = self.view_path.split(":")
+        return getattr(importlib.import_module(module), cls)
+
+
+def _event(value) -> SimpleNamespace:
+    """Minimal stand-in for a Flet control event"""
+    return SimpleNamespace(control=SimpleNamespace(value=value), data=value)
+
+
+def _filter(key: str, value: str) -> Callable[[Any], None]:
+    def step(view):
+        view.filters[key] = value
+        view._apply_filters()
+    return step
+
+
+def _movement_filters(event_id: str) -> Callable[[Any], None]:
+    # Sin evento la tabla pinta todos los movimientos (10k filas): demasiado lento para repetirlo
+    def step(view):
+        view.filters["evento"] = event_id
+        view._apply_filters(None)
+    return step
+
+
+SCENARIOS: List[ViewScenario] = [
+    ViewScenario("home", "views.main.home_view:HomeView"),
+    ViewScenario("users_list", "views.users.users_list:UsersListView", interactions=[
+        ("filter_name", _filter("name", "lu")),
+        ("next_page", lambda view: view._on_page_change(2)),
+        ("clear_filters", lambda view: view._clear_filters()),
+    ]),
+    ViewScenario("user_detail", "views.users.user_detail:UserDetailView", session={"selected_user_id": 1}),
+    ViewScenario("movements_list", "views.economy.movements_list:MovementsListView", interactions=[
+        ("update_table_rows", lambda view: view._update_table_rows()),
+        ("apply_filters", _movement_filters("1")),
+    ]),
+    ViewScenario("movement_detail", "views.economy.movement_detail:MovementDetailView",
+                 session={"selected_economy_movement_id": 1, "edit_mode": False}, interactions=[
+        ("toggle_edit", lambda view: view._on_edit_switch_change(_event(True))),
+        ("redraw_invoices", lambda view: view._update_invoices_display()),
+    ]),
+    ViewScenario("organizations_list", "views.organization.organization_list:OrganizationsListView", interactions=[
+        ("filter_name", _filter("name", "1")),
+        ("next_page", lambda view: view._on_page_change(2)),
+    ]),
+    ViewScenario("events_list", "views.event.events_list:EventsListView", interactions=[
+        ("search_year", lambda view: view._search_events_by_year()),
+    ]),
+]
+
+
+class ViewHarness:
+    """Runs view scenarios headless and collects per-step measurements"""
+
+    def __init__(self, backend, repeat: int = 10, allocations: bool = True):
+        # backend: StubBackend o ReplayTransport (cualquier objeto con transport())
+        self.backend = backend
+        self.repeat = repeat
+        self.allocations = allocations
+        self.services = make_container(backend)
+        self.services.api_client.set_token("bench-token")
+        self.services.permissions.set_permissions(p.value for p in Permissions)
+
+    def _mount(self, scenario: ViewScenario, view_class):
+        """Fresh page and view; returns (page, view) after show()"""
+        page = FakePage()
+        session_manager = SessionManager(page)
+        page.session.set("access_token", "bench-token")
+        page.session.set("user_name", "Benchmark User")
+        for key, value in scenario.session.items():
+            page.session.set(key, value)
+        router = FakeRouter()
+        view = view_class(page=page, router=router, services=self.services, session_manager=session_manager)
+        router.current_view = view
+        return page, view
+
+    def _steps(self, scenario: ViewScenario) -> List[Step]:
+        return [("show", lambda view: view.show())] + list(scenario.interactions)
+
+    def run(self, scenario: ViewScenario) -> Dict[str, Dict[str, Any]]:
+        view_class = scenario.load_class()
+        steps = self._steps(scenario)
+        times: Dict[str, List[float]] = {name: [] for name, _ in steps}
+        results: Dict[str, Dict[str, Any]] = {}
+
+        for run in range(self.repeat + 1):
+            page, view = self._mount(scenario, view_class)
+            try:
+                for name, step in steps:
+                    page.recorder.reset()
+                    started = time.perf_counter()
+                    step(view)
+                    elapsed = time.perf_counter() - started
+                    if run == 0:
+                        # Primera pasada: calentamiento y métricas deterministas
+                        results[name] = dict(page.stats())
+                    else:
+                        times[name].append(elapsed)
+            finally:
+                view.dispose()
+                page.close()
+
+        if self.allocations:
+            for name, allocated in self._allocations(scenario, view_class, steps).items():
+                results[name].update(allocated)
+
+        for name, values in times.items():
+            results[name].update(_timing(values))
+        return results
+
+    def _allocations(self, scenario: ViewScenario, view_class, steps: List[Step]) -> Dict[str, Dict[str, int]]:
+        """Allocation count, net and peak bytes of each step (separate run, tracemalloc is slow)"""
+        page, view = self._mount(scenario, view_class)
+        measured = {}
+        tracemalloc.start()
+        try:
+            for name, step in steps:
+                before = tracemalloc.take_snapshot()
+                tracemalloc.reset_peak()
+                start_size, _ = tracemalloc.get_traced_memory()
+                step(view)
+                _, peak = tracemalloc.get_traced_memory()
+                after = tracemalloc.take_snapshot()
+                diff = after.compare_to(before, "lineno")
+                measured[name] = {
+                    "allocations": sum(stat.count_diff for stat in diff if stat.count_diff > 0),
+                    "alloc_bytes": sum(stat.size_diff for stat in diff if stat.size_diff > 0),
+                    "peak_bytes": max(0, peak - start_size),
+                }
+        finally:
+            tracemalloc.stop()
+            view.dispose()
+            page.close()
+        return measured
+
+
+def _timing(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {}
+    ordered = sorted(values)
+    p95 = ordered[min(len(ordered) - 1, max(0, math.ceil(0.95 * len(ordered)) - 1))]
+    return {
+        "runs": len(values),
+        "min_ms": ordered[0] * 1000,
+        "p50_ms": ordered[(len(ordered) - 1) // 2] * 1000,
+        "p95_ms": p95 * 1000,
+    }
+
+
+def check_thresholds(results: Dict[str, Dict[str, Any]], thresholds: Dict[str, Dict[str, float]]) -> List[str]:
+    """Limits keyed by "scenario.step" (or "*" for every step); returns the violations
+
+    A step that failed has no metrics to compare and is always a violation.
+    """
+    violations = []
+    for key, data in results.items():
+        if "error" in data:
+            violations.append(f"{key}: {data['error']}")
+            continue
+        limits = {**thresholds.get("*", {}), **thresholds.get(key, {})}
+        for metric, limit in limits.items():
+            value = data.get(metric)
+            if value is not None and value > limit:
+                violations.append(f"{key}: {metric} = {value:.1f} > {limit}")
+    return violations
+
+
+def format_table(results: Dict[str, Dict[str, Any]]) -> str:
+    header = (f"{'view.step':<36} {'p50 ms':>8} {'p95 ms':>8} {'controls':>9} {'added':>7} "
+              f"{'allocs':>8} {'peak KB':>8} {'update KB':>10}")
+    lines = [header, "-" * len(header)]
+    for key, data in results.items():
+        if "error" in data:
+            lines.append(f"{key:<36} {data['error']}")
+            continue
+        lines.append(
+            f"{key:<36} {data.get('p50_ms', 0):>8.2f} {data.get('p95_ms', 0):>8.2f} {data['controls']:>9} "
+            f"{data['controls_added']:>7} {data.get('allocations', 0):>8} "
+            f"{data.get('peak_bytes', 0) / 1024:>8.1f} {data['update_bytes'] / 1024:>10.1f}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.bench_views",
+                                     description="Coste de construir y serializar las vistas sin cliente Flet")
+    parser.add_argument("-k", "--select", default="", help="Solo escenarios cuyo nombre contenga este texto")
+    parser.add_argument("--movements", type=int, default=10000)
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--no-alloc", action="store_true", help="No medir asignaciones (tracemalloc)")
+    parser.add_argument("--json", dest="json_path", help="Guardar los resultados en este fichero")
+    parser.add_argument("--thresholds", help="Límites por paso (JSON); sale con código 1 si se superan")
+    parser.add_argument("--har", help="Servir una sesión grabada (.har con cuerpos) en lugar del stub")
+    args = parser.parse_args(argv)
+
+    if args.har:
+        backend = ReplayTransport(args.har)
+    else:
+        backend = StubBackend(movements=args.movements, users=args.users)
+    harness = ViewHarness(backend, repeat=args.repeat, allocations=not args.no_alloc)
+    results: Dict[str, Dict[str, Any]] = {}
+    for scenario in SCENARIOS:
+        if args.select and args.select not in scenario.name:
+            continue
+        try:
+            steps = harness.run(scenario)
+        except Exception as e:
+            results[f"{scenario.name}.show"] = {"error": f"{type(e).__name__}: {e}"}
+            continue
+        results.update({f"{scenario.name}.{step}": data for step, data in steps.items()})
+
+    print(format_table(results))
+    print(scheduler_note())
+    if args.har and backend.misses:
+        print(f"Peticiones sin grabar: {len(backend.misses)} ({', '.join(sorted(set(backend.misses))[:5])})")
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump({"meta": vars(args), "results": results}, f, indent=2)
+        print(f"Resultados guardados en {args.json_path}")
+
+    if args.thresholds:
+        with open(args.thresholds, encoding="utf-8") as f:
+            violations = check_thresholds(results, json.load(f))
+        for violation in violations:
+            print(f"REGRESIÓN {violation}")
+        if violations:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,117 @@
+# benchmarks/fake_page.py
+import asyncio
+import json
+from typing import Any, Dict, List, Optional
+
+import flet as ft
+from flet.core.local_connection import LocalConnection
+from flet.core.protocol import ClientActions, ClientMessage, CommandEncoder, PageCommandResponsePayload, \
+    PageCommandsBatchResponsePayload
+
+
+class RecordingConnection(LocalConnection):
+    """Flet connection without a client: processes commands and counts what would be sent
+
+    Commands go through Flet's own command processing (control ids, batches)
+    and every outgoing message is serialized exactly as the socket server
+    would, but only its size is kept.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.reset()
+
+    def reset(self):
+        self.messages = 0
+        self.commands = 0
+        self.bytes_sent = 0
+        self.controls_added = 0
+
+    def send_command(self, session_id: str, command):
+        result, message = self._process_command(command)
+        self.commands += 1
+        if message:
+            self._record(message)
+        return PageCommandResponsePayload(result=result, error="")
+
+    def send_commands(self, session_id: str, commands: List[Any]):
+        results = []
+        messages = []
+        for command in commands:
+            result, message = self._process_command(command)
+            if command.name in ("add", "get"):
+                results.append(result)
+                if command.name == "add" and result:
+                    self.controls_added += len(result.split(" "))
+            if message:
+                messages.append(message)
+        self.commands += len(commands)
+        if messages:
+            self._record(ClientMessage(ClientActions.PAGE_CONTROLS_BATCH, messages))
+        return PageCommandsBatchResponsePayload(results=results, error="")
+
+    def _process_invoke_method_command(self, values, attrs):
+        # Sin cliente no hay respuesta: se mide el mensaje y se ignora el resultado
+        return "", ClientMessage(ClientActions.INVOKE_METHOD, {"values": values, "attrs": attrs})
+
+    def _record(self, message: ClientMessage):
+        self.messages += 1
+        self.bytes_sent += len(json.dumps(message, cls=CommandEncoder, separators=(",", ":")).encode())
+
+
+class FakePage(ft.Page):
+    """Real ``ft.Page`` bound to a RecordingConnection (no Flet client or window)"""
+
+    def __init__(self, width: float = 1280, height: float = 800):
+        self.recorder = RecordingConnection()
+        self._loop = asyncio.new_event_loop()
+        super().__init__(self.recorder, "bench", self._loop)
+        self._set_attr("width", width, False)
+        self._set_attr("height", height, False)
+        self._set_attr("platform", "linux", False)
+        self._set_attr("web", False, False)
+        # Como un cliente recién conectado: la página ya se ha enviado una vez
+        self.update()
+        self.recorder.reset()
+
+    def control_count(self) -> int:
+        """Controls currently mounted on the page (the page itself excluded)"""
+        return len(self.index) - 1
+
+    def stats(self) -> Dict[str, int]:
+        conn = self.recorder
+        return {
+            "controls": self.control_count(),
+            "controls_added": conn.controls_added,
+            "messages": conn.messages,
+            "commands": conn.commands,
+            "update_bytes": conn.bytes_sent,
+        }
+
+    def close(self):
+        self._close()
+        self._loop.close()
+
+
+class FakeRouter:
+    """Records navigations instead of switching views"""
+
+    def __init__(self):
+        self.current_view = None
+        self.current_route: Optional[str] = None
+        self.navigations: List[str] = []
+        self.token_refresh = _NoTokenRefresh()
+
+    def navigate_to(self, route: str, **kwargs):
+        self.navigations.append(route)
+
+    def start_session_tasks(self):
+        pass
+
+
+class _NoTokenRefresh:
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
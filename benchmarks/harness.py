@@ -0,0 +1,96 @@
+# benchmarks/harness.py
+import json
+import math
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+
+class BenchResult:
+    """Timings of one benchmark (seconds per run)"""
+
+    def __init__(self, name: str, group: str, times: List[float], items: int = 0):
+        self.name = name
+        self.group = group
+        self.times = times
+        self.items = items  # Elementos devueltos por ejecución (listas)
+
+    def percentile(self, q: float) -> float:
+        ordered = sorted(self.times)
+        index = min(len(ordered) - 1, max(0, math.ceil(q / 100 * len(ordered)) - 1))
+        return ordered[index]
+
+    @property
+    def mean(self) -> float:
+        return sum(self.times) / len(self.times)
+
+    def to_dict(self) -> Dict[str, Any]:
+        total = sum(self.times)
+        return {
+            "group": self.group,
+            "runs": len(self.times),
+            "items": self.items,
+            "min_ms": min(self.times) * 1000,
+            "p50_ms": self.percentile(50) * 1000,
+            "p95_ms": self.percentile(95) * 1000,
+            "mean_ms": self.mean * 1000,
+            "ops_per_sec": len(self.times) / total if total else None,
+            "items_per_sec": self.items * len(self.times) / total if total and self.items else None,
+        }
+
+
+def bench(name: str, fn: Callable[[], Any], group: str = "services", repeat: int = 20,
+          warmup: int = 2, setup: Optional[Callable[[], Any]] = None) -> BenchResult:
+    """Run fn ``repeat`` times after ``warmup`` runs; setup runs untimed before each call"""
+    result = None
+    for _ in range(warmup):
+        if setup:
+            setup()
+        fn()
+    times = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        started = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - started)
+    items = len(result) if isinstance(result, (list, tuple)) else 0
+    return BenchResult(name, group, times, items)
+
+
+def format_table(results: List[BenchResult], baseline: Optional[Dict[str, Dict[str, Any]]] = None) -> str:
+    """Text table of the results; with a baseline, adds the p50 change"""
+    header = f"{'benchmark':<46} {'runs':>5} {'items':>6} {'min ms':>9} {'p50 ms':>9} {'p95 ms':>9} {'ops/s':>9}"
+    if baseline:
+        header += f" {'Δ p50':>8}"
+    lines = [header, "-" * len(header)]
+    group = None
+    for result in results:
+        if result.group != group:
+            group = result.group
+            lines.append(f"[{group}]")
+        data = result.to_dict()
+        line = (f"{result.name:<46} {data['runs']:>5} {data['items']:>6} {data['min_ms']:>9.2f} "
+                f"{data['p50_ms']:>9.2f} {data['p95_ms']:>9.2f} {data['ops_per_sec'] or 0:>9.1f}")
+        if baseline:
+            before = baseline.get(result.name)
+            if before and before.get("p50_ms"):
+                change = (data["p50_ms"] - before["p50_ms"]) / before["p50_ms"] * 100
+                line += f" {change:>+7.1f}%"
+            else:
+                line += f" {'-':>8}"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def write_json(results: List[BenchResult], path: str, meta: Optional[Dict[str, Any]] = None):
+    data = {
+        "meta": meta or {},
+        "results": {result.name: result.to_dict() for result in results},
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+
+
+def load_json(path: str) -> Dict[str, Dict[str, Any]]:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f).get("results", {})
@@ -0,0 +1,310 @@
+# benchmarks/load_sessions.py
+"""Multi-session load generator for the web build
+
+Simulates N concurrent sessions, each with its own headless page, Router and
+ServiceContainer (as Flet web does per browser tab), all served by one stub
+backend. Every session logs in, opens the movement list, applies filters and
+opens movement details in a loop. Usage (from the repository root)::
+
+    python -m benchmarks.load_sessions --sessions 50 --iterations 5 --latency 20
+
+Reports handler latency per action, CPU time and retained memory per session,
+and the request rate seen by the backend. Sessions share the production token
+bucket (SCHEDULER_RATE/SCHEDULER_BURST) unless ``--unthrottled`` keeps the
+benchmark override.
+"""
+import argparse
+import contextvars
+import gc
+import json
+import math
+import random
+import resource
+import sys
+import threading
+import time
+import tracemalloc
+import types
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from config.constants import Routes
+from config.settings import settings
+from core.router import Router
+from core.tracing import tracer
+from services.metrics import metrics
+from services.service_container import ServiceContainer
+
+from . import scheduler_note, use_production_scheduler
+from .fake_page import FakePage
+from .stub_backend import StubBackend
+
+
+class SimulatedSession:
+    """One browser session driving the Router like a user would"""
+
+    def __init__(self, index: int, backend: StubBackend, iterations: int = 3,
+                 think_time: float = 0.0, seed: int = 1):
+        self.index = index
+        self.backend = backend
+        self.iterations = iterations
+        self.think_time = think_time
+        self.rng = random.Random(seed + index)
+        self.requests = 0
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: List[str] = []
+        self.cpu_time = 0.0
+        self._lock = threading.Lock()
+
+        self.page = FakePage()
+        self.services = ServiceContainer(transport=httpx.MockTransport(self._handle))
+        self.router = Router(self.page, services=self.services)
+
+    def _handle(self, request: httpx.Request) -> httpx.Response:
+        with self._lock:
+            self.requests += 1
+        return self.backend.handle(request)
+
+    def _action(self, name: str, fn):
+        """Run one event handler and record its latency"""
+        started = time.perf_counter()
+        try:
+            fn()
+        except Exception as e:
+            self.errors.append(f"{name}: {type(e).__name__}: {e}")
+        self.latencies.setdefault(name, []).append(time.perf_counter() - started)
+        if self.think_time:
+            time.sleep(self.rng.uniform(0.5, 1.5) * self.think_time)
+
+    def run(self):
+        cpu_start = time.thread_time()
+        try:
+            self._action("open_login", lambda: self.router.navigate_to(Routes.LOGIN))
+            self._action("login", self._login)
+            for _ in range(self.iterations):
+                self._action("open_movements", lambda: self.router.navigate_to(Routes.ECONOMY_MOVEMENTS))
+                self._action("apply_filters", self._apply_filters)
+                self._action("open_detail", self._open_detail)
+        finally:
+            self.cpu_time = time.thread_time() - cpu_start
+
+    def _login(self):
+        view = self.router.current_view
+        view.email_field.value = f"user{self.index}@example.com"
+        view.password_field.value = "benchmark"
+        view._on_login(None)
+        if self.router.current_route != Routes.HOME:
+            raise RuntimeError(f"login ended on {self.router.current_route}")
+
+    def _apply_filters(self):
+        view = self.router.current_view
+        if self.backend.movements:
+            # Un evento que tenga movimientos, para poder abrir luego un detalle
+            view.filters["evento"] = str(self.rng.choice(self.backend.movements)["id_evento"])
+        view._apply_filters(None)
+
+    def _open_detail(self):
+        view = self.router.current_view
+        movements = getattr(view, "movements", None) or []
+        if not movements:
+            raise RuntimeError("no movements to open")
+        view._view_movement_details(self.rng.choice(movements))
+        if self.router.current_route != Routes.ECONOMY_MOVEMENT_DETAIL:
+            raise RuntimeError(f"detail ended on {self.router.current_route}")
+
+
+def retained_size(root: Any, exclude: Optional[set] = None) -> int:
+    """Approximate bytes reachable from root, without modules, classes or module globals"""
+    skip = set(exclude or ())
+    skip.update(id(module.__dict__) for module in list(sys.modules.values()) if module is not None)
+    seen = set()
+    stack = [root]
+    total = 0
+    while stack:
+        obj = stack.pop()
+        obj_id = id(obj)
+        if obj_id in seen or obj_id in skip:
+            continue
+        if isinstance(obj, (type, types.ModuleType, types.CodeType, threading.Thread, contextvars.Context)):
+            continue
+        seen.add(obj_id)
+        total += sys.getsizeof(obj, 0)
+        if isinstance(obj, types.FunctionType):
+            # Solo el estado propio de la función (closure, defaults), no sus globals
+            stack.extend(cell.cell_contents for cell in (obj.__closure__ or ()) if _has_contents(cell))
+            stack.extend(obj.__defaults__ or ())
+            continue
+        stack.extend(gc.get_referents(obj))
+    return total
+
+
+def _has_contents(cell) -> bool:
+    try:
+        cell.cell_contents
+    except ValueError:
+        return False
+    return True
+
+
+def _rank(ordered: List[float], q: float) -> float:
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(q * len(ordered)) - 1))]
+
+
+def _summary(values: List[float]) -> Dict[str, float]:
+    """Percentiles of durations in seconds, reported in ms"""
+    ordered = sorted(values)
+    return {
+        "count": len(ordered),
+        "p50_ms": _rank(ordered, 0.5) * 1000,
+        "p95_ms": _rank(ordered, 0.95) * 1000,
+        "max_ms": ordered[-1] * 1000,
+    }
+
+
+def _count_summary(values: List[int]) -> Dict[str, int]:
+    """Percentiles of plain counts"""
+    ordered = sorted(values)
+    return {
+        "count": len(ordered),
+        "p50": _rank(ordered, 0.5) if ordered else 0,
+        "p95": _rank(ordered, 0.95) if ordered else 0,
+        "max": ordered[-1] if ordered else 0,
+    }
+
+
+def run_load(backend: StubBackend, sessions: int, iterations: int, think_time: float = 0.0,
+             ramp_up: float = 0.0, seed: int = 1, trace_memory: bool = False) -> Dict[str, Any]:
+    """Run the sessions concurrently; ``trace_memory`` adds tracemalloc totals (and its overhead)"""
+    gc.collect()
+    if trace_memory:
+        tracemalloc.start()
+    memory_before, _ = tracemalloc.get_traced_memory()
+    cpu_before = time.process_time()
+    requests_before = backend.requests
+
+    drivers = [SimulatedSession(i, backend, iterations, think_time, seed) for i in range(sessions)]
+    threads = [threading.Thread(target=driver.run, name=f"session-{i}") for i, driver in enumerate(drivers)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+        if ramp_up:
+            time.sleep(ramp_up / sessions)
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+
+    cpu = time.process_time() - cpu_before
+    gc.collect()
+    memory_after, memory_peak = tracemalloc.get_traced_memory()
+    if trace_memory:
+        tracemalloc.stop()
+
+    # Objetos compartidos por todas las sesiones: no cuentan para ninguna
+    exclude = {id(backend), id(settings), id(metrics), id(tracer)}
+    sizes = [retained_size(driver.router, exclude) for driver in drivers]
+    latencies: Dict[str, List[float]] = {}
+    for driver in drivers:
+        for action, values in driver.latencies.items():
+            latencies.setdefault(action, []).extend(values)
+    errors = [f"session {driver.index}: {error}" for driver in drivers for error in driver.errors]
+    total_requests = backend.requests - requests_before
+
+    report = {
+        "sessions": sessions,
+        "iterations": iterations,
+        "wall_s": wall,
+        "cpu_s": cpu,
+        "cpu_per_session_ms": _summary([driver.cpu_time for driver in drivers]),
+        "requests": total_requests,
+        "requests_per_s": total_requests / wall if wall else None,
+        "requests_per_session": sum(d.requests for d in drivers) / sessions if sessions else 0,
+        "memory_retained_per_session_kb":
+            (memory_after - memory_before) / sessions / 1024 if trace_memory and sessions else None,
+        "memory_peak_mb": (memory_peak - memory_before) / 1024 / 1024 if trace_memory else None,
+        "session_graph_kb": {
+            "mean": sum(sizes) / len(sizes) / 1024 if sizes else 0,
+            "max": max(sizes) / 1024 if sizes else 0,
+        },
+        "overlay_controls": _count_summary([len(driver.page.overlay) for driver in drivers]),
+        "budget_evictions": sum(driver.router.memory.evictions for driver in drivers),
+        "pruned_overlays": sum(driver.router.memory.pruned for driver in drivers),
+        "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "handler_latency": {action: _summary(values) for action, values in latencies.items()},
+        "scheduler": scheduler_note(),
+        "errors": errors,
+    }
+    for driver in drivers:
+        driver.router.token_refresh.stop()
+        driver.services.outbox.stop()
+        driver.page.close()
+    return report
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    cpu = report["cpu_per_session_ms"]
+    graph = report["session_graph_kb"]
+    lines = [
+        f"Sesiones: {report['sessions']} x {report['iterations']} iteraciones en {report['wall_s']:.2f} s",
+        report["scheduler"],
+        f"CPU total: {report['cpu_s']:.2f} s; por sesión p50 {cpu['p50_ms'] / 1000:.3f} s, "
+        f"max {cpu['max_ms'] / 1000:.3f} s",
+        f"Peticiones al backend: {report['requests']} ({report['requests_per_s']:.1f}/s, "
+        f"{report['requests_per_session']:.1f} por sesión)",
+        f"Memoria por sesión (grafo de objetos): media {graph['mean']:.0f} KB, máx {graph['max']:.0f} KB; "
+        f"RSS máximo del proceso: {report['max_rss_mb']:.0f} MB",
+        f"Controles en overlay por sesión: p50 {report['overlay_controls']['p50']}, "
+        f"máx {report['overlay_controls']['max']}; presupuesto aplicado "
+        f"{report['budget_evictions']} veces, {report['pruned_overlays']} controles podados",
+    ]
+    if report["memory_retained_per_session_kb"] is not None:
+        lines.append(f"tracemalloc: {report['memory_retained_per_session_kb']:.0f} KB retenidos por sesión, "
+                     f"pico {report['memory_peak_mb']:.1f} MB")
+    lines += [
+        "",
+        f"{'acción':<18} {'n':>6} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9}",
+    ]
+    for action, data in report["handler_latency"].items():
+        lines.append(f"{action:<18} {data['count']:>6} {data['p50_ms']:>9.1f} {data['p95_ms']:>9.1f} "
+                     f"{data['max_ms']:>9.1f}")
+    if report["errors"]:
+        lines.append(f"\nErrores ({len(report['errors'])}):")
+        lines.extend(f"  {error}" for error in report["errors"][:20])
+    return "\n".join(lines)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.load_sessions",
+                                     description="Simula sesiones web concurrentes contra el backend simulado")
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--iterations", type=int, default=3, help="Vueltas lista -> filtros -> detalle")
+    parser.add_argument("--think-time", type=float, default=0.0, help="Pausa media entre acciones (ms)")
+    parser.add_argument("--ramp-up", type=float, default=0.0, help="Segundos para arrancar todas las sesiones")
+    parser.add_argument("--latency", type=float, default=0.0, help="Latencia simulada por petición (ms)")
+    parser.add_argument("--movements", type=int, default=10000)
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="Medir también con tracemalloc (más lento; afecta a las latencias)")
+    parser.add_argument("--unthrottled", action="store_true",
+                        help="Sin el token bucket de producción (límites de los benchmarks)")
+    parser.add_argument("--json", dest="json_path", help="Guardar el informe en este fichero")
+    args = parser.parse_args(argv)
+
+    if not args.unthrottled:
+        # Las sesiones compiten por el mismo token bucket que en producción
+        use_production_scheduler()
+
+    backend = StubBackend(movements=args.movements, users=args.users, latency=args.latency / 1000, seed=args.seed)
+    report = run_load(backend, args.sessions, args.iterations, think_time=args.think_time / 1000,
+                      ramp_up=args.ramp_up, seed=args.seed, trace_memory=args.trace_memory)
+    print(format_report(report))
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump({"meta": vars(args), "report": report}, f, indent=2)
+        print(f"Informe guardado en {args.json_path}")
+    return 1 if report["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,293 @@
+# benchmarks/stub_backend.py
+import gzip
+import json
+import random
+import threading
+import time
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import httpx
+import jwt
+
+from config.constants import Permissions
+
+Handler = Callable[[httpx.Request], Tuple[int, Any]]
+
+_BASE_DATE = datetime(2024, 1, 1, 9, 0, 0)
+_FIRST_NAMES = ["Lucía", "Pablo", "Marta", "Javier", "Elena", "Sergio", "Laura", "Daniel", "Paula", "Álvaro"]
+_SURNAMES = ["García", "Martínez", "López", "Sánchez", "Pérez", "Gómez", "Fernández", "Ruiz", "Díaz", "Moreno"]
+_CONCEPTS = ["Material campamento", "Cuota anual", "Transporte", "Alquiler local", "Subvención", "Comida salida"]
+
+
+class StubBackend:
+    """In-process stand-in for the backend API with synthetic datasets
+
+    Serves every endpoint the services call through an ``httpx.MockTransport``
+    (see ``transport()``). List bodies are serialized once and reused, so the
+    stub adds almost nothing to the measured time. ``latency`` (seconds) is
+    slept on every request to simulate the network. With ``gzip_min_size``
+    JSON bodies of at least that many bytes are gzipped when the request
+    accepts it, like a GZip middleware would.
+    """
+
+    def __init__(self, movements: int = 10000, users: int = 5000, events: int = 200,
+                 organizations: int = 500, invoices_per_movement: int = 3, docs_per_movement: int = 2,
+                 document_size: int = 64 * 1024, latency: float = 0.0, seed: int = 1,
+                 gzip_min_size: Optional[int] = None):
+        self.latency = latency
+        self.gzip_min_size = gzip_min_size
+        self.invoices_per_movement = invoices_per_movement
+        self.docs_per_movement = docs_per_movement
+        self.requests = 0
+        self._count_lock = threading.Lock()
+        rng = random.Random(seed)
+
+        self.categories = [
+            {"id_categorias_subvencion": i, "categoria": f"Categoría {i}",
+             "descripcion": f"Gastos de la categoría {i}", "tipo_categoria": "gasto" if i % 2 else "ingreso"}
+            for i in range(1, 21)
+        ]
+        self.events = [
+            {"event_id": i, "name": f"Evento {i}", "description": f"Actividad {i}",
+             "year": 2022 + i % 4, "month": 1 + i % 12, "day": 1 + i % 28}
+            for i in range(1, events + 1)
+        ]
+        self.movements = [self._movement(i, rng, events) for i in range(1, movements + 1)]
+        self.users = [self._user(i, rng) for i in range(1, users + 1)]
+        self.organizations = [
+            {"id_organizacion": i, "nif": f"B{10000000 + i}", "nombre": f"Organización {i}",
+             "descripcion": "Proveedor", "iban": f"ES{7600000000000000000000 + i}",
+             "direccion": f"Calle Mayor {i}", "poblacion": "Valencia", "codigo_postal": "46001",
+             "provincia": "Valencia", "pais": "España", "email": f"org{i}@example.com", "telefono": "960000000"}
+            for i in range(1, organizations + 1)
+        ]
+        self.roles = [
+            {"id_rol": i, "nombre": f"Rol {i}", "descripcion": f"Permisos del rol {i}"} for i in range(1, 9)
+        ]
+        self.document = bytes(rng.getrandbits(8) for _ in range(document_size))
+
+        self._bodies: Dict[Any, bytes] = {}
+        self._gzipped: Dict[int, bytes] = {}  # id(cuerpo cacheado) -> cuerpo con gzip
+        self._next_id = 1_000_000
+        self._routes: Dict[Tuple[str, str], Handler] = {
+            ("POST", "/auth/login"): lambda r: (200, self._token()),
+            ("POST", "/auth/refresh"): lambda r: (200, self._token()),
+            ("GET", "/user/me"): lambda r: (200, self._profile(self.users[0])),
+            ("GET", "/user/my_permissions"): lambda r: (200, [p.value for p in Permissions]),
+            ("GET", "/home/notifications"): lambda r: (200, {"notifications": [f"Aviso {i}" for i in range(10)]}),
+            ("GET", "/categories/categories_list"): self._cached("categories", lambda r: self.categories),
+            ("GET", "/economic_movement/get_last_economic_movements"):
+                self._cached("last_movements", lambda r: self.movements[-50:]),
+            ("GET", "/economic_movement/economic_movements_list"): self._movements_list,
+            ("GET", "/economic_movement/economic_movement_detail"):
+                self._detail(self.movements, "movement_id"),
+            ("GET", "/invoices/get_invoices_by_movement"): self._invoices,
+            ("GET", "/accounting_docs/accounting_docs_list"): self._docs,
+            ("GET", "/invoices/download_invoice"): self._download,
+            ("GET", "/accounting_docs/download_accounting_doc"): self._download,
+            ("GET", "/event/events_list"): self._events_list,
+            ("GET", "/event/event_details"): self._detail(self.events, "event_id"),
+            ("GET", "/user/users_list"): self._cached("users", lambda r: [self._short_user(u) for u in self.users]),
+            ("GET", "/user/user_details"): self._detail(self.users, "user_request_id"),
+            ("GET", "/organization/organizations_list"): self._cached("organizations", lambda r: [
+                {key: o[key] for key in ("id_organizacion", "nif", "nombre", "telefono", "email")}
+                for o in self.organizations
+            ]),
+            ("GET", "/organization/organization_details"): self._detail(self.organizations, "organization_id"),
+            ("GET", "/roles/roles_list"): self._cached("roles", lambda r: self.roles),
+            ("GET", "/roles/get_user_roles"): lambda r: (200, [
+                {**role, "fecha_asignacion": _BASE_DATE.isoformat()} for role in self.roles[:2]
+            ]),
+            ("POST", "/economic_movement/create_economic_movement"): self._create("id_movimiento_economico"),
+            ("POST", "/invoices/create_invoice"): self._create("id_factura"),
+            ("POST", "/event/create_event"): self._create("event_id"),
+            ("POST", "/organization/create_organization"): self._create("id_organizacion"),
+            ("POST", "/user/create_user"): self._create("id_user"),
+            ("POST", "/user/create_user_link"): lambda r: (200, {"link": "http://stub.local/signup/bench"}),
+        }
+
+    # Transporte
+
+    def transport(self) -> httpx.MockTransport:
+        return httpx.MockTransport(self.handle)
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        with self._count_lock:
+            self.requests += 1
+        if self.latency:
+            time.sleep(self.latency)
+        handler = self._routes.get((request.method, request.url.path))
+        if handler is None:
+            # Actualizaciones, borrados, roles...: basta con un 200
+            if request.method in ("POST", "PUT", "PATCH", "DELETE"):
+                return httpx.Response(200, json=True)
+            return httpx.Response(404, json={"detail": "Not found"})
+        status, body = handler(request)
+        if isinstance(body, httpx.Response):
+            return body
+        if not isinstance(body, bytes):
+            body = json.dumps(body).encode()
+        headers = {"Content-Type": "application/json"}
+        if (self.gzip_min_size is not None and len(body) >= self.gzip_min_size
+                and "gzip" in request.headers.get("Accept-Encoding", "")):
+            body = self._gzip(body)
+            headers["Content-Encoding"] = "gzip"
+        return httpx.Response(status, content=body, headers=headers)
+
+    def _gzip(self, body: bytes) -> bytes:
+        cached = any(body is value for value in self._bodies.values())
+        if not cached:
+            return gzip.compress(body, compresslevel=6)
+        compressed = self._gzipped.get(id(body))
+        if compressed is None:
+            compressed = self._gzipped[id(body)] = gzip.compress(body, compresslevel=6)
+        return compressed
+
+    # Rutas
+
+    def _cached(self, key: Any, build: Callable[[httpx.Request], Any]) -> Handler:
+        """Serialize a body once and serve the same bytes afterwards"""
+        def handler(request: httpx.Request):
+            body = self._bodies.get(key)
+            if body is None:
+                body = self._bodies[key] = json.dumps(build(request)).encode()
+            return 200, body
+        return handler
+
+    def _detail(self, items: List[Dict[str, Any]], param: str) -> Handler:
+        def handler(request: httpx.Request):
+            item_id = _int_param(request, param)
+            if item_id is None or not 1 <= item_id <= len(items):
+                return 404, {"detail": "Not found"}
+            return 200, items[item_id - 1]
+        return handler
+
+    def _movements_list(self, request: httpx.Request):
+        event_id = _int_param(request, "id_evento")
+        if event_id is None:
+            return self._cached("movements", lambda r: self.movements)(request)
+        return 200, [m for m in self.movements if m["id_evento"] == event_id]
+
+    def _events_list(self, request: httpx.Request):
+        year = _int_param(request, "year")
+        return self._cached(("events", year), lambda r: [
+            e for e in self.events if year is None or e["year"] == year
+        ])(request)
+
+    def _invoices(self, request: httpx.Request):
+        movement_id = _int_param(request, "movimiento_id") or 1
+        base = movement_id * 100
+        return 200, [
+            {"id_factura": base + i, "nombre": f"Factura {base + i}", "ind_computable": 10,
+             "cantidad_ctm": 1000 * (i + 1), "fecha_emision_factura": date(2024, 1 + i % 12, 1).isoformat(),
+             "id_emisor": 1 + i % max(1, len(self.organizations)), "id_beneficiario": None,
+             "id_movimiento_economico": movement_id, "cod_factura_externo": f"F-{base + i}",
+             "fecha_creacion": _BASE_DATE.isoformat(), "usuaio_creacion": 1}
+            for i in range(self.invoices_per_movement)
+        ]
+
+    def _docs(self, request: httpx.Request):
+        movement_id = _int_param(request, "movimiento_id") or 1
+        base = movement_id * 100
+        return 200, [
+            {"id_docs_contables": base + i, "nombre": f"Documento {base + i}",
+             "path": f"/docs/{base + i}.pdf", "id_movimiento_economico": movement_id}
+            for i in range(self.docs_per_movement)
+        ]
+
+    def _download(self, request: httpx.Request):
+        etag = '"bench-document"'
+        if request.headers.get("If-None-Match") == etag:
+            return 304, httpx.Response(304, headers={"ETag": etag})
+        return 200, httpx.Response(200, content=self.document,
+                                   headers={"ETag": etag, "Content-Type": "application/pdf"})
+
+    @staticmethod
+    def _token(user_id: int = 1) -> Dict[str, str]:
+        """JWT with the claims the app reads (the app does not check the signature)"""
+        claims = {"sub": str(user_id), "nombre": "Benchmark", "apellidos": "User", "exp": int(time.time()) + 3600}
+        return {"access_token": jwt.encode(claims, "stub-backend", algorithm="HS256"), "token_type": "bearer"}
+
+    def _create(self, id_field: str) -> Handler:
+        def handler(request: httpx.Request):
+            with self._count_lock:
+                self._next_id += 1
+                new_id = self._next_id
+            return 200, {id_field: new_id}
+        return handler
+
+    # Datos sintéticos
+
+    @staticmethod
+    def _movement(i: int, rng: random.Random, events: int) -> Dict[str, Any]:
+        created = (_BASE_DATE + timedelta(minutes=37 * i)).isoformat()
+        return {
+            "id_movimiento_economico": i,
+            "ind_estado": rng.choice((7, 8, 9)),
+            "id_evento": rng.randint(1, max(1, events)),
+            "concepto": f"{rng.choice(_CONCEPTS)} {i}",
+            "cantidad_total_ctm": rng.randint(100, 500000),
+            "imputable_subvencion": rng.random() < 0.3,
+            "ano_ejercicio": 2024,
+            "categorias_subvencion_id": rng.randint(1, 20),
+            "usuario_creacion": 1,
+            "fecha_creacion": created,
+            "usuario_actualizacion": 1,
+            "fecha_actualizacion": created,
+            "consideraciones": "Generado para benchmark" if i % 5 == 0 else None,
+            "ind_movimiento": rng.choice((12, 13)),
+            "ind_mov_caja": rng.choice((14, 15)),
+        }
+
+    @staticmethod
+    def _user(i: int, rng: random.Random) -> Dict[str, Any]:
+        name, surname = rng.choice(_FIRST_NAMES), rng.choice(_SURNAMES)
+        return {
+            "id_user": i,
+            "name": name,
+            "surname": surname,
+            "email": f"user{i}@example.com",
+            "phone": f"6{i:08d}",
+            "nif_nie": f"{i:08d}X",
+            "birth_date": date(2000 + i % 15, 1 + i % 12, 1 + i % 28).isoformat(),
+            "signup_date": date(2020, 1, 1).isoformat(),
+            "address": f"Calle {surname} {i}",
+            "city": "Valencia",
+            "social_security": None,
+            "account_holder": f"{name} {surname}",
+            "iban": f"ES{9100000000000000000000 + i}",
+            "parent1_name": f"{rng.choice(_FIRST_NAMES)} {surname}",
+            "parent1_id": f"{i + 50000000:08d}Y",
+            "parent1_phone": "600000000",
+            "parent1_email": f"parent{i}@example.com",
+            "notes": None,
+            "ind_estado": "1",
+            "ind_cre": "1",
+            "ind_rgcre": "1",
+            "direct_debit_reference": f"REF{i:06d}",
+            "created_by": 1,
+            "creation_date": _BASE_DATE.isoformat(),
+            "updated_by": 1,
+            "update_date": _BASE_DATE.isoformat(),
+        }
+
+    @staticmethod
+    def _short_user(user: Dict[str, Any]) -> Dict[str, Any]:
+        keys = ("id_user", "name", "surname", "nif_nie", "email", "phone", "ind_estado",
+                "ind_cre", "ind_rgcre", "parent1_id", "parent2_id")
+        return {key: user.get(key) for key in keys}
+
+    @staticmethod
+    def _profile(user: Dict[str, Any]) -> Dict[str, Any]:
+        skip = {"id_user", "ind_estado", "ind_cre", "ind_rgcre", "direct_debit_reference",
+                "created_by", "creation_date", "updated_by", "update_date"}
+        return {key: value for key, value in user.items() if key not in skip}
+
+
+def _int_param(request: httpx.Request, name: str) -> Optional[int]:
+    value = request.url.params.get(name)
+    try:
+        return int(value) if value is not None else None
+    except ValueError:
+        return None
@@ -3,6 +3,7 @@
 import flet as ft
 from typing import List, Optional, Callable, Dict, Any
 from datetime import date
+from core.overlay_manager import overlays_for
 
 
 class FormField:
@@ -43,9 +44,14 @@ class FormField:
 
 
 class ResponsiveForm:
-    """Responsive form builder"""
-    def __init__(self, page: ft.Page):
+    """Responsive form builder
+
+    ``owner`` (the view showing the form) owns the date pickers, so they go
+    back to the pool when the view is disposed.
+    """
+    def __init__(self, page: ft.Page, owner: Any = None):
         self.page = page
+        self.owner = owner if owner is not None else self
         self.fields: Dict[str, FormField] = {}
         self.sections: List[Dict] = []
     
@@ -147,10 +153,10 @@ class ResponsiveForm:
     
     def _show_date_picker(self, field_name: str):
         """Show date picker for date fields"""
-        date_picker = ft.DatePicker(
+        date_picker = overlays_for(self.page).date_picker(
+            self.owner, f"field:{field_name}",
             on_change=lambda e: self._handle_date_selection(field_name, e.control.value)
         )
-        self.page.overlay.append(date_picker)
         date_picker.pick_date()
         self.page.update()
     
@@ -0,0 +1,45 @@
+# components/common/trace_overlay.py
+import flet as ft
+from core.tracing import Span
+
+
+class TraceOverlay:
+    """Debug panel with the span breakdown of the last screen load"""
+
+    def __init__(self, page: ft.Page, max_lines: int = 40):
+        self.page = page
+        self.max_lines = max_lines
+        self.text = ft.Text("", size=11, font_family="monospace", selectable=True)
+        self.panel = ft.Container(
+            content=ft.Column([
+                ft.Row([
+                    ft.Text("Trazas", weight=ft.FontWeight.BOLD, size=12),
+                    ft.IconButton(ft.Icons.CLOSE, icon_size=16, on_click=lambda e: self.hide()),
+                ], alignment=ft.MainAxisAlignment.SPACE_BETWEEN),
+                ft.Column([self.text], scroll=ft.ScrollMode.AUTO, height=220),
+            ], spacing=4, tight=True),
+            bgcolor=ft.Colors.with_opacity(0.92, ft.Colors.BLACK),
+            padding=10,
+            border_radius=8,
+            width=420,
+            right=10,
+            bottom=10,
+        )
+        self.text.color = ft.Colors.GREEN_200
+        self._attached = False
+
+    def show_span(self, span: Span):
+        """Render a finished root span"""
+        lines = span.flame_lines()
+        if len(lines) > self.max_lines:
+            lines = lines[:self.max_lines] + [f"... ({len(lines) - self.max_lines} más)"]
+        self.text.value = "\n".join(lines)
+        if not self._attached:
+            self.page.overlay.append(self.panel)
+            self._attached = True
+        self.panel.visible = True
+        self.page.update()
+
+    def hide(self):
+        self.panel.visible = False
+        self.page.update()
@@ -1,12 +1,128 @@
 # config/settings.py
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import Dict, List, Optional
 #from pydantic import Base
 
 class Settings(BaseSettings):
     # API Configuration
     SERVER_ROUTE: str = "https://lasatanicabk.pacoserver.cc"#"http://127.0.0.1:8000"
-    API_TIMEOUT: int = 30
+    API_TIMEOUT: int = 30  # Perfil por defecto de los timeouts
+    
+    # Perfiles de timeout (segundos) y qué endpoints los usan (patrones fnmatch, gana el primero)
+    TIMEOUT_PROFILES: Dict[str, Dict[str, float]] = {
+        "interactive": {"connect": 3, "read": 10, "write": 10, "pool": 3},
+        "bulk": {"connect": 5, "read": 60, "write": 30, "pool": 5},
+        "transfer": {"connect": 5, "read": 300, "write": 300, "pool": 10},
+    }
+    TIMEOUT_ROUTES: Dict[str, str] = {
+        "/auth/*": "interactive",
+        "/user/me": "interactive",
+        "/user/my_permissions": "interactive",
+        "/roles/*": "interactive",
+        "/categories/*": "interactive",
+        "/home/*": "interactive",
+        "/uploads/*": "transfer",
+        "/invoices/update_invoice_file": "transfer",
+        "/invoices/download_invoice": "transfer",
+        "/accounting_docs/upload_accounting_doc": "transfer",
+        "/accounting_docs/download_accounting_doc": "transfer",
+        "*_list": "bulk",
+        "/economic_movement/get_last_economic_movements": "bulk",
+    }
+    CACHE_ENABLED: bool = True  # Copias en memoria para escritura directa y como respaldo sin conexión
+    CACHE_TTL: int = 0  # Segundos que se sirven listas y detalles sin pedirlos (0 = siempre se piden)
+    CACHE_TTLS: Dict[str, int] = {"roles": 300, "categories": 300}  # Datos de referencia que cambian poco
+    
+    # Reintentos (solo peticiones idempotentes)
+    RETRY_MAX_ATTEMPTS: int = 3  # Intentos en total, incluido el primero
+    RETRY_BASE_DELAY: float = 0.5  # Segundos; se duplica en cada intento (con jitter)
+    RETRY_MAX_DELAY: float = 8.0
+    RETRY_MAX_TOTAL_DELAY: float = 15.0  # Tiempo máximo esperando entre intentos
+    RETRY_DEADLINE: float = 60.0  # Presupuesto total de una petición con sus reintentos
+    
+    # Circuit breaker
+    CIRCUIT_FAILURE_THRESHOLD: int = 5  # Fallos seguidos para dejar de llamar al servidor
+    CIRCUIT_RESET_TIMEOUT: float = 30.0  # Segundos hasta la petición de prueba
+    CIRCUIT_SCOPE: str = "host"  # "host" o "group" (por primer segmento de la ruta)
+    
+    # Planificador de peticiones (por host y clase de prioridad)
+    SCHEDULER_RATE: float = 20.0  # Peticiones por segundo
+    SCHEDULER_BURST: float = 40.0
+    SCHEDULER_INTERACTIVE_RESERVE: float = 10.0  # Tokens que solo puede usar la UI
+    SCHEDULER_CONCURRENCY: Dict[str, int] = {"interactive": 6, "prefetch": 3, "background": 2}
+    
+    # Métricas de la API (latencia, errores, bytes, tiempo de decodificación)
+    METRICS_ENABLED: bool = True
+    METRICS_SAMPLE_SIZE: int = 1024  # Muestras recientes por endpoint para p50/p95/p99
+    
+    # Trazas (vista -> servicio -> HTTP -> parseo -> render)
+    TRACING_ENABLED: bool = False
+    TRACE_BUFFER_SIZE: int = 50  # Trazas recientes guardadas en memoria
+    TRACING_OVERLAY: bool = False  # Panel de depuración con el desglose de cada pantalla
+    
+    SINGLE_FLIGHT_ENABLED: bool = True  # Compartir GET idénticos que están en curso
+    # Respuestas iguales para todos los usuarios con los mismos permisos: se comparten entre usuarios
+    SINGLE_FLIGHT_SHARED_ENDPOINTS: List[str] = ["/categories/categories_list", "/roles/roles_list"]
+    
+    SESSION_PERSIST_ENABLED: bool = True  # Guardar sesión, permisos y perfil entre reinicios
+    
+    JSON_DECODER: str = "auto"  # auto | orjson | pydantic_core | stdlib
+    JSON_VALIDATE_RAW: bool = True  # Construir los modelos directamente desde los bytes de la respuesta
+    
+    # Compresión
+    ACCEPT_ENCODING: str = "auto"  # auto (zstd, br, gzip según lo instalado), lista separada por comas o identity
+    REQUEST_COMPRESSION_ENABLED: bool = False  # Enviar con gzip los JSON grandes (el backend debe aceptar Content-Encoding)
+    REQUEST_COMPRESSION_MIN_BYTES: int = 16384
+    REQUEST_COMPRESSION_LEVEL: int = 6
+    
+    # Memoria por sesión
+    SESSION_MEMORY_BUDGET_MB: float = 64.0  # Caché de datos de la sesión; al superarlo se vacía
+    SESSION_MAX_OVERLAYS: int = 20  # Controles en page.overlay antes de podar los de vistas anteriores
+    MEMORY_TRACKING_ENABLED: bool = False  # Snapshots de tracemalloc por vista (lento; solo depuración)
+    MEMORY_HISTORY_SIZE: int = 30  # Registros por vista que se guardan
+    OVERLAY_POOL_SIZE: int = 4  # Selectores de fecha/archivo libres que se reutilizan, por tipo
+    
+    # Grabación y reproducción del tráfico (perfilado)
+    TRAFFIC_RECORD_PATH: Optional[str] = None  # Fichero .har donde grabar todas las peticiones
+    TRAFFIC_RECORD_BODIES: bool = False  # Guardar también los cuerpos (con los secretos ocultos)
+    TRAFFIC_RECORD_FLUSH_EVERY: int = 20  # Entradas entre volcados a disco del .jsonl (el .har se escribe al salir)
+    TRAFFIC_REDACT_KEYS: str = "token,password,secret,authorization,cookie,iban"
+    TRAFFIC_REPLAY_PATH: Optional[str] = None  # Servir las respuestas de un .har grabado (sin red)
+    
+    # Cola de cambios sin conexión
+    OUTBOX_ENABLED: bool = True
+    # El backend descarta duplicados por Idempotency-Key: solo entonces se reintentan y encolan las altas
+    BACKEND_IDEMPOTENCY_KEYS: bool = False
+    OUTBOX_PATH: Optional[str] = None  # Por defecto outbox.sqlite3 en el directorio de datos de la app
+    OUTBOX_RETRY_DELAY: float = 5.0  # Segundos, se duplica en cada intento fallido
+    OUTBOX_MAX_RETRY_DELAY: float = 300.0
+    OUTBOX_POLL_INTERVAL: float = 30.0  # Comprobación periódica aunque no haya avisos de conexión
+    
+    # Autenticación de las peticiones
+    AUTH_SCHEME: str = "bearer"  # "bearer" (cabecera Authorization) o "query" (?token=, backends antiguos)
+    AUTH_SCHEME_FALLBACK: bool = True  # Con bearer: ante un 401 probar una vez ?token= y recordar el que funcione
+    
+    # Token refresh
+    TOKEN_REFRESH_ENABLED: bool = False  # Activar cuando el backend tenga TOKEN_REFRESH_ENDPOINT
+    TOKEN_REFRESH_ENDPOINT: str = "/auth/refresh"
+    TOKEN_REFRESH_MARGIN: int = 60  # Segundos antes de exp en los que se renueva
+    TOKEN_REFRESH_RETRY_DELAY: int = 15  # Primer reintento tras un fallo transitorio (se duplica en cada uno)
+    TOKEN_REFRESH_MAX_RETRIES: int = 3  # Reintentos por token antes de esperar al siguiente login
+    
+    # Uploads
+    UPLOAD_CHUNKED_ENABLED: bool = False  # Requiere los endpoints /uploads/* en el backend
+    UPLOAD_CHUNK_SIZE: int = 1024 * 1024  # 1 MB
+    UPLOAD_CHUNK_THRESHOLD: int = 4 * 1024 * 1024  # Archivos menores se suben en una sola petición
+    UPLOAD_MMAP_THRESHOLD: int = 8 * 1024 * 1024  # Archivos mayores se leen con mmap
+    UPLOAD_MAX_RETRIES: int = 3
+    UPLOAD_RETRY_DELAY: float = 1.0  # Segundos, se duplica en cada reintento
+    UPLOAD_MAX_CONCURRENCY: int = 4  # Subidas simultáneas en los lotes de documentos
+    
+    # Document cache (facturas y documentos contables descargados)
+    DOCUMENT_CACHE_DIR: Optional[str] = None  # Por defecto <tmp>/satanica_docs
+    DOCUMENT_CACHE_MAX_BYTES: int = 200 * 1024 * 1024
+    DOCUMENT_CACHE_PART_MAX_AGE: int = 3600  # Segundos antes de borrar descargas a medias
+    DOCUMENT_CACHE_REVALIDATE_AFTER: int = 300  # Segundos que una copia se sirve sin consultar al backend (después se revalida en segundo plano)
     
     # UI Configuration
     APP_TITLE: str = "La Satanica"
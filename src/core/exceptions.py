@@ -16,6 +16,10 @@ class NetworkError(APIError):
     """Raised when network connectivity issues occur"""
     pass
 
+class CircuitOpenError(NetworkError):
+    """Raised without contacting the server while its circuit breaker is open"""
+    pass
+
 class ValidationError(APIError):
     """Raised when data validation fails"""
     pass
@@ -0,0 +1,185 @@
+# core/memory_tracker.py
+import gc
+import logging
+import time
+import tracemalloc
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Set
+
+import flet as ft
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ViewMemoryRecord:
+    """Memory figures of a session taken right after a view was shown"""
+
+    __slots__ = ("view", "at", "cache_bytes", "overlay_controls", "stale_overlays",
+                 "traced_delta", "top_allocations")
+
+    def __init__(self, view: str, cache_bytes: int, overlay_controls: int, stale_overlays: int):
+        self.view = view
+        self.at = time.time()
+        self.cache_bytes = cache_bytes
+        self.overlay_controls = overlay_controls
+        self.stale_overlays = stale_overlays
+        self.traced_delta: Optional[int] = None  # Bytes (tracemalloc) desde la vista anterior
+        self.top_allocations: List[str] = []
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class SessionMemoryTracker:
+    """Per-session memory accounting with a budget
+
+    The router calls ``view_leaving()`` and ``view_shown()`` around every
+    screen change. Overlay controls (pickers, dialogs opened with
+    ``page.open``) are attributed to the view that was shown when they
+    appeared; once that view is gone and they are closed they are "stale".
+    When the session's cached data goes over ``SESSION_MEMORY_BUDGET_MB`` the
+    cache is emptied and stale overlay controls (and the closures they keep
+    alive) are removed; stale controls are also pruned when the overlay holds
+    more than ``SESSION_MAX_OVERLAYS`` controls.
+
+    With ``MEMORY_TRACKING_ENABLED`` a tracemalloc snapshot is taken per view
+    and the biggest growths since the previous view are recorded. tracemalloc
+    is process-wide, so with several web sessions these figures mix them.
+    """
+
+    def __init__(self, page: ft.Page, services, budget_mb: Optional[float] = None,
+                 max_overlays: Optional[int] = None, tracking: Optional[bool] = None):
+        self.page = page
+        self.services = services
+        budget_mb = settings.SESSION_MEMORY_BUDGET_MB if budget_mb is None else budget_mb
+        self.budget_bytes = int(budget_mb * 1024 * 1024)
+        self.max_overlays = settings.SESSION_MAX_OVERLAYS if max_overlays is None else max_overlays
+        self.tracking = settings.MEMORY_TRACKING_ENABLED if tracking is None else tracking
+        self.records: Deque[ViewMemoryRecord] = deque(maxlen=settings.MEMORY_HISTORY_SIZE)
+        self.evictions = 0
+        self.pruned = 0
+        self._current: Optional[str] = None
+        self._shown = 0  # Número de la vista actual (cada show() cuenta aunque sea la misma clase)
+        self._owners: Dict[int, int] = {}  # id(control) -> número de la vista que lo añadió
+        self._pinned: Set[int] = set()
+        self._snapshot: Optional[tracemalloc.Snapshot] = None
+        if self.tracking and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def pin(self, control: ft.Control):
+        """Never prune this overlay control (app-wide panels)"""
+        self._pinned.add(id(control))
+
+    def view_leaving(self):
+        """Attribute overlay controls added during the interactions to the current view"""
+        self._claim_overlays()
+
+    def view_shown(self, view: str) -> ViewMemoryRecord:
+        """Record the session's memory after a view is shown and enforce the budget"""
+        self._current = view
+        self._shown += 1
+        self._claim_overlays()
+        record = self._measure(view)
+        if self.tracking:
+            self._trace(record)
+        self.records.append(record)
+
+        if record.cache_bytes > self.budget_bytes:
+            self.enforce(f"caché {record.cache_bytes // 1024} KB")
+        elif record.overlay_controls > self.max_overlays and record.stale_overlays:
+            self.prune_overlays()
+        return record
+
+    def usage(self) -> Dict[str, int]:
+        overlay = list(self.page.overlay)
+        return {
+            "cache_bytes": self.services.cache.approx_bytes(),
+            "overlay_controls": len(overlay),
+            "stale_overlays": len(self._stale(overlay)),
+        }
+
+    def enforce(self, reason: str = "presupuesto superado"):
+        """Evict the session caches and prune stale overlay controls"""
+        self.services.cache.clear()
+        self.evictions += 1
+        pruned = self.prune_overlays()
+        gc.collect()
+        logger.info(f"Session memory budget enforced ({reason}): cache cleared, {pruned} overlay controls removed")
+
+    def prune_overlays(self, keep_current: bool = True, update: bool = True) -> int:
+        """Remove closed overlay controls of views that are no longer shown"""
+        overlay = self.page.overlay
+        stale = self._stale(overlay, keep_current)
+        if not stale:
+            return 0
+        stale_ids = {id(control) for control in stale}
+        overlay[:] = [control for control in overlay if id(control) not in stale_ids]
+        for control_id in stale_ids:
+            self._owners.pop(control_id, None)
+        self.pruned += len(stale)
+        if update:
+            try:
+                self.page.update()
+            except Exception as e:
+                logger.debug(f"Page update after pruning overlays failed: {str(e)}")
+        return len(stale)
+
+    def reset(self):
+        """Session ended (logout): drop every unpinned overlay control and the history"""
+        self._claim_overlays()
+        self.prune_overlays(keep_current=False)
+        self._current = None
+        self._snapshot = None
+        self.records.clear()
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            **self.usage(),
+            "budget_bytes": self.budget_bytes,
+            "evictions": self.evictions,
+            "pruned_overlays": self.pruned,
+            "views": [record.to_dict() for record in self.records],
+        }
+
+    def _claim_overlays(self):
+        owner = self._shown
+        present = set()
+        for control in self.page.overlay:
+            control_id = id(control)
+            present.add(control_id)
+            if control_id not in self._owners and control_id not in self._pinned:
+                self._owners[control_id] = owner
+        # Olvidar los que ya no están (el id podría reutilizarse)
+        for control_id in [c for c in self._owners if c not in present]:
+            del self._owners[control_id]
+
+    def _stale(self, overlay: List[ft.Control], keep_current: bool = True) -> List[ft.Control]:
+        stale = []
+        for control in overlay:
+            owner = self._owners.get(id(control))
+            if owner is None or (keep_current and owner == self._shown):
+                continue
+            if getattr(control, "open", False):
+                continue  # Diálogo o selector todavía abierto
+            stale.append(control)
+        return stale
+
+    def _measure(self, view: str) -> ViewMemoryRecord:
+        usage = self.usage()
+        return ViewMemoryRecord(view, usage["cache_bytes"], usage["overlay_controls"], usage["stale_overlays"])
+
+    def _trace(self, record: ViewMemoryRecord):
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+        ))
+        if self._snapshot is not None:
+            diff = snapshot.compare_to(self._snapshot, "lineno")
+            record.traced_delta = sum(stat.size_diff for stat in diff)
+            record.top_allocations = [
+                f"{stat.traceback[0].filename}:{stat.traceback[0].lineno} {stat.size_diff / 1024:+.1f} KB"
+                for stat in diff[:5] if stat.size_diff
+            ]
+        self._snapshot = snapshot
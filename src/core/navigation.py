@@ -1,6 +1,35 @@
 # core/navigation.py
+import time
+from typing import Dict, Optional, Tuple
 import flet as ft
-from config.constants import Routes, Permissions
+from config.constants import Routes
+from services.permission_service import ROUTE_MASKS
+
+# Destinos del menú lateral, en orden (los permisos salen de ROUTE_PERMISSIONS)
+NAV_ITEMS = (
+    {"label": "Inicio", "icon": ft.Icons.HOME, "route": Routes.HOME},
+    {"label": "Perfil", "icon": ft.Icons.PERSON, "route": Routes.PROFILE},
+    {"label": "Economía", "icon": ft.Icons.MONETIZATION_ON, "route": Routes.ECONOMY},
+    {"label": "Usuarios", "icon": ft.Icons.PEOPLE, "route": Routes.USERS},
+    {"label": "Organizaciones", "icon": ft.Icons.APARTMENT, "route": Routes.ORGANIZATIONS},
+    {"label": "Eventos", "icon": ft.Icons.EVENT, "route": Routes.EVENTS},
+)
+
+# Ítems visibles por bitset de permisos: se calculan una vez por combinación de permisos
+_NAV_BY_MASK: Dict[int, Tuple[dict, ...]] = {}
+
+
+def nav_items_for(mask: int) -> Tuple[dict, ...]:
+    """Drawer items visible for a permission bitset"""
+    items = _NAV_BY_MASK.get(mask)
+    if items is None:
+        items = tuple(
+            item for item in NAV_ITEMS
+            if item["route"] not in ROUTE_MASKS or mask & ROUTE_MASKS[item["route"]]
+        )
+        _NAV_BY_MASK[mask] = items
+    return items
+
 
 class NavigationMixin:
     """Mixin to provide navigation functionality to views"""
@@ -14,66 +43,20 @@ class NavigationMixin:
                 on_click=lambda e: self.page.open(self.page.drawer)
             ),
             center_title=True,
+            actions=[self._create_outbox_badge()],
         )
         
-        # Definir elementos de navegación con sus permisos requeridos
-        nav_items = [
-            {
-                "label": "Inicio",
-                "icon": ft.Icons.HOME,
-                "selected_icon": ft.Icons.HOME,
-                "route": Routes.HOME,
-                "permission": Permissions.HOME
-            },
-            {
-                "label": "Perfil", 
-                "icon": ft.Icons.PERSON,
-                "selected_icon": ft.Icons.PERSON,
-                "route": Routes.PROFILE,
-                "permission": Permissions.PROFILE
-            },
-            {
-                "label": "Economía",
-                "icon": ft.Icons.MONETIZATION_ON,
-                "selected_icon": ft.Icons.MONETIZATION_ON,
-                "route": Routes.ECONOMY,
-                "permission": Permissions.MOVEMENTS_READ
-            },
-            {
-                "label": "Usuarios",
-                "icon": ft.Icons.PEOPLE,
-                "selected_icon": ft.Icons.PEOPLE,
-                "route": Routes.USERS,
-                "permission": Permissions.USERS_LIST
-            },
-            {
-                "label": "Organizaciones",
-                "icon": ft.Icons.APARTMENT,
-                "selected_icon": ft.Icons.APARTMENT,
-                "route": Routes.ORGANIZATIONS,
-                "permission": Permissions.ORGANIZATION_LIST
-            },
-            {
-                "label": "Eventos",
-                "icon": ft.Icons.EVENT,
-                "selected_icon": ft.Icons.EVENT,
-                "route": Routes.EVENTS,
-                "permission": Permissions.EVENTS_LIST
-            },
-        ]
-        
-        # Filtrar elementos basados en permisos
+        # Elementos precalculados para los permisos del usuario
+        self._nav_items = nav_items_for(self.services.permissions.mask)
         controls = [ft.Container(height=12)]
-        for item in nav_items:
-            if (not item["permission"] or 
-                self.services.permissions.has_permission(item["permission"].value)):
-                controls.append(
-                    ft.NavigationDrawerDestination(
-                        label=item["label"],
-                        icon=item["icon"],
-                        selected_icon=item["selected_icon"]
-                    )
-                )
+        controls.extend(
+            ft.NavigationDrawerDestination(
+                label=item["label"],
+                icon=item["icon"],
+                selected_icon=item["icon"]
+            )
+            for item in self._nav_items
+        )
         
         controls.extend([
             ft.Divider(),
@@ -89,30 +72,80 @@ class NavigationMixin:
             on_change=self._handle_navigation
         )
     
-    def _handle_navigation(self, e):
-        """Handle navigation drawer selections"""
-        # Reconstruir la lista de rutas filtradas
-        nav_items = [
-            {"route": Routes.HOME, "permission": Permissions.HOME},
-            {"route": Routes.PROFILE, "permission": Permissions.PROFILE},
-            {"route": Routes.ECONOMY, "permission": Permissions.MOVEMENTS_READ},
-            {"route": Routes.USERS, "permission": Permissions.USERS_LIST},
-            {"route": Routes.ORGANIZATIONS, "permission": Permissions.ORGANIZATION_LIST},
-            {"route": Routes.EVENTS, "permission": Permissions.EVENTS_LIST},
-            None,  # Divider
-            Routes.LOGOUT
-        ]
+    def _create_outbox_badge(self) -> ft.IconButton:
+        """AppBar button with the number of changes waiting to be sent (hidden when none)"""
+        outbox = self.services.outbox
+        count = outbox.pending_count()
+        button = ft.IconButton(
+            icon=ft.Icons.CLOUD_UPLOAD,
+            tooltip="Cambios pendientes de enviar",
+            badge=ft.Badge(text=str(count)),
+            visible=count > 0,
+            on_click=lambda e: self._show_outbox_dialog(),
+        )
+        
+        def on_change(pending: int):
+            button.badge = ft.Badge(text=str(pending))
+            button.visible = pending > 0
+            try:
+                button.update()
+            except Exception:
+                pass  # La vista ya no está en la página
+        
+        self._unsubscribers.append(outbox.add_listener(on_change))
+        return button
+    
+    def _show_outbox_dialog(self):
+        """List the queued changes; conflicts can be discarded"""
+        outbox = self.services.outbox
+        
+        def discard(entry_id: int):
+            outbox.discard(entry_id)
+            self.page.close(dialog)
+            self._show_outbox_dialog()
         
-        # Filtrar rutas basadas en permisos
-        filtered_routes = []
-        for item in nav_items:
-            if item is None:
-                filtered_routes.append(None)
-            elif item == Routes.LOGOUT:
-                filtered_routes.append(Routes.LOGOUT)
-            elif (isinstance(item, dict) and self.services.permissions.has_permission(item["permission"].value)):
-                filtered_routes.append(item["route"])
+        def retry(e):
+            outbox.retry_now()
+            self.page.close(dialog)
         
+        rows = []
+        for entry in outbox.entries():
+            created = time.strftime("%d/%m/%Y %H:%M", time.localtime(entry.created_at))
+            if entry.state == entry.CONFLICT:
+                status = ft.Text(f"Rechazado: {entry.last_error}", color=ft.Colors.RED_700, size=12)
+            elif entry.last_error:
+                status = ft.Text(f"Intentos: {entry.attempts} ({entry.last_error})", color=ft.Colors.GREY_600, size=12)
+            else:
+                status = ft.Text("Pendiente", color=ft.Colors.GREY_600, size=12)
+            rows.append(ft.ListTile(
+                leading=ft.Icon(ft.Icons.ERROR if entry.state == entry.CONFLICT else ft.Icons.SCHEDULE),
+                title=ft.Text(entry.label or entry.kind),
+                subtitle=ft.Column([ft.Text(created, size=12), status], spacing=2, tight=True),
+                trailing=ft.IconButton(
+                    ft.Icons.DELETE, tooltip="Descartar",
+                    on_click=lambda e, entry_id=entry.id: discard(entry_id),
+                ) if entry.state == entry.CONFLICT else None,
+            ))
+        
+        dialog = ft.AlertDialog(
+            title=ft.Text("Cambios pendientes de enviar"),
+            content=ft.Column(rows or [ft.Text("No hay cambios pendientes")], tight=True, scroll=ft.ScrollMode.AUTO),
+            actions=[
+                ft.TextButton("Reintentar ahora", on_click=retry),
+                ft.TextButton("Cerrar", on_click=lambda e: self.page.close(dialog)),
+            ],
+        )
+        self.page.open(dialog)
+    
+    def _handle_navigation(self, e):
+        """Handle navigation drawer selections"""
+        # Índices: destinos visibles, luego "Cerrar Sesión" (el divisor no cuenta)
+        nav_items = getattr(self, "_nav_items", None) or nav_items_for(self.services.permissions.mask)
         selected_index = e.control.selected_index
-        if selected_index < len(filtered_routes) and filtered_routes[selected_index]:
-            self.router.navigate_to(filtered_routes[selected_index])
+        route: Optional[str] = None
+        if selected_index < len(nav_items):
+            route = nav_items[selected_index]["route"]
+        elif selected_index == len(nav_items):
+            route = Routes.LOGOUT
+        if route:
+            self.router.navigate_to(route)
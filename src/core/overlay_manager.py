@@ -0,0 +1,131 @@
+# core/overlay_manager.py
+import logging
+import weakref
+from datetime import date
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import flet as ft
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FIRST_DATE = date(2020, 1, 1)
+DEFAULT_LAST_DATE = date(2030, 12, 31)
+
+# Un gestor por página (cada sesión web tiene la suya)
+_managers: "weakref.WeakKeyDictionary[ft.Page, OverlayManager]" = weakref.WeakKeyDictionary()
+
+
+def overlays_for(page: ft.Page) -> "OverlayManager":
+    """Overlay manager of a page, created on first use"""
+    manager = _managers.get(page)
+    if manager is None:
+        manager = OverlayManager(page)
+        _managers[page] = manager
+    return manager
+
+
+class OverlayManager:
+    """Pooled date and file pickers for one page
+
+    Views ask for a picker with an owner (the view) and a key. The same owner
+    and key always get the same picker back, reconfigured, so opening a
+    dialog or a filter twice does not add a second control to
+    ``page.overlay``. When the view is disposed its pickers are taken out of
+    the overlay, their handlers dropped and kept in a small pool for the
+    next view.
+    """
+
+    def __init__(self, page: ft.Page, pool_size: Optional[int] = None):
+        self.page = page
+        self.pool_size = settings.OVERLAY_POOL_SIZE if pool_size is None else pool_size
+        self._free: Dict[str, List[ft.Control]] = {"date": [], "file": []}
+        self._leased: Dict[Tuple[int, str, str], ft.Control] = {}  # (id(owner), tipo, clave) -> selector
+        self.created = 0
+        self.reused = 0
+
+    def date_picker(self, owner: Any, key: str, on_change: Optional[Callable] = None,
+                    first_date: date = DEFAULT_FIRST_DATE, last_date: date = DEFAULT_LAST_DATE,
+                    **props) -> ft.DatePicker:
+        """DatePicker of owner for key, mounted in the overlay"""
+        picker = self._lease(owner, "date", key, ft.DatePicker)
+        picker.value = None
+        picker.first_date = first_date
+        picker.last_date = last_date
+        picker.on_change = on_change
+        for name, value in props.items():
+            setattr(picker, name, value)
+        return picker
+
+    def file_picker(self, owner: Any, key: str, on_result: Optional[Callable] = None,
+                    on_upload: Optional[Callable] = None) -> ft.FilePicker:
+        """FilePicker of owner for key, mounted in the overlay"""
+        picker = self._lease(owner, "file", key, ft.FilePicker)
+        picker.on_result = on_result
+        picker.on_upload = on_upload
+        return picker
+
+    def release(self, owner: Any, update: bool = True) -> int:
+        """Take every picker of owner out of the overlay and back to the pool"""
+        return self._release_id(id(owner), update)
+
+    def clear(self):
+        """Drop every picker (logout)"""
+        for owner_id in {key[0] for key in self._leased}:
+            self._release_id(owner_id, update=False)
+        for pool in self._free.values():
+            pool.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "leased": len(self._leased),
+            "pooled": sum(len(pool) for pool in self._free.values()),
+            "created": self.created,
+            "reused": self.reused,
+        }
+
+    def _release_id(self, owner_id: int, update: bool) -> int:
+        keys = [key for key in self._leased if key[0] == owner_id]
+        if not keys:
+            return 0
+        released = [self._leased.pop(key) for key in keys]
+        released_ids = {id(picker) for picker in released}
+        overlay = self.page.overlay
+        overlay[:] = [control for control in overlay if id(control) not in released_ids]
+        for (_, kind, _), picker in zip(keys, released):
+            self._reset(kind, picker)
+            if len(self._free[kind]) < self.pool_size:
+                self._free[kind].append(picker)
+        if update:
+            try:
+                self.page.update()
+            except Exception as e:
+                logger.debug(f"Page update after releasing pickers failed: {str(e)}")
+        return len(released)
+
+    def _lease(self, owner: Any, kind: str, key: str, factory: Callable[[], ft.Control]) -> ft.Control:
+        lease_key = (id(owner), kind, key)
+        picker = self._leased.get(lease_key)
+        if picker is None:
+            if self._free[kind]:
+                picker = self._free[kind].pop()
+                self.reused += 1
+            else:
+                picker = factory()
+                self.created += 1
+            self._leased[lease_key] = picker
+        if picker not in self.page.overlay:
+            self.page.overlay.append(picker)
+        return picker
+
+    @staticmethod
+    def _reset(kind: str, picker: ft.Control):
+        if kind == "date":
+            picker.on_change = None
+            picker.on_dismiss = None
+            picker.open = False
+        else:
+            picker.on_result = None
+            picker.on_upload = None
+
@@ -1,23 +1,58 @@
 # core/router.py
+import logging
+import threading
 from typing import Dict, Type, Any, Optional
 import flet as ft
 from config.constants import Routes
 from .session_manager import SessionManager
+from .token_refresh import TokenRefreshScheduler
+from .tracing import tracer, instrument_page
+from .memory_tracker import SessionMemoryTracker
+from .overlay_manager import overlays_for
+from config.settings import settings
 from services.service_container import ServiceContainer
-from config.constants import ROUTE_PERMISSIONS, Permissions
+from services.circuit_breaker import CircuitState
+from services.request_scheduler import Priority
+from models.user import UserProfile
+
+logger = logging.getLogger(__name__)
 
 
 class Router:
     """Enhanced router with dependency injection and session management"""
     
-    def __init__(self, page: ft.Page):
+    def __init__(self, page: ft.Page, services: Optional[ServiceContainer] = None):
         self.page = page
+        instrument_page(page)
+        self.trace_overlay = None
+        if tracer.enabled and settings.TRACING_OVERLAY:
+            from components.common.trace_overlay import TraceOverlay
+            self.trace_overlay = TraceOverlay(page)
         self.session_manager = SessionManager(page)
-        self.services = ServiceContainer()
+        self.services = services or ServiceContainer()
         self.services.set_session_manager(self.session_manager)
         
+        # Memoria de la sesión: cachés y overlays huérfanos, con presupuesto
+        self.memory = SessionMemoryTracker(page, self.services)
+        if self.trace_overlay:
+            self.memory.pin(self.trace_overlay.panel)
+        
+        # Persistir permisos y perfil cada vez que se descargan
+        store = self.session_manager.store
+        self.services.permissions.on_loaded = store.save_permissions
+        self.services.auth.on_profile_loaded = lambda profile: store.save_profile(profile.model_dump(mode="json"))
+        
+        # Renovación del token antes de que caduque
+        self.token_refresh = TokenRefreshScheduler(
+            self.session_manager, self.services.api_client, self.services.auth.refresh_token
+        )
+        
+        # Avisar cuando el servidor deja de responder o se recupera
+        self.services.api_client.breaker.add_listener(self._on_circuit_change)
+        
         self.routes: Dict[str, Type] = {}
         self.current_view: Optional[Any] = None
+        self.current_route: Optional[str] = None
         self._register_routes()
     
     def _register_routes(self):
@@ -59,6 +94,53 @@ class Router:
             Routes.EVENT_CREATE: EventFormView,
         }
     
+    def restore_session(self) -> bool:
+        """Restore a persisted session so home renders without blocking requests"""
+        record = self.session_manager.restore_session()
+        if not record:
+            return False
+        
+        self.services.api_client.set_token(record["access_token"])
+        if record.get("permissions") is not None:
+            self.services.permissions.set_permissions(record["permissions"])
+        if record.get("profile"):
+            try:
+                self.services.auth.set_cached_profile(UserProfile(**record["profile"]))
+            except Exception:
+                pass  # Formato antiguo: se vuelve a descargar
+        
+        self.start_session_tasks()
+        
+        # Revalidar en segundo plano lo que se ha usado de la caché
+        threading.Thread(target=self._revalidate_session, daemon=True).start()
+        return True
+    
+    def start_session_tasks(self):
+        """Background work of a logged-in session: token renewal and offline changes replay"""
+        self.token_refresh.start()
+        self.services.outbox.start(self.session_manager.get_user_id())
+    
+    def _revalidate_session(self):
+        """Refresh stored permissions and profile; update the view if permissions changed"""
+        permissions = self.services.permissions
+        previous_mask = permissions.mask if permissions.loaded else None
+        try:
+            with self.services.api_client.scheduler.use_priority(Priority.PREFETCH):
+                permissions.load_user_permissions()
+                self.services.auth.get_current_user(refresh=True)
+        except Exception as e:
+            logger.info(f"Session revalidation failed: {str(e)}")
+            if not self.session_manager.is_authenticated():
+                self.navigate_to(Routes.LOGIN)
+            return
+        
+        if previous_mask is not None and permissions.mask != previous_mask and self.current_route:
+            # Redibujar la vista actual (menú) o salir si ya no tiene acceso
+            if permissions.can_access_route(self.current_route):
+                self.navigate_to(self.current_route)
+            else:
+                self.navigate_to(Routes.HOME)
+    
     def navigate_to(self, route: str, **kwargs):
         """Navigate to a specific route with optional parameters"""
         # Handle logout
@@ -84,44 +166,71 @@ class Router:
     
     def _check_route_permissions(self, route: str) -> bool:
         """Check if user has required permissions for the route"""
-        if route not in ROUTE_PERMISSIONS:
-            return True  # Si la ruta no tiene permisos definidos, permitir acceso
-        
-        required_permissions = ROUTE_PERMISSIONS[route]
-        return self.services.permissions.has_any_permission(
-            [perm.value for perm in required_permissions]
-        )
+        # Tabla de rutas permitidas precalculada al cargar los permisos
+        return self.services.permissions.can_access_route(route)
     
     def _show_view(self, route: str, **kwargs):
         """Show the specified view"""
         try:
-            # Clear current page
-            self.page.clean()
-            
-            # Create and show new view
             view_class = self.routes[route]
-            self.current_view = view_class(
-                page=self.page,
-                router=self,
-                services=self.services,
-                session_manager=self.session_manager,
-                **kwargs
-            )
+            with tracer.span(f"view {view_class.__name__}", route=route) as span:
+                # Release subscriptions of the previous view
+                if self.current_view is not None:
+                    self.memory.view_leaving()
+                    if hasattr(self.current_view, 'dispose'):
+                        self.current_view.dispose()
+                    # Diálogos ya cerrados de la vista anterior (los selectores los devuelve dispose)
+                    self.memory.prune_overlays(keep_current=False, update=False)
+            
+                # Clear current page
+                self.page.clean()
+            
+                # Create and show new view
+                self.current_view = view_class(
+                    page=self.page,
+                    router=self,
+                    services=self.services,
+                    session_manager=self.session_manager,
+                    **kwargs
+                )
             
-            if hasattr(self.current_view, 'show'):
-                self.current_view.show()
+                self.current_route = route
+            
+                if hasattr(self.current_view, 'show'):
+                    self.current_view.show()
+                self.memory.view_shown(view_class.__name__)
+            
+            # Desglose de tiempos de la carga (solo en depuración)
+            if self.trace_overlay and span is not None:
+                self.trace_overlay.show_span(span)
                     
         except Exception as e:
             self._show_error(f"Error loading view: {str(e)}")
     
     def _handle_logout(self):
         """Handle user logout"""
+        self.token_refresh.stop()
+        self.services.outbox.stop()
         self.session_manager.clear_session()
         self.services.api_client.clear_token()
         self.services.permissions.clear_permissions()
+        self.services.cache.clear()
+        overlays_for(self.page).clear()
+        self.memory.reset()
+        self.services.auth.set_cached_profile(None)
         self.page.clean()
         self.navigate_to(Routes.LOGIN)
     
+    def _on_circuit_change(self, key, old_state: str, new_state: str):
+        """Tell the user when the app switches to cached data and back"""
+        from utils.helpers import show_error_message, show_info_message
+        if old_state == CircuitState.CLOSED and new_state == CircuitState.OPEN:
+            show_error_message(self.page, "Servidor no disponible: se muestran los datos guardados")
+        elif new_state == CircuitState.CLOSED:
+            show_info_message(self.page, "Conexión con el servidor restablecida")
+            # Enviar ya los cambios guardados sin conexión
+            self.services.outbox.wake()
+    
     def _show_error(self, message: str):
         """Show error message"""
         self.page.snack_bar = ft.SnackBar(
@@ -1,22 +1,38 @@
 # core/session_manager.py
 import jwt
 from datetime import datetime
-from typing import Optional
+from typing import Any, Dict, Optional
 import flet as ft
+from .session_store import SessionStore
 
 class SessionManager:
     """Manages user session and authentication state"""
     
     def __init__(self, page: ft.Page):
         self.page = page
+        self.store = SessionStore(page)
     
-    def set_session(self, token_data: dict, decoded_token: dict):
+    def set_session(self, token_data: dict, decoded_token: dict, persist: bool = True):
         """Store session data"""
         self.page.session.set("access_token", token_data['access_token'])
         self.page.session.set("token_type", token_data['token_type'])
         self.page.session.set("token_exp", decoded_token['exp'])
         self.page.session.set("user_id", decoded_token['sub'])
         self.page.session.set("user_name", f"{decoded_token['nombre']} {decoded_token['apellidos']}")
+        if persist:
+            self.store.save_session(token_data, decoded_token)
+    
+    def restore_session(self) -> Optional[Dict[str, Any]]:
+        """Restore a persisted session with a valid token; return its stored record"""
+        record = self.store.load()
+        if not record:
+            return None
+        try:
+            self.set_session(record, record["decoded_token"], persist=False)
+        except (KeyError, TypeError):
+            self.store.clear()
+            return None
+        return record
     
     def get_token(self) -> Optional[str]:
         """Get current authentication token"""
@@ -50,6 +66,7 @@ class SessionManager:
         for key in keys_to_clear:
             if self.page.session.contains_key(key):
                 self.page.session.remove(key)
+        self.store.clear()
     
     def decode_token(self, token: str) -> dict:
         """Decode JWT token (without verification for simplicity)"""
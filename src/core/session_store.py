@@ -0,0 +1,97 @@
+# core/session_store.py
+import logging
+import time
+from typing import Any, Dict, List, Optional
+import flet as ft
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class SessionStore:
+    """Persists the session, permissions and profile in the client storage
+
+    Everything is stored in one record stamped with the token ``exp`` and a
+    format/app version, so a restart with a valid token can render home
+    without waiting for the backend. Stale or foreign records are ignored.
+    """
+
+    KEY = "satanica.session"
+    VERSION = 1
+
+    def __init__(self, page: ft.Page, enabled: Optional[bool] = None):
+        self.page = page
+        self.enabled = settings.SESSION_PERSIST_ENABLED if enabled is None else enabled
+
+    def load(self) -> Optional[Dict[str, Any]]:
+        """Return the stored record if it is current and its token has not expired"""
+        record = self._read()
+        if not record:
+            return None
+        if record.get("version") != self._version() or not record.get("access_token"):
+            self.clear()
+            return None
+        exp = record.get("token_exp")
+        if exp and time.time() > exp:
+            self.clear()
+            return None
+        return record
+
+    def save_session(self, token_data: dict, decoded_token: dict):
+        """Start a new record for a freshly issued token"""
+        previous = self._read() or {}
+        same_user = (previous.get("decoded_token") or {}).get("sub") == decoded_token.get("sub")
+        self._write({
+            "version": self._version(),
+            "access_token": token_data["access_token"],
+            "token_type": token_data["token_type"],
+            "token_exp": decoded_token.get("exp"),
+            "decoded_token": decoded_token,
+            # Una renovación del token conserva los datos del mismo usuario
+            "permissions": previous.get("permissions") if same_user else None,
+            "profile": previous.get("profile") if same_user else None,
+        })
+
+    def save_permissions(self, permissions: List[str]):
+        self._update("permissions", list(permissions))
+
+    def save_profile(self, profile: Dict[str, Any]):
+        self._update("profile", profile)
+
+    def clear(self):
+        if not self.enabled:
+            return
+        try:
+            if self.page.client_storage.contains_key(self.KEY):
+                self.page.client_storage.remove(self.KEY)
+        except Exception as e:
+            logger.warning(f"Could not clear stored session: {str(e)}")
+
+    def _update(self, field: str, value: Any):
+        # Solo se actualiza el registro de la sesión en curso
+        record = self._read()
+        if not record or record.get("access_token") != self.page.session.get("access_token"):
+            return
+        record[field] = value
+        self._write(record)
+
+    def _version(self) -> str:
+        return f"{self.VERSION}:{settings.APP_VERSION}"
+
+    def _read(self) -> Optional[Dict[str, Any]]:
+        if not self.enabled:
+            return None
+        try:
+            record = self.page.client_storage.get(self.KEY)
+        except Exception as e:
+            logger.warning(f"Could not read stored session: {str(e)}")
+            return None
+        return record if isinstance(record, dict) else None
+
+    def _write(self, record: Dict[str, Any]):
+        if not self.enabled:
+            return
+        try:
+            self.page.client_storage.set(self.KEY, record)
+        except Exception as e:
+            logger.warning(f"Could not store session: {str(e)}")
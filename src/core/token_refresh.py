@@ -0,0 +1,165 @@
+# core/token_refresh.py
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from config.settings import settings
+from core.exceptions import APIError, NotFoundError
+from models.auth import Token
+
+logger = logging.getLogger(__name__)
+
+
+class RefreshMetrics:
+    """Counters for token renewals"""
+
+    def __init__(self):
+        self.scheduled = 0
+        self.refreshes = 0
+        self.failures = 0
+        self.on_demand = 0  # Renovaciones provocadas por un 401
+        self.last_refresh_at: Optional[float] = None
+        self.last_duration: Optional[float] = None
+        self.total_blocked_time = 0.0  # Tiempo con las peticiones retenidas
+
+    def snapshot(self) -> Dict[str, Any]:
+        return dict(self.__dict__)
+
+
+class TokenRefreshScheduler:
+    """Renews the JWT shortly before it expires
+
+    A timer fires ``margin`` seconds before the token ``exp`` and calls the
+    refresh function (normally ``AuthService.refresh_token``). While it runs,
+    APIClient holds new authenticated requests and releases them with the new
+    token. A request that still gets a 401 triggers one on-demand renewal and
+    is replayed once.
+
+    Transient failures (network, 5xx, 408/429) are retried with exponential
+    backoff up to TOKEN_REFRESH_MAX_RETRIES times per token; on-demand
+    renewals wait for the same backoff. A definitive 4xx stops renewals for
+    that token (404/405: the backend has no refresh endpoint, for good).
+    """
+
+    # Respuestas que pueden cambiar si se vuelve a intentar
+    TRANSIENT_STATUSES = (408, 429)
+
+    def __init__(self, session_manager, api_client, refresh_fn: Callable[[], Token],
+                 margin: Optional[float] = None, enabled: Optional[bool] = None):
+        self.session_manager = session_manager
+        self.api = api_client
+        self.refresh_fn = refresh_fn
+        self.margin = settings.TOKEN_REFRESH_MARGIN if margin is None else margin
+        self.enabled = settings.TOKEN_REFRESH_ENABLED if enabled is None else enabled
+        self.metrics = RefreshMetrics()
+        self._lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+        self._supported = True  # False si el backend no tiene endpoint de renovación
+        self._failures = 0  # Fallos transitorios seguidos del token actual
+        self._retry_at = 0.0  # Antes de este instante (monotonic) no se reintenta
+        self._rejected_token: Optional[str] = None  # Token cuya renovación se rechazó (4xx)
+
+        if self.enabled:
+            self.api.set_token_refresher(self.refresh_now)
+
+    def start(self):
+        """Schedule the next renewal from the current token exp"""
+        self.stop()
+        # Sesión o token nuevos: los reintentos empiezan de cero
+        self._failures = 0
+        self._retry_at = 0.0
+        if not self.enabled or not self._supported:
+            return
+        exp = self.session_manager.page.session.get("token_exp")
+        if not exp:
+            return
+        delay = max(0.0, exp - self.margin - time.time())
+        self._timer = threading.Timer(delay, self._on_timer)
+        self._timer.daemon = True
+        self._timer.start()
+        self.metrics.scheduled += 1
+
+    def stop(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def refresh_now(self, stale_token: Optional[str] = None) -> bool:
+        """
+        Renew the token now; return True if a valid token is available afterwards
+
+        If stale_token is given and the session already has a different token,
+        another thread renewed it in the meantime and nothing is requested.
+        """
+        if not self.enabled or not self._supported:
+            return False
+        if stale_token is not None:
+            self.metrics.on_demand += 1
+
+        with self._lock:
+            current = self.session_manager.get_token()
+            if stale_token is not None and current not in (None, stale_token):
+                return True
+            if current is not None and current == self._rejected_token:
+                return False
+            if time.monotonic() < self._retry_at:
+                return False  # En espera tras un fallo transitorio
+
+            started = time.monotonic()
+            self.api.begin_token_refresh()
+            try:
+                token = self.refresh_fn()
+                decoded = self.session_manager.decode_token(token.access_token)
+                self.session_manager.set_session(token.model_dump(), decoded)
+                self.api.set_token(token.access_token)
+            except (APIError, KeyError, ValueError) as e:
+                self.metrics.failures += 1
+                self._on_failure(current, e)
+                return False
+            finally:
+                self.api.end_token_refresh()
+                elapsed = time.monotonic() - started
+                self.metrics.total_blocked_time += elapsed
+
+            self._failures = 0
+            self._retry_at = 0.0
+            self.metrics.refreshes += 1
+            self.metrics.last_refresh_at = time.time()
+            self.metrics.last_duration = elapsed
+
+        self.start()
+        return True
+
+    def _on_failure(self, token: Optional[str], error: Exception):
+        """Give up on a definitive 4xx; back off before retrying anything else"""
+        status = getattr(error, "status_code", None)
+        if isinstance(error, NotFoundError) or status == 405:
+            logger.info("Token refresh endpoint not available, renewals disabled")
+            self._supported = False
+        elif status is not None and 400 <= status < 500 and status not in self.TRANSIENT_STATUSES:
+            logger.warning(f"Token refresh rejected ({status}), no more retries for this token")
+            self._rejected_token = token
+        else:
+            self._failures += 1
+            logger.warning(f"Token refresh failed ({self._failures}): {str(error)}")
+            if self._failures > settings.TOKEN_REFRESH_MAX_RETRIES:
+                self._rejected_token = token
+            else:
+                self._retry_at = time.monotonic() + self._backoff()
+
+    def _backoff(self) -> float:
+        return settings.TOKEN_REFRESH_RETRY_DELAY * 2 ** (self._failures - 1)
+
+    def _on_timer(self):
+        self._timer = None
+        if not self.session_manager.get_token():
+            return
+        if not self.refresh_now():
+            # Reintentar con espera creciente mientras queden intentos y el token siga siendo válido
+            exp = self.session_manager.page.session.get("token_exp")
+            if (self._supported and self._failures and self._rejected_token is None
+                    and exp and exp - time.time() > self._backoff()):
+                self._timer = threading.Timer(self._backoff(), self._on_timer)
+                self._timer.daemon = True
+                self._timer.start()
@@ -0,0 +1,177 @@
+# core/tracing.py
+import functools
+import itertools
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from config.settings import settings
+
+_ids = itertools.count(1)
+
+
+class Span:
+    """A timed operation; spans opened inside it become its children"""
+
+    __slots__ = ("id", "name", "attrs", "start", "end", "children", "error", "thread")
+
+    def __init__(self, name: str, attrs: Dict[str, Any]):
+        self.id = next(_ids)
+        self.name = name
+        self.attrs = attrs
+        self.start = time.perf_counter()
+        self.end: Optional[float] = None
+        self.children: List["Span"] = []
+        self.error: Optional[str] = None
+        self.thread = threading.current_thread().name
+
+    @property
+    def duration(self) -> float:
+        return ((self.end or time.perf_counter()) - self.start)
+
+    def self_time(self) -> float:
+        """Time not covered by child spans"""
+        return max(0.0, self.duration - sum(child.duration for child in self.children))
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {
+            "name": self.name,
+            "duration_ms": round(self.duration * 1000, 3),
+            "self_ms": round(self.self_time() * 1000, 3),
+            "thread": self.thread,
+        }
+        if self.attrs:
+            data["attrs"] = self.attrs
+        if self.error:
+            data["error"] = self.error
+        if self.children:
+            data["children"] = [child.to_dict() for child in self.children]
+        return data
+
+    def flame_lines(self, depth: int = 0) -> List[str]:
+        """Indented text breakdown (name, total and self time in ms)"""
+        lines = [f"{'  ' * depth}{self.name}  {self.duration * 1000:.1f} ms (propio {self.self_time() * 1000:.1f})"]
+        for child in self.children:
+            lines.extend(child.flame_lines(depth + 1))
+        return lines
+
+
+class Tracer:
+    """Lightweight nested-span tracer with an in-memory ring buffer
+
+    Spans nest per thread. Finished root spans (one per screen load or
+    background job) are kept in a ring of ``TRACE_BUFFER_SIZE`` traces. When
+    tracing is disabled, ``span()`` costs one attribute check.
+    """
+
+    def __init__(self, enabled: Optional[bool] = None, buffer_size: Optional[int] = None):
+        self.enabled = settings.TRACING_ENABLED if enabled is None else enabled
+        self._traces: Deque[Span] = deque(maxlen=buffer_size or settings.TRACE_BUFFER_SIZE)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._listeners: List[Callable[[Span], None]] = []
+
+    def _stack(self) -> List[Span]:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    @contextmanager
+    def span(self, name: str, **attrs):
+        if not self.enabled:
+            yield None
+            return
+        stack = self._stack()
+        span = Span(name, attrs)
+        if stack:
+            stack[-1].children.append(span)
+        stack.append(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = type(e).__name__
+            raise
+        finally:
+            span.end = time.perf_counter()
+            stack.pop()
+            if not stack:
+                self._finish(span)
+
+    def traced(self, name: Optional[str] = None):
+        """Decorator: run the function inside a span"""
+        def decorator(fn):
+            span_name = name or fn.__qualname__
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return fn(*args, **kwargs)
+                with self.span(span_name):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def trace_methods(self, cls):
+        """Class decorator: trace every public method defined on the class"""
+        for attr, value in list(vars(cls).items()):
+            if attr.startswith("_") or not callable(value) or isinstance(value, (staticmethod, classmethod, type)):
+                continue
+            setattr(cls, attr, self.traced(f"{cls.__name__}.{attr}")(value))
+        return cls
+
+    def add_listener(self, listener: Callable[[Span], None]) -> Callable[[], None]:
+        """Call listener(span) with every finished root span"""
+        with self._lock:
+            self._listeners.append(listener)
+
+        def remove():
+            with self._lock:
+                if listener in self._listeners:
+                    self._listeners.remove(listener)
+        return remove
+
+    def recent(self, limit: Optional[int] = None) -> List[Span]:
+        with self._lock:
+            traces = list(self._traces)
+        return traces[-limit:] if limit else traces
+
+    def clear(self):
+        with self._lock:
+            self._traces.clear()
+
+    def export_json(self, path: Optional[str] = None, limit: Optional[int] = None) -> str:
+        """Recent traces as JSON (also written to path if given)"""
+        text = json.dumps([span.to_dict() for span in self.recent(limit)], indent=2)
+        if path:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(text)
+        return text
+
+    def _finish(self, span: Span):
+        with self._lock:
+            self._traces.append(span)
+            listeners = list(self._listeners)
+        for listener in listeners:
+            try:
+                listener(span)
+            except Exception:
+                pass
+
+
+# Tracer global del proceso
+tracer = Tracer()
+traced = tracer.traced
+trace_methods = tracer.trace_methods
+
+
+def instrument_page(page):
+    """Wrap page.update/add/clean of a Flet page in spans"""
+    if not tracer.enabled:
+        return
+    for name in ("update", "add", "clean"):
+        original = getattr(page, name)
+        setattr(page, name, tracer.traced(f"page.{name}")(original))
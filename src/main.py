@@ -18,8 +18,8 @@ def main(page: ft.Page):
     # Initialize router
     router = Router(page)
     
-    # Check if user is already logged in
-    if router.session_manager.is_authenticated():
+    # Check if user is already logged in (or has a persisted session)
+    if router.session_manager.is_authenticated() or router.restore_session():
         router.navigate_to("/home")
     else:
         router.navigate_to("/login")
@@ -1,6 +1,11 @@
 # models/common.py
 from pydantic import BaseModel
-from typing import List
+from typing import Any, Dict, List, Optional
 
 class Notifications(BaseModel):
-    notifications: List[str]
\ No newline at end of file
+    notifications: List[str]
+
+class CreatedResource(BaseModel):
+    """Resultado de un endpoint de creación"""
+    id: Optional[int] = None  # ID asignado por el backend (None si no lo devuelve)
+    data: Optional[Dict[str, Any]] = None  # Entidad creada, si el backend la devuelve
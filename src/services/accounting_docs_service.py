@@ -1,55 +1,97 @@
 # services/accounting_service.py
-from typing import List
+import os
+from typing import List, Optional
 from models.accounting_docs import DocsContablesListItem, DocsContablesUpdate
+from core.tracing import trace_methods
 from .api_client import APIClient
+from .chunked_upload import ChunkedUploader, HTTPUploadProtocol, ProgressCallback, ProgressReader
+from .document_cache import DocumentCache
+from .resource_cache import ResourceCache
 
+@trace_methods
 class AccountingService:
-    def __init__(self, api_client: APIClient):
+    def __init__(self, api_client: APIClient, uploader: Optional[ChunkedUploader] = None,
+                 documents: Optional[DocumentCache] = None, cache: Optional[ResourceCache] = None):
         self.api = api_client
+        self.uploader = uploader or ChunkedUploader(HTTPUploadProtocol(api_client))
+        self.documents = documents or DocumentCache()
+        self.cache = cache or ResourceCache()
     
     def get_accounting_docs_by_movement(self, movement_id: int) -> List[DocsContablesListItem]:
         """Get accounting documents for a specific movement"""
-        response = self.api.request(
-            "GET",
-            "/accounting_docs/accounting_docs_list",
-            query_params={"movimiento_id": movement_id}
-        )
-        return [DocsContablesListItem(**doc) for doc in response.json()]
+        def load():
+            response = self.api.request(
+                "GET",
+                "/accounting_docs/accounting_docs_list",
+                query_params={"movimiento_id": movement_id}
+            )
+            return self.api.parse_list(response, DocsContablesListItem)
+        return self.cache.cached_list("accounting_docs", movement_id, load)
     
     def delete_accounting_doc(self, doc_id: int) -> bool:
         """Delete an accounting document"""
-        response = self.api.request(
-            "DELETE",
-            "/accounting_docs/delete_accounting_doc",
-            query_params={"doc_id": doc_id}
-        )
+        with self.cache.optimistic() as update:
+            self.cache.remove("accounting_docs", "id_docs_contables", doc_id)
+            response = self.api.request(
+                "DELETE",
+                "/accounting_docs/delete_accounting_doc",
+                query_params={"doc_id": doc_id}
+            )
+            if response.status_code != 200:
+                update.rollback()
+        self.documents.invalidate("accounting_doc", doc_id)
         return response.status_code == 200
     
     def update_accounting_doc(self, doc_id: int, doc_data: DocsContablesUpdate) -> bool:
         """Update accounting document data"""
-        response = self.api.request(
-            "POST",
-            "/accounting_docs/update_accounting_doc",
-            query_params={"doc_id": doc_id},
-            json_data=doc_data
-        )
+        with self.cache.optimistic() as update:
+            self.cache.patch("accounting_docs", "id_docs_contables", doc_id, self.cache.changes_from(doc_data))
+            response = self.api.request(
+                "POST",
+                "/accounting_docs/update_accounting_doc",
+                query_params={"doc_id": doc_id},
+                json_data=doc_data
+            )
+            if response.status_code != 200:
+                update.rollback()
         return response.status_code == 200
     
-    def upload_accounting_doc(self, movement_id: int, nombre: str, file_data) -> bool:
+    def upload_accounting_doc(self, movement_id: int, nombre: str, file_path: str,
+                              on_progress: Optional[ProgressCallback] = None) -> bool:
         """Upload a new accounting document"""
-        response = self.api.request(
-            "POST",
-            "/accounting_docs/upload_accounting_doc",
-            query_params={"movimiento_id": movement_id, "nombre": nombre},
-            files={"file": file_data}
-        )
-        return response.status_code == 201
+        if self.uploader.should_chunk(file_path):
+            success = self.uploader.upload(
+                "/accounting_docs/upload_accounting_doc",
+                file_path,
+                query_params={"movimiento_id": movement_id, "nombre": nombre},
+                on_progress=on_progress
+            )
+        else:
+            with open(file_path, "rb") as f:
+                reader = ProgressReader(f, os.path.getsize(file_path), on_progress)
+                response = self.api.request(
+                    "POST",
+                    "/accounting_docs/upload_accounting_doc",
+                    query_params={"movimiento_id": movement_id, "nombre": nombre},
+                    files={"file": (os.path.basename(file_path), reader)}
+                )
+            success = response.status_code == 201
+
+        # El backend asigna id y path: la lista se vuelve a pedir una vez
+        self.cache.invalidate("accounting_docs", movement_id)
+        return success
     
-    def download_accounting_doc(self, doc_id: int):
-        """Download an accounting document"""
-        response = self.api.request(
-            "GET",
-            "/accounting_docs/download_accounting_doc",
-            query_params={"doc_id": doc_id}
-        )
-        return response
\ No newline at end of file
+    def download_accounting_doc(self, doc_id: int) -> Optional[str]:
+        """Download an accounting document and return the local file path
+
+        A cached copy is returned at once and revalidated in the background
+        once it is older than DOCUMENT_CACHE_REVALIDATE_AFTER.
+        """
+        def request(headers: Optional[dict]):
+            return self.api.request(
+                "GET",
+                "/accounting_docs/download_accounting_doc",
+                query_params={"doc_id": doc_id},
+                headers=headers
+            )
+        return self.documents.fetch("accounting_doc", doc_id, request)
@@ -1,12 +1,26 @@
 # services/api_client.py
 import httpx
 import json
-from typing import Optional, Dict, Any, Union, List
+import threading
+import time
+from typing import Callable, Hashable, Optional, Dict, Any, Type, TypeVar, Union, List
 from pydantic import BaseModel
 from datetime import datetime
 import logging
 
 from config.settings import settings
+from models.common import CreatedResource
+from .retry_policy import RetryPolicy
+from .circuit_breaker import CircuitBreaker
+from .timeout_profiles import TimeoutProfiles
+from .single_flight import SingleFlight, flights as shared_flights
+from .request_scheduler import RequestScheduler
+from .metrics import MetricsCollector, metrics as default_metrics
+from .json_codec import JSONCodec
+from .compression import accept_encoding, encode_json
+from .auth_strategy import AuthStrategy, accept_scheme, accepted_scheme, auth_strategy, token_subject
+from .traffic_recorder import RecordingTransport, ReplayTransport, recorder_for
+from core.tracing import tracer
 from core.exceptions import (
     APIError, 
     AuthenticationError,
@@ -18,12 +32,73 @@ from core.exceptions import (
 
 logger = logging.getLogger(__name__)
 
+_NOT_DECODED = object()
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+
+class _Call:
+    """Arguments of one APIClient.request() call and what is derived from them"""
+
+    def __init__(self, method: str, endpoint: str, query_params: Optional[Dict[str, Any]],
+                 json_data: Optional[Union[Dict, BaseModel]], files: Optional[Dict], requires_auth: bool,
+                 content: Optional[bytes], headers: Optional[Dict[str, str]], token_refresh: bool,
+                 idempotent: Optional[bool], timeout_profile: Optional[str], priority: Optional[str]):
+        self.method = method.upper()
+        self.endpoint = endpoint
+        self.query_params = query_params
+        self.json_data = json_data
+        self.files = files
+        self.requires_auth = requires_auth
+        self.content = content
+        self.headers = headers
+        self.token_refresh = token_refresh
+        self.idempotent = idempotent
+        self.timeout_profile = timeout_profile
+        self.priority = priority
+        # Se rellenan en APIClient._prepare
+        self.url = ""
+        self.params: Dict[str, Any] = {}
+        self.json_payload: Optional[Dict[str, Any]] = None
+        self.circuit = None
+        self.timeout: Optional[httpx.Timeout] = None
+
+
 class APIClient:
-    def __init__(self):
+    def __init__(self, retry_policy: Optional[RetryPolicy] = None,
+                 circuit_breaker: Optional[CircuitBreaker] = None,
+                 timeouts: Optional[TimeoutProfiles] = None,
+                 flights: Optional[SingleFlight] = None,
+                 scheduler: Optional[RequestScheduler] = None,
+                 metrics: Optional[MetricsCollector] = None,
+                 transport: Optional[httpx.BaseTransport] = None,
+                 codec: Optional[JSONCodec] = None,
+                 auth: Optional[AuthStrategy] = None):
         self.base_url = settings.SERVER_ROUTE.rstrip('/')
         self.timeout = settings.API_TIMEOUT
+        self.timeouts = timeouts or TimeoutProfiles()
+        self.flights = flights or shared_flights
+        self.scheduler = scheduler or RequestScheduler()
+        self.metrics = metrics or default_metrics
+        if transport is None and settings.TRAFFIC_REPLAY_PATH:
+            transport = ReplayTransport(settings.TRAFFIC_REPLAY_PATH)
+        self.transport = transport  # Transporte alternativo (p. ej. httpx.MockTransport en benchmarks)
+        if settings.TRAFFIC_RECORD_PATH:
+            self.start_recording(settings.TRAFFIC_RECORD_PATH)
+        self.codec = codec or JSONCodec()
+        self.accept_encoding = accept_encoding()
+        self.compress_requests = settings.REQUEST_COMPRESSION_ENABLED
+        self.retry = retry_policy or RetryPolicy()
+        self.breaker = circuit_breaker or CircuitBreaker()
+        self.auth = auth or auth_strategy()
         self._token = None
         self._session_manager = None
+        self._subject = (None, None)  # (token, usuario) del último token visto
+        self._permission_scope: Optional[Hashable] = None
+        # Renovación del token: las peticiones esperan mientras está en curso
+        self._token_refresher: Optional[Callable[[Optional[str]], bool]] = None
+        self._refresh_done = threading.Event()
+        self._refresh_done.set()
     
     def set_session_manager(self, session_manager):
         """Inject session manager for token management"""
@@ -43,6 +118,61 @@ class APIClient:
     def clear_token(self):
         """Clear authentication token"""
         self._token = None
+        self._permission_scope = None
+    
+    def set_permission_scope(self, scope: Optional[Hashable]):
+        """Permissions the responses depend on (the permission mask); part of cache_scope()"""
+        self._permission_scope = scope
+    
+    def cache_scope(self, shared: bool = False) -> Optional[tuple]:
+        """(user, permissions) the authenticated responses belong to; None without a session
+
+        ``shared``: the response is the same for every user with the same
+        permissions, only those are part of the scope.
+        """
+        token = self.token
+        if not token:
+            return None
+        if shared:
+            return ("*", self._permission_scope)
+        user_id = self._session_manager.get_user_id() if self._session_manager else None
+        if user_id is None:
+            cached_token, user_id = self._subject
+            if cached_token != token:
+                user_id = token_subject(token)
+                self._subject = (token, user_id)
+        return (str(user_id), self._permission_scope)
+    
+    def cache_key(self, method: str, url: str, params: Optional[Dict[str, Any]] = None,
+                  headers: Optional[Dict[str, str]] = None, requires_auth: bool = True,
+                  shared: bool = False) -> tuple:
+        """Key for request-level caches: stable URL (sorted query, no token) plus the user scope"""
+        stable_url = str(httpx.URL(url, params=dict(sorted((params or {}).items()))))
+        scope = self.cache_scope(shared) if requires_auth else None
+        return (scope, method.upper(), stable_url, self._freeze(headers))
+    
+    def start_recording(self, path: str, include_bodies: Optional[bool] = None):
+        """Write every request and response (HAR) to path until stop_recording()"""
+        if isinstance(self.transport, RecordingTransport):
+            self.stop_recording()
+        self.transport = RecordingTransport(recorder_for(path, include_bodies), self.transport)
+    
+    def stop_recording(self):
+        """Save the recording and go back to the previous transport"""
+        if isinstance(self.transport, RecordingTransport):
+            self.transport.recorder.save()
+            self.transport = self.transport.wrapped
+    
+    def set_token_refresher(self, refresher: Optional[Callable[[Optional[str]], bool]]):
+        """Register refresher(stale_token) -> bool, used to renew the token once on a 401"""
+        self._token_refresher = refresher
+    
+    def begin_token_refresh(self):
+        """Hold new authenticated requests until end_token_refresh()"""
+        self._refresh_done.clear()
+    
+    def end_token_refresh(self):
+        self._refresh_done.set()
     
     def request(
         self,
@@ -51,7 +181,13 @@ class APIClient:
         query_params: Optional[Dict[str, Any]] = None,
         json_data: Optional[Union[Dict, BaseModel]] = None,
         files: Optional[Dict] = None,
-        requires_auth: bool = True
+        requires_auth: bool = True,
+        content: Optional[bytes] = None,
+        headers: Optional[Dict[str, str]] = None,
+        token_refresh: bool = False,
+        idempotent: Optional[bool] = None,
+        timeout_profile: Optional[str] = None,
+        priority: Optional[str] = None
     ) -> httpx.Response:
         """
         Make HTTP request to API
@@ -63,6 +199,13 @@ class APIClient:
             json_data: JSON data for request body
             files: Files for multipart upload
             requires_auth: Whether this endpoint requires authentication
+            content: Raw request body (e.g. an upload chunk)
+            headers: Extra request headers
+            token_refresh: This is the token renewal call itself (never held or replayed)
+            idempotent: Override whether transient failures may be retried
+                (by default only GET/HEAD/OPTIONS are)
+            timeout_profile: Timeout profile name (default: chosen by endpoint pattern)
+            priority: Scheduler class (default: the thread's current priority, interactive)
             
         Returns:
             httpx.Response object
@@ -70,53 +213,276 @@ class APIClient:
         Raises:
             APIError: For various API-related errors
         """
+        with tracer.span(f"http {method.upper()} {endpoint}"):
+            call = _Call(method, endpoint, query_params, json_data, files, requires_auth, content,
+                         headers, token_refresh, idempotent, timeout_profile, priority)
+            return self._perform(call)
+    
+    def _perform(self, call: "_Call") -> httpx.Response:
+        """Run a request through single-flight, map transport errors and record metrics"""
+        metrics_key = self.metrics.key(call.method, call.endpoint)
+        started = time.perf_counter()
+        response: Optional[httpx.Response] = None
+        error: Optional[Exception] = None
         try:
-            url = f"{self.base_url}{endpoint}"
-            
-            params = query_params or {}
-
-            params = {k: v for k, v in params.items() if v is not None}
+            self._prepare(call)
+            if call.requires_auth and not call.token_refresh:
+                # Esperar a que termine una renovación en curso
+                self._refresh_done.wait(self.timeout)
             
-            if requires_auth and self.token:
-                params["token"] = self.token
+            if (call.method == "GET" and not call.files and call.content is None
+                    and not call.token_refresh and self.flights.enabled):
+                # GET idénticos en curso (de cualquier sesión del mismo usuario) comparten una sola petición
+                shared = call.endpoint in settings.SINGLE_FLIGHT_SHARED_ENDPOINTS
+                key = self.cache_key(call.method, call.url, call.params, call.headers, call.requires_auth,
+                                     shared=shared)
+                # Entre usuarios solo se comparte el éxito: un error (p. ej. 401) es del token del líder
+                response = self.flights.do(key, lambda: self._execute(call, metrics_key), share_errors=not shared)
+            else:
+                response = self._execute(call, metrics_key)
+            return response
             
-            json_payload = None
-            if json_data:
-                if isinstance(json_data, BaseModel):
-                    json_payload = json_data.model_dump(exclude_unset=True)
-                else:
-                    json_payload = json_data
-                    
-                json_payload = {k: v for k, v in json_payload.items() if v is not None}
-            
-            with httpx.Client(timeout=self.timeout) as client:
-                response = client.request(
-                    method=method.upper(),
-                    url=url,
-                    params=params,
-                    json=json_payload,
-                    files=files
-                )
-                
-                self._handle_response(response)
-                return response
-                
+        except APIError as e:
+            error = e
+            raise
         except httpx.TimeoutException:
-            raise NetworkError("Request timeout - server not responding")
-        except httpx.NetworkError as e:
-            raise NetworkError(f"Network error: {str(e)}")
+            error = NetworkError("Request timeout - server not responding")
+            raise error
+        except httpx.TransportError as e:
+            # Conexión rechazada, cortada por el servidor, error de protocolo...
+            error = NetworkError(f"Network error: {str(e)}")
+            raise error
         except Exception as e:
             logger.error(f"Unexpected error in API request: {str(e)}")
-            raise APIError(f"Unexpected error: {str(e)}")
+            error = APIError(f"Unexpected error: {str(e)}")
+            raise error
+        finally:
+            self._record(metrics_key, time.perf_counter() - started, response, error)
+    
+    def _prepare(self, call: "_Call"):
+        """Build the URL, drop None params and serialize the JSON body"""
+        call.url = f"{self.base_url}{call.endpoint}"
+        call.params = {k: v for k, v in (call.query_params or {}).items() if v is not None}
+        if call.json_data:
+            if isinstance(call.json_data, BaseModel):
+                json_payload = call.json_data.model_dump(exclude_unset=True)
+            else:
+                json_payload = call.json_data
+            call.json_payload = {k: v for k, v in json_payload.items() if v is not None}
+        call.priority = call.priority or self.scheduler.current_priority()
+        call.circuit = self.breaker.key_for(call.url)
+        call.timeout = self.timeouts.timeout_for(call.endpoint, call.timeout_profile)
+    
+    def _execute(self, call: "_Call", metrics_key: str) -> httpx.Response:
+        """Send with retries, renew the token once on a 401 and raise for error statuses"""
+        token = self.token if call.requires_auth else None
+        accepted = accepted_scheme(self.base_url) if token else None
+        if accepted is not None and accepted != self.auth.name:
+            self.auth = auth_strategy(accepted)  # Otra sesión ya averiguó qué esquema lee el backend
+        response = self._send_with_retry(call, token)
+        if token and accepted is None:
+            response = self._negotiate_auth(call, token, response)
+        
+        if (response.status_code == 401 and call.requires_auth and not call.token_refresh
+                and self._token_refresher):
+            # Renovar el token una vez y repetir la petición
+            if self._token_refresher(token):
+                response = self._send_with_retry(call, self.token)
+        
+        response.extensions["metrics_key"] = metrics_key
+        self._handle_response(response)
+        return response
+    
+    def _negotiate_auth(self, call: "_Call", token: str, response: httpx.Response) -> httpx.Response:
+        """Learn which auth scheme the backend reads
+
+        The first authenticated answer that is not a 401 confirms the scheme.
+        Until then, a 401 with a scheme that has a fallback (bearer) is sent
+        once more with the fallback (?token=); if that one is accepted, this
+        and every later client for the backend switch to it.
+        """
+        if response.status_code != 401:
+            accept_scheme(self.base_url, self.auth.name)
+            return response
+        if not (self.auth.fallback and settings.AUTH_SCHEME_FALLBACK):
+            return response
+        fallback = auth_strategy(self.auth.fallback)
+        retried = self._send_with_retry(call, token, auth=fallback)
+        if retried.status_code == 401:
+            return response  # Token inválido con cualquier esquema: se sigue sin saber cuál lee
+        logger.info(f"Backend rejected '{self.auth.name}' auth but accepted '{fallback.name}', switching")
+        accept_scheme(self.base_url, fallback.name)
+        self.auth = fallback
+        return retried
+    
+    def _send_with_retry(self, call: "_Call", token: Optional[str],
+                         auth: Optional[AuthStrategy] = None) -> httpx.Response:
+        return self.retry.run(call.method, lambda: self._attempt(call, token, auth), idempotent=call.idempotent)
+    
+    def _attempt(self, call: "_Call", token: Optional[str], auth: Optional[AuthStrategy] = None) -> httpx.Response:
+        """One try: circuit breaker check, scheduler slot and the HTTP exchange"""
+        if call.files and not self._rewind(call.files):
+            raise APIError("Upload file cannot be sent again")
+        self.breaker.before_request(call.circuit)
+        try:
+            with self.scheduler.slot(call.circuit[0], call.priority):
+                response = self._send(call.method, call.url, call.params, token, call.json_payload,
+                                      call.files, call.content, call.headers, call.timeout, auth)
+        except httpx.TransportError:
+            self.breaker.record_failure(call.circuit)
+            raise
+        except BaseException:
+            # Fallo ajeno al servidor (p. ej. en el scheduler): se libera la prueba
+            self.breaker.release(call.circuit)
+            raise
+        if response.status_code in self.breaker.FAILURE_STATUSES:
+            self.breaker.record_failure(call.circuit)
+        else:
+            self.breaker.record_success(call.circuit)
+        return response
+    
+    def _record(self, key: str, duration: float, response: Optional[httpx.Response],
+                error: Optional[Exception]):
+        if not self.metrics.enabled:
+            return
+        request_bytes = response_bytes = request_wire = response_wire = 0
+        if response is not None:
+            response_bytes = len(response.content)
+            response_wire = response.num_bytes_downloaded
+            try:
+                if not response_wire:
+                    # Respuesta ya leída (p. ej. transporte simulado): tamaño declarado
+                    response_wire = int(response.headers.get("Content-Length") or response_bytes)
+                request_wire = int(response.request.headers.get("Content-Length", 0))
+            except (RuntimeError, ValueError):
+                pass
+            request_bytes = response.extensions.get("request_raw_bytes", request_wire)
+        self.metrics.record_request(key, duration, request_bytes, response_bytes, error,
+                                    request_wire_bytes=request_wire, response_wire_bytes=response_wire)
+    
+    def _send(self, method: str, url: str, params: Dict[str, Any], token: Optional[str],
+              json_payload, files, content, headers, timeout: httpx.Timeout,
+              auth: Optional[AuthStrategy] = None) -> httpx.Response:
+        request_headers = {"Accept-Encoding": self.accept_encoding, **(headers or {})}
+        params, request_headers = (auth or self.auth).apply(params, request_headers, token)
+        raw_bytes = None
+        if self.compress_requests and json_payload is not None and files is None and content is None:
+            # JSON grande: se envía con gzip
+            content, json_headers, raw_bytes = encode_json(json_payload)
+            request_headers.update(json_headers)
+            json_payload = None
+        with httpx.Client(timeout=timeout, transport=self.transport) as client:
+            response = client.request(
+                method=method.upper(),
+                url=url,
+                params=params,
+                json=json_payload,
+                files=files,
+                content=content,
+                headers=request_headers
+            )
+        if raw_bytes is not None:
+            response.extensions["request_raw_bytes"] = raw_bytes
+        return response
+    
+    @staticmethod
+    def _freeze(values: Optional[Dict[str, Any]]) -> tuple:
+        return tuple(sorted((k, str(v)) for k, v in (values or {}).items()))
+    
+    @staticmethod
+    def _rewind(files: Optional[Dict]) -> bool:
+        """Rewind uploaded file objects so the request can be replayed"""
+        for value in (files or {}).values():
+            file_obj = value[1] if isinstance(value, tuple) else value
+            if hasattr(file_obj, "seek"):
+                try:
+                    file_obj.seek(0)
+                except Exception:
+                    return False
+        return True
 
     
+    def json(self, response: httpx.Response) -> Any:
+        """Decode a JSON body once; responses shared by single-flight callers reuse it"""
+        cached = response.extensions.get("decoded_json", _NOT_DECODED)
+        if cached is _NOT_DECODED:
+            started = time.perf_counter()
+            with tracer.span("json.decode", backend=self.codec.name):
+                cached = self.codec.loads(response.content)
+            response.extensions["decoded_json"] = cached
+            self._record_phase(response, self.metrics.record_decode, started)
+        return cached
+    
+    def parse_model(self, response: httpx.Response, model: Type[ModelT]) -> ModelT:
+        """Build a model from a JSON object body (decode and parse timed separately)"""
+        if self._validate_raw(response):
+            return self._timed_parse(response, model, lambda: self.codec.validate_model(response.content, model))
+        data = self.json(response)
+        started = time.perf_counter()
+        with tracer.span("model.parse", model=model.__name__):
+            result = model(**data)
+        self._record_phase(response, self.metrics.record_parse, started)
+        return result
+    
+    def parse_list(self, response: httpx.Response, model: Type[ModelT]) -> List[ModelT]:
+        """Build a list of models from a JSON array body"""
+        if self._validate_raw(response):
+            return self._timed_parse(response, model, lambda: self.codec.validate_list(response.content, model))
+        data = self.json(response)
+        started = time.perf_counter()
+        with tracer.span("model.parse", model=model.__name__, items=len(data)):
+            result = [model(**item) for item in data]
+        self._record_phase(response, self.metrics.record_parse, started)
+        return result
+    
+    def _validate_raw(self, response: httpx.Response) -> bool:
+        # Si el cuerpo ya se decodificó (p. ej. parse_created) se reutilizan los dicts
+        return self.codec.validate_raw and "decoded_json" not in response.extensions
+    
+    def _timed_parse(self, response: httpx.Response, model: type, build):
+        """Decode and validate in one pass; the time is recorded as parse"""
+        started = time.perf_counter()
+        with tracer.span("model.parse", model=model.__name__, raw=True):
+            result = build()
+        self._record_phase(response, self.metrics.record_parse, started)
+        return result
+    
+    def _record_phase(self, response: httpx.Response, record, started: float):
+        key = response.extensions.get("metrics_key")
+        if key:
+            record(key, time.perf_counter() - started)
+    
+    def parse_created(self, response: httpx.Response, *id_fields: str) -> CreatedResource:
+        """
+        Extract the created entity (or just its ID) from a create endpoint response
+        
+        Accepts a bare integer body, the created entity as a dict, or a dict
+        with an ``id`` key. Returns an empty CreatedResource if the body has none.
+        """
+        try:
+            body = self.json(response)
+        except ValueError:
+            return CreatedResource()
+        
+        if isinstance(body, bool):
+            return CreatedResource()
+        if isinstance(body, int):
+            return CreatedResource(id=body)
+        if isinstance(body, dict):
+            for field in id_fields + ("id",):
+                value = body.get(field)
+                if isinstance(value, int) and not isinstance(value, bool):
+                    return CreatedResource(id=value, data=body)
+            return CreatedResource(data=body)
+        return CreatedResource()
+    
     def _handle_response(self, response: httpx.Response):
         """Handle API response and raise appropriate exceptions"""
         if response.status_code < 400:
             return  # Success
             
         try:
-            error_data = response.json()
+            error_data = self.codec.loads(response.content)
             detail = error_data.get("detail", "No details provided")
         except:
             detail = response.text or "No error details"
@@ -126,14 +492,14 @@ class APIClient:
             self.clear_token()
             if self._session_manager:
                 self._session_manager.clear_session()
-            raise AuthenticationError("Authentication failed - please login again")
+            raise AuthenticationError("Authentication failed - please login again", status_code=401)
         elif response.status_code == 403:
-            raise AuthenticationError("Access forbidden - insufficient permissions")
+            raise AuthenticationError("Access forbidden - insufficient permissions", status_code=403)
         elif response.status_code == 404:
-            raise NotFoundError("Resource not found")
+            raise NotFoundError("Resource not found", status_code=404)
         elif response.status_code == 422:
-            raise ValidationError(f"Validation error: {detail}")
+            raise ValidationError(f"Validation error: {detail}", status_code=422)
         elif response.status_code >= 500:
-            raise ServerError(f"Server error: {detail}")
+            raise ServerError(f"Server error: {detail}", status_code=response.status_code)
         else:
-            raise APIError(f"API error {response.status_code}: {detail}")
\ No newline at end of file
+            raise APIError(f"API error {response.status_code}: {detail}", status_code=response.status_code)
\ No newline at end of file
@@ -1,12 +1,18 @@
 # services/auth_service.py
-from typing import Optional
+from typing import Callable, Optional
 from models.auth import Token, UserLogin, ChangePasswordRequest
 from models.user import UserProfile
+from config.settings import settings
+from core.tracing import trace_methods
 from .api_client import APIClient
 
+@trace_methods
 class AuthService:
     def __init__(self, api_client: APIClient):
         self.api = api_client
+        self._profile: Optional[UserProfile] = None
+        # Se llama con cada perfil descargado (para persistirlo)
+        self.on_profile_loaded: Optional[Callable[[UserProfile], None]] = None
     
     def login(self, credentials: UserLogin) -> Token:
         """Authenticate user and return token"""
@@ -16,12 +22,31 @@ class AuthService:
             json_data=credentials,
             requires_auth=False
         )
-        return Token(**response.json())
+        return self.api.parse_model(response, Token)
     
-    def get_current_user(self) -> UserProfile:
-        """Get current user profile"""
+    def refresh_token(self) -> Token:
+        """Exchange the current token for a new one before it expires"""
+        response = self.api.request(
+            "POST",
+            settings.TOKEN_REFRESH_ENDPOINT,
+            token_refresh=True,
+            timeout_profile="interactive"
+        )
+        return self.api.parse_model(response, Token)
+    
+    def get_current_user(self, refresh: bool = False) -> UserProfile:
+        """Get current user profile (cached for the session unless refresh=True)"""
+        if self._profile is not None and not refresh:
+            return self._profile
         response = self.api.request("GET", "/user/me")
-        return UserProfile(**response.json())
+        self._profile = self.api.parse_model(response, UserProfile)
+        if self.on_profile_loaded:
+            self.on_profile_loaded(self._profile)
+        return self._profile
+    
+    def set_cached_profile(self, profile: Optional[UserProfile]):
+        """Use a previously stored profile (None to forget it)"""
+        self._profile = profile
     
     def change_password(self, password_data: ChangePasswordRequest) -> bool:
         """Change user password"""
@@ -0,0 +1,93 @@
+# services/auth_strategy.py
+import hashlib
+import logging
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+import jwt
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class AuthStrategy:
+    """How the access token is attached to a request"""
+
+    name = "none"
+    fallback: Optional[str] = None  # Esquema a probar si el backend rechaza este con un 401
+
+    def apply(self, params: Dict[str, Any], headers: Dict[str, str],
+              token: Optional[str]) -> Tuple[Dict[str, Any], Dict[str, str]]:
+        """Return the params and headers to send (the arguments are not modified)"""
+        return params, headers
+
+
+class BearerAuth(AuthStrategy):
+    """Token in the Authorization header: URLs stay the same for every token"""
+
+    name = "bearer"
+    fallback = "query"  # Backends que solo leen ?token=
+
+    def apply(self, params, headers, token):
+        if not token:
+            return params, headers
+        return params, {**headers, "Authorization": f"Bearer {token}"}
+
+
+class QueryTokenAuth(AuthStrategy):
+    """Token as the ``token`` query parameter (backends without header support)"""
+
+    name = "query"
+    PARAM = "token"
+
+    def apply(self, params, headers, token):
+        if not token:
+            return params, headers
+        return {**params, self.PARAM: token}, headers
+
+
+STRATEGIES = {strategy.name: strategy for strategy in (BearerAuth, QueryTokenAuth)}
+
+
+def auth_strategy(name: Optional[str] = None) -> AuthStrategy:
+    """Strategy for AUTH_SCHEME (``bearer`` by default, ``query`` as fallback)"""
+    name = (settings.AUTH_SCHEME if name is None else name).strip().lower()
+    strategy = STRATEGIES.get(name)
+    if strategy is None:
+        logger.warning(f"Unknown auth scheme '{name}', using bearer")
+        strategy = BearerAuth
+    return strategy()
+
+
+# Esquema que ha aceptado cada backend (por URL base), compartido por todas las sesiones
+_ACCEPTED: Dict[str, str] = {}
+_ACCEPTED_LOCK = threading.Lock()
+
+
+def accepted_scheme(base_url: str) -> Optional[str]:
+    """Scheme the backend at base_url answered without a 401 (None until known)"""
+    with _ACCEPTED_LOCK:
+        return _ACCEPTED.get(base_url)
+
+
+def accept_scheme(base_url: str, name: str):
+    with _ACCEPTED_LOCK:
+        _ACCEPTED[base_url] = name
+
+
+def token_subject(token: Optional[str]) -> Optional[str]:
+    """User the token belongs to (JWT ``sub``, read without verifying the signature)
+
+    Tokens that are not JWTs are identified by a hash, never by their value.
+    """
+    if not token:
+        return None
+    try:
+        subject = jwt.decode(token, options={"verify_signature": False}).get("sub")
+        if subject is not None:
+            return str(subject)
+    except jwt.PyJWTError:
+        pass
+    return "token:" + hashlib.sha256(token.encode()).hexdigest()[:16]
+
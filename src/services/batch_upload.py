@@ -0,0 +1,101 @@
+# services/batch_upload.py
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional
+
+from config.settings import settings
+from .accounting_docs_service import AccountingService
+from .chunked_upload import UploadProgress
+from .request_scheduler import Priority
+
+logger = logging.getLogger(__name__)
+
+
+class BatchUploadItem:
+    """Estado de un archivo dentro de una subida por lotes"""
+
+    PENDING = "pending"
+    UPLOADING = "uploading"
+    DONE = "done"
+    FAILED = "failed"
+
+    def __init__(self, file_path: Optional[str], nombre: str):
+        self.file_path = file_path
+        self.nombre = nombre
+        self.status = self.PENDING
+        self.progress = 0.0
+        self.retries = 0
+        self.error: Optional[str] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (self.DONE, self.FAILED)
+
+
+ItemCallback = Callable[[BatchUploadItem], None]
+
+
+class BatchUploader:
+    """Uploads several accounting documents with a bounded worker pool"""
+
+    def __init__(self, accounting: AccountingService, max_workers: Optional[int] = None):
+        self.accounting = accounting
+        self.max_workers = max_workers or settings.UPLOAD_MAX_CONCURRENCY
+
+    def upload(self, movement_id: int, items: List[BatchUploadItem],
+               on_item_update: Optional[ItemCallback] = None) -> List[BatchUploadItem]:
+        """
+        Upload every item not uploaded yet and wait for all of them
+
+        Failures are recorded on each item instead of being raised, so one bad
+        file does not abort the rest of the batch.
+        """
+        lock = threading.Lock()
+
+        def notify(item: BatchUploadItem):
+            if not on_item_update:
+                return
+            with lock:
+                try:
+                    on_item_update(item)
+                except Exception as e:
+                    logger.warning(f"Batch upload callback failed: {str(e)}")
+
+        def upload_one(item: BatchUploadItem):
+            if not item.file_path:
+                item.status = BatchUploadItem.FAILED
+                item.error = "Archivo no disponible en este dispositivo"
+                notify(item)
+                return
+
+            def on_progress(progress: UploadProgress):
+                item.progress = progress.fraction
+                item.retries = progress.retries
+                notify(item)
+
+            item.status = BatchUploadItem.UPLOADING
+            item.error = None
+            notify(item)
+            try:
+                # Los lotes no deben retrasar las peticiones de la interfaz
+                with self.accounting.api.scheduler.use_priority(Priority.BACKGROUND):
+                    success = self.accounting.upload_accounting_doc(
+                        movement_id, item.nombre, item.file_path, on_progress=on_progress
+                    )
+                item.status = BatchUploadItem.DONE if success else BatchUploadItem.FAILED
+                if not success:
+                    item.error = "El servidor rechazó el documento"
+                else:
+                    item.progress = 1.0
+            except Exception as e:
+                item.status = BatchUploadItem.FAILED
+                item.error = str(e)
+            notify(item)
+
+        # Los que ya se subieron en un intento anterior no se repiten
+        pending = [item for item in items if item.status != BatchUploadItem.DONE]
+        workers = max(1, min(self.max_workers, len(pending)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="doc-upload") as executor:
+            list(executor.map(upload_one, pending))
+        return items
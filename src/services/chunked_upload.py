@@ -0,0 +1,449 @@
+# services/chunked_upload.py
+import hashlib
+import json
+import logging
+import mmap
+import os
+import tempfile
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, Hashable, Iterator, Optional, Tuple
+
+from config.settings import settings
+from core.exceptions import APIError, NetworkError, NotFoundError, ServerError
+from .api_client import APIClient
+
+logger = logging.getLogger(__name__)
+
+# Un lock por fichero de journal: las sesiones del proceso que lo comparten no pisan sus escrituras
+_JOURNAL_LOCKS: Dict[str, threading.Lock] = {}
+_JOURNAL_LOCKS_GUARD = threading.Lock()
+
+
+def _lock_for(path: str) -> threading.Lock:
+    with _JOURNAL_LOCKS_GUARD:
+        return _JOURNAL_LOCKS.setdefault(path, threading.Lock())
+
+
+class UploadProgress:
+    """Progress event emitted while a file is being uploaded"""
+
+    def __init__(self, file_name: str, sent_bytes: int, total_bytes: int,
+                 retries: int = 0, resumed: bool = False):
+        self.file_name = file_name
+        self.sent_bytes = sent_bytes
+        self.total_bytes = total_bytes
+        self.retries = retries
+        self.resumed = resumed
+
+    @property
+    def fraction(self) -> float:
+        """Progress between 0 and 1 (for ft.ProgressBar.value)"""
+        if not self.total_bytes:
+            return 1.0
+        return min(self.sent_bytes / self.total_bytes, 1.0)
+
+    @property
+    def percent(self) -> int:
+        return int(self.fraction * 100)
+
+    @property
+    def done(self) -> bool:
+        return self.sent_bytes >= self.total_bytes
+
+
+ProgressCallback = Callable[[UploadProgress], None]
+
+
+class _ProgressEmitter:
+    """Emite eventos de progreso solo cuando cambia el porcentaje entero"""
+
+    def __init__(self, file_name: str, total_bytes: int, callback: Optional[ProgressCallback]):
+        self.file_name = file_name
+        self.total_bytes = total_bytes
+        self.callback = callback
+        self.retries = 0
+        self.resumed = False
+        self._last_percent = -1
+
+    def emit(self, sent_bytes: int):
+        if not self.callback:
+            return
+        progress = UploadProgress(self.file_name, sent_bytes, self.total_bytes, self.retries, self.resumed)
+        if progress.percent == self._last_percent and not progress.done:
+            return
+        self._last_percent = progress.percent
+        try:
+            self.callback(progress)
+        except Exception as e:
+            logger.warning(f"Upload progress callback failed: {str(e)}")
+
+
+class ProgressReader:
+    """File-like wrapper that reports progress while httpx streams a multipart body"""
+
+    def __init__(self, file_obj, total_bytes: int, on_progress: Optional[ProgressCallback] = None, name: str = ""):
+        self._file = file_obj
+        self._sent = 0
+        self._emitter = _ProgressEmitter(name or os.path.basename(getattr(file_obj, "name", "")),
+                                         total_bytes, on_progress)
+
+    def read(self, size: int = -1) -> bytes:
+        data = self._file.read(size)
+        self._sent += len(data)
+        self._emitter.emit(self._sent)
+        return data
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        position = self._file.seek(offset, whence)
+        self._sent = position
+        return position
+
+    def tell(self) -> int:
+        return self._file.tell()
+
+    def fileno(self) -> int:
+        # httpx usa fstat para calcular el Content-Length
+        return self._file.fileno()
+
+
+class FileChunkReader:
+    """Lee un archivo por bloques; los archivos grandes se mapean en memoria"""
+
+    def __init__(self, file_path: str, chunk_size: int = None, mmap_threshold: int = None):
+        self.file_path = file_path
+        self.chunk_size = chunk_size or settings.UPLOAD_CHUNK_SIZE
+        self.mmap_threshold = mmap_threshold if mmap_threshold is not None else settings.UPLOAD_MMAP_THRESHOLD
+        self.size = os.path.getsize(file_path)
+        self._file = None
+        self._mmap = None
+
+    def __enter__(self):
+        self._file = open(self.file_path, "rb")
+        if self.size and self.size >= self.mmap_threshold:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    @property
+    def total_chunks(self) -> int:
+        return max(1, -(-self.size // self.chunk_size))
+
+    def read_at(self, offset: int) -> bytes:
+        """Read the chunk starting at the given byte offset"""
+        end = min(offset + self.chunk_size, self.size)
+        if self._mmap is not None:
+            return self._mmap[offset:end]
+        self._file.seek(offset)
+        return self._file.read(end - offset)
+
+    def iter_chunks(self, start_offset: int = 0) -> Iterator[Tuple[int, bytes]]:
+        """Yield (offset, data) pairs from start_offset to the end of the file"""
+        offset = start_offset
+        while offset < self.size:
+            data = self.read_at(offset)
+            yield offset, data
+            offset += len(data)
+
+    def fingerprint(self) -> str:
+        """Identify the file contents cheaply (path, size and mtime)"""
+        stat = os.stat(self.file_path)
+        raw = f"{os.path.abspath(self.file_path)}:{stat.st_size}:{stat.st_mtime_ns}"
+        return hashlib.sha1(raw.encode()).hexdigest()
+
+
+class UploadProtocol(ABC):
+    """Server side of a chunked upload: start, query offset, send chunks and complete"""
+
+    @abstractmethod
+    def start(self, endpoint: str, query_params: Dict[str, Any], file_name: str, total_size: int) -> str:
+        pass
+
+    @abstractmethod
+    def get_offset(self, upload_id: str) -> int:
+        pass
+
+    @abstractmethod
+    def send_chunk(self, upload_id: str, offset: int, data: bytes, total_size: int):
+        pass
+
+    @abstractmethod
+    def complete(self, upload_id: str) -> bool:
+        pass
+
+
+class HTTPUploadProtocol(UploadProtocol):
+    """Chunked upload protocol over the /uploads/* backend endpoints"""
+
+    def __init__(self, api_client: APIClient):
+        self.api = api_client
+
+    def start(self, endpoint: str, query_params: Dict[str, Any], file_name: str, total_size: int) -> str:
+        response = self.api.request(
+            "POST",
+            "/uploads/start",
+            json_data={
+                "target_endpoint": endpoint,
+                "target_params": query_params,
+                "file_name": file_name,
+                "total_size": total_size
+            }
+        )
+        return self.api.json(response)["upload_id"]
+
+    def get_offset(self, upload_id: str) -> int:
+        response = self.api.request(
+            "GET",
+            "/uploads/status",
+            query_params={"upload_id": upload_id}
+        )
+        return int(self.api.json(response)["offset"])
+
+    def send_chunk(self, upload_id: str, offset: int, data: bytes, total_size: int):
+        end = offset + len(data) - 1
+        self.api.request(
+            "PUT",
+            "/uploads/chunk",
+            query_params={"upload_id": upload_id},
+            content=data,
+            headers={
+                "Content-Type": "application/octet-stream",
+                "Content-Range": f"bytes {offset}-{end}/{total_size}"
+            }
+        )
+
+    def complete(self, upload_id: str) -> bool:
+        response = self.api.request(
+            "POST",
+            "/uploads/complete",
+            query_params={"upload_id": upload_id}
+        )
+        return response.status_code in (200, 201)
+
+
+class StubUploadProtocol(UploadProtocol):
+    """In-memory implementation of the upload protocol, for testing and benchmarks
+
+    `fail_chunks` holds chunk offsets that fail once with a NetworkError, and
+    `interrupt_after` makes the upload stop (as if the app was closed) after
+    that many chunks have been stored.
+    """
+
+    def __init__(self, fail_chunks: Optional[set] = None, interrupt_after: Optional[int] = None):
+        self.fail_chunks = set(fail_chunks or ())
+        self.interrupt_after = interrupt_after
+        self.uploads: Dict[str, Dict[str, Any]] = {}
+        self.completed: Dict[str, bytes] = {}
+        self.chunk_requests = 0
+        self._lock = threading.Lock()
+
+    def start(self, endpoint: str, query_params: Dict[str, Any], file_name: str, total_size: int) -> str:
+        upload_id = uuid.uuid4().hex
+        with self._lock:
+            self.uploads[upload_id] = {
+                "endpoint": endpoint,
+                "params": dict(query_params),
+                "file_name": file_name,
+                "total_size": total_size,
+                "data": bytearray()
+            }
+        return upload_id
+
+    def get_offset(self, upload_id: str) -> int:
+        with self._lock:
+            if upload_id not in self.uploads:
+                raise NotFoundError("Resource not found", 404)
+            return len(self.uploads[upload_id]["data"])
+
+    def send_chunk(self, upload_id: str, offset: int, data: bytes, total_size: int):
+        with self._lock:
+            self.chunk_requests += 1
+            if offset in self.fail_chunks:
+                self.fail_chunks.discard(offset)
+                raise NetworkError("Network error: simulated chunk failure")
+            if self.interrupt_after is not None and self.interrupt_after <= 0:
+                raise NetworkError("Network error: simulated interruption")
+            upload = self.uploads.get(upload_id)
+            if upload is None:
+                raise NotFoundError("Resource not found", 404)
+            if offset != len(upload["data"]):
+                raise APIError(f"API error 409: unexpected offset {offset}", 409)
+            upload["data"].extend(data)
+            if self.interrupt_after is not None:
+                self.interrupt_after -= 1
+
+    def complete(self, upload_id: str) -> bool:
+        with self._lock:
+            upload = self.uploads.pop(upload_id, None)
+            if upload is None or len(upload["data"]) != upload["total_size"]:
+                return False
+            self.completed[upload_id] = bytes(upload["data"])
+            return True
+
+
+class UploadJournal:
+    """Persists unfinished uploads so they can be resumed after an interruption
+
+    With ``scope`` (``APIClient.cache_scope``) each user gets its own file,
+    so an upload is only ever resumed by the user that started it.
+    """
+
+    def __init__(self, path: Optional[str] = None, scope: Optional[Callable[[], Hashable]] = None):
+        self.base_path = os.path.abspath(path or os.path.join(tempfile.gettempdir(), "satanica_uploads.json"))
+        self._scope_of = scope
+
+    @property
+    def path(self) -> str:
+        if self._scope_of is None:
+            return self.base_path
+        root, ext = os.path.splitext(self.base_path)
+        scope = hashlib.sha256(repr(self._scope_of()).encode()).hexdigest()[:16]
+        return f"{root}_{scope}{ext}"
+
+    @staticmethod
+    def _read(path: str) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    @staticmethod
+    def _write(path: str, entries: Dict[str, Dict[str, Any]]):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entries, f)
+        os.replace(tmp_path, path)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        path = self.path
+        with _lock_for(path):
+            return self._read(path).get(key)
+
+    def put(self, key: str, upload_id: str):
+        path = self.path
+        with _lock_for(path):
+            entries = self._read(path)
+            entries[key] = {"upload_id": upload_id, "updated": time.time()}
+            self._write(path, entries)
+
+    def remove(self, key: str):
+        path = self.path
+        with _lock_for(path):
+            entries = self._read(path)
+            if entries.pop(key, None) is not None:
+                self._write(path, entries)
+
+
+class ChunkedUploader:
+    """Uploads files in chunks with per-chunk retries and resume support"""
+
+    def __init__(
+        self,
+        protocol: UploadProtocol,
+        journal: Optional[UploadJournal] = None,
+        chunk_size: Optional[int] = None,
+        max_retries: Optional[int] = None,
+        retry_delay: Optional[float] = None
+    ):
+        self.protocol = protocol
+        self.journal = journal or UploadJournal()
+        self.chunk_size = chunk_size or settings.UPLOAD_CHUNK_SIZE
+        self.max_retries = settings.UPLOAD_MAX_RETRIES if max_retries is None else max_retries
+        self.retry_delay = settings.UPLOAD_RETRY_DELAY if retry_delay is None else retry_delay
+
+    def should_chunk(self, file_path: str) -> bool:
+        """Only large files go through the chunked pipeline, and only if the backend supports it"""
+        return settings.UPLOAD_CHUNKED_ENABLED and os.path.getsize(file_path) >= settings.UPLOAD_CHUNK_THRESHOLD
+
+    def upload(
+        self,
+        endpoint: str,
+        file_path: str,
+        query_params: Optional[Dict[str, Any]] = None,
+        on_progress: Optional[ProgressCallback] = None
+    ) -> bool:
+        """
+        Upload a file in chunks, resuming a previous interrupted upload if any
+
+        Raises:
+            APIError: If a chunk keeps failing after all retries. The upload
+                stays in the journal and the next call resumes it.
+        """
+        query_params = {k: v for k, v in (query_params or {}).items() if v is not None}
+        file_name = os.path.basename(file_path)
+
+        with FileChunkReader(file_path, chunk_size=self.chunk_size) as reader:
+            key = self._journal_key(endpoint, query_params, reader.fingerprint())
+            emitter = _ProgressEmitter(file_name, reader.size, on_progress)
+            upload_id, offset = self._resume_or_start(key, endpoint, query_params, file_name, reader.size)
+            emitter.resumed = offset > 0
+            emitter.emit(offset)
+
+            while offset < reader.size:
+                data = reader.read_at(offset)
+                offset = self._send_with_retry(upload_id, offset, data, reader.size, emitter)
+                emitter.emit(offset)
+
+            success = self.protocol.complete(upload_id)
+
+        if success:
+            self.journal.remove(key)
+        return success
+
+    def _resume_or_start(self, key: str, endpoint: str, query_params: Dict[str, Any],
+                         file_name: str, total_size: int) -> Tuple[str, int]:
+        entry = self.journal.get(key)
+        if entry:
+            try:
+                offset = self.protocol.get_offset(entry["upload_id"])
+                logger.info(f"Resuming upload of {file_name} at byte {offset}")
+                return entry["upload_id"], offset
+            except NotFoundError:
+                # El servidor ya no conoce esta subida, empezar de nuevo
+                self.journal.remove(key)
+
+        upload_id = self.protocol.start(endpoint, query_params, file_name, total_size)
+        self.journal.put(key, upload_id)
+        return upload_id, 0
+
+    def _send_with_retry(self, upload_id: str, offset: int, data: bytes, total_size: int,
+                         emitter: _ProgressEmitter) -> int:
+        """Send one chunk and return the offset to continue from"""
+        attempt = 0
+        while True:
+            try:
+                self.protocol.send_chunk(upload_id, offset, data, total_size)
+                return offset + len(data)
+            except (NetworkError, ServerError) as e:
+                attempt += 1
+                if attempt > self.max_retries:
+                    raise
+                emitter.retries += 1
+                delay = self.retry_delay * (2 ** (attempt - 1))
+                logger.warning(f"Chunk at byte {offset} failed ({str(e)}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+            except APIError as e:
+                if e.status_code != 409:
+                    raise
+                # El servidor tiene otro offset: chunk recibido sin respuesta (adelante)
+                # o uno anterior perdido (detrás); se sigue desde el suyo
+                server_offset = self.protocol.get_offset(upload_id)
+                if server_offset == offset or not 0 <= server_offset <= total_size:
+                    raise
+                logger.info(f"Server is at byte {server_offset}, resending from there (was {offset})")
+                return server_offset
+
+    @staticmethod
+    def _journal_key(endpoint: str, query_params: Dict[str, Any], fingerprint: str) -> str:
+        params = "&".join(f"{k}={query_params[k]}" for k in sorted(query_params))
+        return f"{endpoint}?{params}#{fingerprint}"
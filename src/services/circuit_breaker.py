@@ -0,0 +1,157 @@
+# services/circuit_breaker.py
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from config.settings import settings
+from core.exceptions import CircuitOpenError
+
+logger = logging.getLogger(__name__)
+
+CircuitKey = Tuple[str, str]  # (host, grupo de endpoints)
+StateListener = Callable[[CircuitKey, str, str], None]
+
+
+class CircuitState:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class _Circuit:
+    def __init__(self):
+        self.state = CircuitState.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probes = 0  # Peticiones de prueba en curso (semiabierto)
+
+
+class CircuitBreaker:
+    """Fails fast while the backend is down instead of waiting for each timeout
+
+    A circuit opens after ``failure_threshold`` consecutive failures (network
+    errors or 502/503/504). While open, requests raise CircuitOpenError at
+    once. After ``reset_timeout`` seconds one probe request is let through
+    (half-open): success closes the circuit, failure opens it again.
+
+    Circuits are kept per host, or per host and endpoint group (first path
+    segment, e.g. ``/invoices``) when scope is ``"group"``.
+    """
+
+    FAILURE_STATUSES = frozenset({502, 503, 504})
+
+    def __init__(self, failure_threshold: Optional[int] = None, reset_timeout: Optional[float] = None,
+                 scope: Optional[str] = None, half_open_max_calls: int = 1):
+        self.failure_threshold = failure_threshold or settings.CIRCUIT_FAILURE_THRESHOLD
+        self.reset_timeout = settings.CIRCUIT_RESET_TIMEOUT if reset_timeout is None else reset_timeout
+        self.scope = scope or settings.CIRCUIT_SCOPE
+        self.half_open_max_calls = half_open_max_calls
+        self._circuits: Dict[CircuitKey, _Circuit] = {}
+        self._listeners: List[StateListener] = []
+        self._pending: List[Tuple[CircuitKey, str, str]] = []
+        self._lock = threading.Lock()
+
+    def key_for(self, url: str) -> CircuitKey:
+        parts = urlsplit(url)
+        group = ""
+        if self.scope == "group":
+            segments = [s for s in parts.path.split("/") if s]
+            group = f"/{segments[0]}" if segments else "/"
+        return parts.netloc, group
+
+    def before_request(self, key: CircuitKey):
+        """Raise CircuitOpenError if the request must not be sent"""
+        try:
+            self._check(key)
+        finally:
+            self._flush()
+
+    def _check(self, key: CircuitKey):
+        with self._lock:
+            circuit = self._circuits.setdefault(key, _Circuit())
+            if circuit.state == CircuitState.CLOSED:
+                return
+            if circuit.state == CircuitState.OPEN:
+                remaining = circuit.opened_at + self.reset_timeout - time.monotonic()
+                if remaining > 0:
+                    raise CircuitOpenError(
+                        f"Servidor no disponible, reintentando en {int(remaining) + 1}s"
+                    )
+                self._set_state(key, circuit, CircuitState.HALF_OPEN)
+            if circuit.probes >= self.half_open_max_calls:
+                raise CircuitOpenError("Servidor no disponible, comprobando conexión")
+            circuit.probes += 1
+
+    def record_success(self, key: CircuitKey):
+        with self._lock:
+            circuit = self._circuits.setdefault(key, _Circuit())
+            circuit.failures = 0
+            circuit.probes = 0
+            if circuit.state != CircuitState.CLOSED:
+                self._set_state(key, circuit, CircuitState.CLOSED)
+        self._flush()
+
+    def record_failure(self, key: CircuitKey):
+        with self._lock:
+            circuit = self._circuits.setdefault(key, _Circuit())
+            circuit.failures += 1
+            circuit.probes = 0
+            if circuit.state == CircuitState.HALF_OPEN or (
+                    circuit.state == CircuitState.CLOSED and circuit.failures >= self.failure_threshold):
+                circuit.opened_at = time.monotonic()
+                self._set_state(key, circuit, CircuitState.OPEN)
+        self._flush()
+
+    def release(self, key: CircuitKey):
+        """Give back the probe slot of a request that ended without an outcome (e.g. cancelled)"""
+        with self._lock:
+            circuit = self._circuits.get(key)
+            if circuit is not None and circuit.probes > 0:
+                circuit.probes -= 1
+
+    def state(self, key: CircuitKey) -> str:
+        with self._lock:
+            circuit = self._circuits.get(key)
+            return circuit.state if circuit else CircuitState.CLOSED
+
+    @property
+    def degraded(self) -> bool:
+        """True while any circuit is not closed"""
+        with self._lock:
+            return any(c.state != CircuitState.CLOSED for c in self._circuits.values())
+
+    def add_listener(self, listener: StateListener) -> Callable[[], None]:
+        """Call listener(key, old_state, new_state) on every transition"""
+        with self._lock:
+            self._listeners.append(listener)
+
+        def remove():
+            with self._lock:
+                if listener in self._listeners:
+                    self._listeners.remove(listener)
+        return remove
+
+    def reset(self):
+        with self._lock:
+            self._circuits.clear()
+
+    def _set_state(self, key: CircuitKey, circuit: _Circuit, new_state: str):
+        # Se llama con el lock tomado; los listeners se avisan después, en _flush
+        old_state, circuit.state = circuit.state, new_state
+        logger.info(f"Circuit {key} {old_state} -> {new_state}")
+        self._pending.append((key, old_state, new_state))
+
+    def _flush(self):
+        with self._lock:
+            if not self._pending:
+                return
+            events, self._pending = self._pending, []
+            listeners = list(self._listeners)
+        for key, old_state, new_state in events:
+            for listener in listeners:
+                try:
+                    listener(key, old_state, new_state)
+                except Exception as e:
+                    logger.warning(f"Circuit listener failed: {str(e)}")
@@ -0,0 +1,54 @@
+# services/compression.py
+import gzip
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+from config.settings import settings
+
+
+def _installed(*modules: str) -> bool:
+    for module in modules:
+        try:
+            __import__(module)
+            return True
+        except ImportError:
+            continue
+    return False
+
+
+# Codificaciones que httpx sabe descomprimir, de preferida a menos preferida
+SUPPORTED_ENCODINGS: List[str] = (
+    (["zstd"] if _installed("zstandard") else [])
+    + (["br"] if _installed("brotli", "brotlicffi") else [])
+    + ["gzip", "deflate"]
+)
+
+
+def accept_encoding(setting: Optional[str] = None) -> str:
+    """Accept-Encoding header value from ACCEPT_ENCODING
+
+    ``auto`` offers every supported encoding; a comma separated list is
+    filtered to the supported ones; ``identity`` asks for uncompressed bodies.
+    """
+    setting = (settings.ACCEPT_ENCODING if setting is None else setting).strip().lower()
+    if setting == "auto":
+        return ", ".join(SUPPORTED_ENCODINGS)
+    wanted = [value.strip() for value in setting.split(",") if value.strip()]
+    offered = [value for value in wanted if value in SUPPORTED_ENCODINGS]
+    return ", ".join(offered) or "identity"
+
+
+def encode_json(payload: Any, min_bytes: Optional[int] = None) -> Tuple[bytes, Dict[str, str], int]:
+    """Serialize a JSON body like httpx does and gzip it when it is large enough
+
+    Returns (body, headers, uncompressed size). Bodies under ``min_bytes``
+    (REQUEST_COMPRESSION_MIN_BYTES) are sent as they are.
+    """
+    min_bytes = settings.REQUEST_COMPRESSION_MIN_BYTES if min_bytes is None else min_bytes
+    body = json.dumps(payload, ensure_ascii=False, separators=(",", ":"), allow_nan=False).encode("utf-8")
+    headers = {"Content-Type": "application/json"}
+    size = len(body)
+    if size >= min_bytes:
+        body = gzip.compress(body, compresslevel=settings.REQUEST_COMPRESSION_LEVEL)
+        headers["Content-Encoding"] = "gzip"
+    return body, headers, size
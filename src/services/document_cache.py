@@ -0,0 +1,278 @@
+# services/document_cache.py
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+import tempfile
+import threading
+import time
+from typing import Callable, Dict, Hashable, Optional, Set
+
+import httpx
+
+from config.settings import settings
+from core.exceptions import APIError
+
+logger = logging.getLogger(__name__)
+
+# Un lock por directorio: varias sesiones (modo web) comparten el mismo índice
+_DIR_LOCKS: Dict[str, threading.RLock] = {}
+_DIR_LOCKS_GUARD = threading.Lock()
+
+
+def _lock_for(directory: str) -> threading.RLock:
+    with _DIR_LOCKS_GUARD:
+        return _DIR_LOCKS.setdefault(directory, threading.RLock())
+
+
+def guess_suffix(response: httpx.Response, default: str = ".pdf") -> str:
+    """Guess the file extension of a downloaded document from its headers"""
+    disposition = response.headers.get("Content-Disposition", "")
+    if "filename=" in disposition:
+        file_name = disposition.split("filename=")[-1].strip().strip('";')
+        _, ext = os.path.splitext(file_name)
+        if ext:
+            return ext.lower()
+    content_type = response.headers.get("Content-Type", "").split(";")[0].strip()
+    if content_type:
+        return mimetypes.guess_extension(content_type) or default
+    return default
+
+
+class DocumentCache:
+    """Content-addressed on-disk cache for invoices and accounting documents
+
+    Blobs are stored by SHA-256 of their content; an index maps each document
+    key (e.g. ``invoice:12``) to its blob, ETag and last access time. The cache
+    is capped at ``max_bytes`` with LRU eviction.
+
+    With ``scope`` (``APIClient.cache_scope``) keys are prefixed with a hash of
+    the user and permissions, so a session never finds another user's copy
+    and every download still goes through the backend's permission check.
+
+    ``fetch`` serves a cached copy at once; copies older than
+    ``revalidate_after`` seconds are also revalidated in the background.
+    """
+
+    INDEX_FILE = "index.json"
+    PART_SUFFIX = ".part"
+
+    def __init__(self, cache_dir: Optional[str] = None, max_bytes: Optional[int] = None,
+                 scope: Optional[Callable[[], Hashable]] = None, revalidate_after: Optional[float] = None):
+        self.cache_dir = os.path.abspath(
+            cache_dir or settings.DOCUMENT_CACHE_DIR or os.path.join(tempfile.gettempdir(), "satanica_docs")
+        )
+        self.max_bytes = max_bytes if max_bytes is not None else settings.DOCUMENT_CACHE_MAX_BYTES
+        self.revalidate_after = (settings.DOCUMENT_CACHE_REVALIDATE_AFTER
+                                 if revalidate_after is None else revalidate_after)
+        self._scope_of = scope
+        self._lock = _lock_for(self.cache_dir)
+        self._revalidating: Set[str] = set()
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.cleanup_orphans()
+
+    def key(self, kind: str, doc_id: int) -> str:
+        return f"{self._scope_prefix()}{kind}:{doc_id}"
+
+    def _scope_prefix(self) -> str:
+        if self._scope_of is None:
+            return ""
+        # Hash del ámbito: el índice no guarda ids de usuario en claro
+        return hashlib.sha256(repr(self._scope_of()).encode()).hexdigest()[:16] + "/"
+
+    def fetch(self, kind: str, doc_id: int,
+              request: Callable[[Optional[Dict[str, str]]], httpx.Response]) -> Optional[str]:
+        """Return the local file for a document, downloading it when there is no copy
+
+        ``request(headers)`` performs the download. A cached copy is returned
+        without waiting for the backend; once older than ``revalidate_after``
+        it is revalidated in the background (with If-None-Match when the
+        backend sent an ETag). None if the download is refused.
+        """
+        key = self.key(kind, doc_id)
+        with self._lock:
+            entry = self._touch(key)
+            if entry is not None:
+                if time.time() - entry.get("checked_at", 0) >= self.revalidate_after \
+                        and key not in self._revalidating:
+                    self._revalidating.add(key)
+                    threading.Thread(target=self._revalidate, args=(kind, doc_id, key, entry.get("etag"), request),
+                                     daemon=True).start()
+                return self._blob_path(entry)
+        return self._store_response(kind, doc_id, key, request(None))
+
+    def _revalidate(self, kind: str, doc_id: int, key: str, etag: Optional[str],
+                    request: Callable[[Optional[Dict[str, str]]], httpx.Response]):
+        """Check a served copy against the backend and replace or drop it"""
+        response: Optional[httpx.Response] = None
+        try:
+            response = request({"If-None-Match": etag} if etag else None)
+            status = response.status_code
+        except APIError as e:
+            status = e.status_code  # APIClient lanza en los errores HTTP (None si no hubo respuesta)
+        except Exception as e:
+            logger.debug("No se pudo revalidar %s: %s", key, e)
+            return
+        finally:
+            with self._lock:
+                self._revalidating.discard(key)
+        # Otra sesión (otro token) mientras se revalidaba: la respuesta no es de este ámbito
+        if self.key(kind, doc_id) != key:
+            return
+        if status == 304:
+            with self._lock:
+                index = self._read_index()
+                if key in index:
+                    index[key]["checked_at"] = time.time()
+                    self._write_index(index)
+        elif status in (403, 404, 410):
+            self.invalidate(kind, doc_id)
+        elif response is not None:
+            self._store_response(kind, doc_id, key, response)
+
+    def _store_response(self, kind: str, doc_id: int, key: str, response: httpx.Response) -> Optional[str]:
+        if response.status_code != 200:
+            return None
+        return self._put(key, response.content, response.headers.get("ETag"), guess_suffix(response))
+
+    def get_path(self, kind: str, doc_id: int) -> Optional[str]:
+        """Return the cached file for a document (and mark it as recently used)"""
+        with self._lock:
+            entry = self._touch(self.key(kind, doc_id))
+            return self._blob_path(entry) if entry else None
+
+    def _touch(self, key: str) -> Optional[Dict]:
+        """Index entry of a key whose blob still exists, marked as recently used"""
+        index = self._read_index()
+        entry = index.get(key)
+        if not entry:
+            return None
+        if not os.path.exists(self._blob_path(entry)):
+            del index[key]
+            self._write_index(index)
+            return None
+        entry["last_access"] = time.time()
+        self._write_index(index)
+        return entry
+
+    def get_etag(self, kind: str, doc_id: int) -> Optional[str]:
+        with self._lock:
+            entry = self._read_index().get(self.key(kind, doc_id))
+            return entry.get("etag") if entry else None
+
+    def put(self, kind: str, doc_id: int, content: bytes, etag: Optional[str] = None,
+            suffix: str = ".pdf") -> str:
+        """Store a downloaded document and return its local path"""
+        return self._put(self.key(kind, doc_id), content, etag, suffix)
+
+    def _put(self, key: str, content: bytes, etag: Optional[str], suffix: str) -> str:
+        digest = hashlib.sha256(content).hexdigest()
+        now = time.time()
+        entry = {
+            "hash": digest,
+            "suffix": suffix,
+            "size": len(content),
+            "etag": etag,
+            "last_access": now,
+            "checked_at": now
+        }
+        path = self._blob_path(entry)
+
+        with self._lock:
+            if not os.path.exists(path):
+                # Escribir en un .part y renombrar: nunca queda un blob a medias
+                fd, part_path = tempfile.mkstemp(dir=self.cache_dir, suffix=self.PART_SUFFIX)
+                try:
+                    with os.fdopen(fd, "wb") as f:
+                        f.write(content)
+                    os.replace(part_path, path)
+                except Exception:
+                    try:
+                        os.unlink(part_path)
+                    except OSError:
+                        pass
+                    raise
+
+            index = self._read_index()
+            index[key] = entry
+            self._evict(index, keep=key)
+            self._write_index(index)
+        return path
+
+    def invalidate(self, kind: str, doc_id: int):
+        """Forget a document (after it is replaced or deleted)"""
+        with self._lock:
+            index = self._read_index()
+            entry = index.pop(self.key(kind, doc_id), None)
+            if entry is None:
+                return
+            self._remove_blob_if_unused(entry, index)
+            self._write_index(index)
+
+    def total_size(self) -> int:
+        with self._lock:
+            return self._unique_size(self._read_index())
+
+    def clear(self):
+        """Forget the current scope's documents; other users' copies are kept"""
+        prefix = self._scope_prefix()
+        with self._lock:
+            index = self._read_index()
+            for key in [k for k in index if k.startswith(prefix)]:
+                self._remove_blob_if_unused(index.pop(key), index)
+            self._write_index(index)
+
+    def cleanup_orphans(self, max_part_age: Optional[float] = None):
+        """Remove stale partial downloads and blobs no index entry points to"""
+        max_part_age = settings.DOCUMENT_CACHE_PART_MAX_AGE if max_part_age is None else max_part_age
+        now = time.time()
+        with self._lock:
+            index = self._read_index()
+            referenced = {os.path.basename(self._blob_path(entry)) for entry in index.values()}
+            for name in os.listdir(self.cache_dir):
+                path = os.path.join(self.cache_dir, name)
+                if name in (self.INDEX_FILE, f"{self.INDEX_FILE}.tmp") or name in referenced:
+                    continue
+                try:
+                    if name.endswith(self.PART_SUFFIX) and now - os.path.getmtime(path) < max_part_age:
+                        continue  # Descarga en curso de otra sesión
+                    os.unlink(path)
+                except OSError:
+                    pass
+
+    def _evict(self, index: Dict[str, Dict], keep: str):
+        """Drop least recently used entries until the cache fits in max_bytes"""
+        while self._unique_size(index) > self.max_bytes and len(index) > 1:
+            lru_key = min((k for k in index if k != keep), key=lambda k: index[k]["last_access"])
+            entry = index.pop(lru_key)
+            self._remove_blob_if_unused(entry, index)
+
+    def _remove_blob_if_unused(self, entry: Dict, index: Dict[str, Dict]):
+        path = self._blob_path(entry)
+        if any(self._blob_path(other) == path for other in index.values()):
+            return
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+    def _unique_size(self, index: Dict[str, Dict]) -> int:
+        return sum({self._blob_path(entry): entry["size"] for entry in index.values()}.values())
+
+    def _blob_path(self, entry: Dict) -> str:
+        return os.path.join(self.cache_dir, f"{entry['hash']}{entry.get('suffix', '')}")
+
+    def _read_index(self) -> Dict[str, Dict]:
+        try:
+            with open(os.path.join(self.cache_dir, self.INDEX_FILE), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_index(self, index: Dict[str, Dict]):
+        index_path = os.path.join(self.cache_dir, self.INDEX_FILE)
+        tmp_path = f"{index_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(index, f)
+        os.replace(tmp_path, index_path)
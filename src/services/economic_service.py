@@ -1,4 +1,5 @@
 # services/economic_service.py
+import json
 from typing import List, Optional
 from models.economic import (
     EconomicMovementListItem,
@@ -9,104 +10,223 @@ from models.economic import (
     CategoriaSubvencion
 )
 from models.invoice import FacturaListItem, FacturaCreate, FacturaUpdate
+from models.common import CreatedResource
+from config.settings import settings
+from core.tracing import trace_methods
 from .api_client import APIClient
+from .resource_cache import ResourceCache
+from .outbox import MutationOutbox, OutboxEntry, KEEP
 
+# Campos de un movimiento por los que se filtran las listas (el año también lo usa el backend)
+_LIST_FILTER_FIELDS = set(EconomicMovementFilters.model_fields) | {"ano_ejercicio"}
+
+@trace_methods
 class EconomicService:
-    def __init__(self, api_client: APIClient):
+    def __init__(self, api_client: APIClient, cache: Optional[ResourceCache] = None,
+                 outbox: Optional[MutationOutbox] = None):
         self.api = api_client
-    
+        self.cache = cache or ResourceCache()
+        self.outbox = outbox
+        if outbox is not None:
+            outbox.register("economic.create_movement", self._replay_create, on_conflict=self._on_conflict)
+            outbox.register("economic.update_movement", self._replay_update, on_conflict=self._on_conflict)
+
     # Economic Movements
     def get_last_movements(self) -> List[EconomicMovementListItem]:
         """Get recent economic movements"""
-        response = self.api.request("GET", "/economic_movement/get_last_economic_movements")
-        return [EconomicMovementListItem(**mov) for mov in response.json()]
-    
+        def load():
+            response = self.api.request("GET", "/economic_movement/get_last_economic_movements")
+            return self.api.parse_list(response, EconomicMovementListItem)
+        return self.cache.cached_list("movements", "last", load)
+
     def get_movements_list(self, filters: EconomicMovementFilters) -> List[EconomicMovementListItem]:
         """Get filtered list of economic movements"""
-        response = self.api.request(
-            "GET",
-            "/economic_movement/economic_movements_list",
-            query_params=filters.model_dump(exclude_unset=True)
-        )
-        return [EconomicMovementListItem(**mov) for mov in response.json()]
-    
+        query_params = filters.model_dump(exclude_unset=True)
+
+        def load():
+            response = self.api.request(
+                "GET",
+                "/economic_movement/economic_movements_list",
+                query_params=query_params
+            )
+            return self.api.parse_list(response, EconomicMovementListItem)
+        return self.cache.cached_list("movements", json.dumps(query_params, sort_keys=True), load)
+
     def get_movement_detail(self, movement_id: int) -> EconomicMovementDetail:
         """Get detailed information about a specific movement"""
-        response = self.api.request(
-            "GET",
-            "/economic_movement/economic_movement_detail",
-            query_params={"movement_id": movement_id}
-        )
-        return EconomicMovementDetail(**response.json())
-    
-    def create_movement(self, movement_data: EconomicMovementCreate) -> bool:
-        """Create a new economic movement"""
+        def load():
+            response = self.api.request(
+                "GET",
+                "/economic_movement/economic_movement_detail",
+                query_params={"movement_id": movement_id}
+            )
+            return self.api.parse_model(response, EconomicMovementDetail)
+        return self.cache.cached_detail("movements", movement_id, load)
+
+    def create_movement(self, movement_data: EconomicMovementCreate,
+                        idempotency_key: Optional[str] = None) -> CreatedResource:
+        """Create a new economic movement and return its ID"""
         response = self.api.request(
             "POST",
             "/economic_movement/create_economic_movement",
-            json_data=movement_data
+            json_data=movement_data,
+            # Repetir un alta que sí llegó al servidor la duplicaría si no descarta por clave
+            **_idempotent(idempotency_key, retry=settings.BACKEND_IDEMPOTENCY_KEYS)
         )
-        return response.status_code == 201
-    
-    def update_movement(self, movement_id: int, movement_data: EconomicMovementUpdate) -> bool:
+        # Las listas filtradas pueden incluir el nuevo movimiento
+        self.cache.invalidate("movements", all_keys=True)
+        return self.api.parse_created(response, "id_movimiento_economico")
+
+    def update_movement(self, movement_id: int, movement_data: EconomicMovementUpdate,
+                        idempotency_key: Optional[str] = None) -> bool:
         """Update existing economic movement"""
-        response = self.api.request(
-            "POST",
-            "/economic_movement/update_economic_movement",
-            query_params={"movement_id": movement_id},
-            json_data=movement_data
-        )
+        with self.cache.optimistic() as update:
+            filters_changed = self._patch_movement(movement_id, movement_data)
+            response = self.api.request(
+                "POST",
+                "/economic_movement/update_economic_movement",
+                query_params={"movement_id": movement_id},
+                json_data=movement_data,
+                # Aplicar los mismos campos dos veces da el mismo resultado
+                **_idempotent(idempotency_key, retry=True)
+            )
+            if response.status_code != 200:
+                update.rollback()
+        if filters_changed and response.status_code == 200:
+            # El movimiento puede haber entrado o salido de las listas filtradas
+            self.cache.invalidate("movements", all_keys=True)
         return response.status_code == 200
-    
+
+    def _patch_movement(self, movement_id: int, movement_data: EconomicMovementUpdate) -> bool:
+        """Apply changes to the cached movement; returns True if they touch a list filter
+
+        Lists are only patched in place when no filtered field changes.
+        """
+        changes = self.cache.changes_from(movement_data)
+        filters_changed = bool(_LIST_FILTER_FIELDS & changes.keys())
+        self.cache.patch("movements", "id_movimiento_economico", movement_id, changes,
+                         lists=not filters_changed)
+        return filters_changed
+
+    # Sin conexión: se guardan en la outbox y se envían al volver la conexión
+    def queue_create_movement(self, movement_data: EconomicMovementCreate, idempotency_key: str) -> bool:
+        """Keep a movement that could not be created for a later replay
+
+        False if the outbox is off or the backend does not dedupe on the
+        Idempotency-Key (the create may have reached it: replaying it could
+        duplicate the movement).
+        """
+        if self.outbox is None or not settings.BACKEND_IDEMPOTENCY_KEYS:
+            return False
+        return self.outbox.enqueue(
+            "economic.create_movement", movement_data.model_dump(mode="json", exclude_unset=True),
+            idempotency_key, label=f"Nuevo movimiento: {movement_data.concepto}",
+        ) is not None
+
+    def queue_update_movement(self, movement_id: int, movement_data: EconomicMovementUpdate,
+                              idempotency_key: str) -> bool:
+        """Keep changes that could not be saved; the cached movement shows them meanwhile"""
+        if self.outbox is None:
+            return False
+        queued = self.outbox.enqueue(
+            "economic.update_movement",
+            {"movement_id": movement_id, "data": movement_data.model_dump(mode="json", exclude_unset=True)},
+            idempotency_key, label=f"Cambios en el movimiento {movement_id}",
+        ) is not None
+        if queued and self._patch_movement(movement_id, movement_data):
+            self.cache.invalidate("movements", all_keys=True)
+        return queued
+
+    def _replay_create(self, payload: dict, idempotency_key: str) -> CreatedResource:
+        return self.create_movement(EconomicMovementCreate(**payload), idempotency_key)
+
+    def _replay_update(self, payload: dict, idempotency_key: str) -> bool:
+        return self.update_movement(payload["movement_id"], EconomicMovementUpdate(**payload["data"]),
+                                    idempotency_key)
+
+    def _on_conflict(self, entry: OutboxEntry, error: Exception) -> str:
+        # La caché puede mostrar el cambio rechazado
+        self.cache.invalidate("movements", all_keys=True)
+        # También si el movimiento se borró mientras tanto (404): el usuario ve el cambio
+        # rechazado en la lista de pendientes y decide si lo descarta
+        return KEEP
+
     def delete_movement(self, movement_id: int) -> bool:
         """Delete an economic movement"""
-        response = self.api.request(
-            "DELETE",
-            "/economic_movement/delete_economic_movement",
-            query_params={"movement_id": movement_id}
-        )
+        with self.cache.optimistic() as update:
+            self.cache.remove("movements", "id_movimiento_economico", movement_id)
+            response = self.api.request(
+                "DELETE",
+                "/economic_movement/delete_economic_movement",
+                query_params={"movement_id": movement_id}
+            )
+            if response.status_code != 200:
+                update.rollback()
         return response.status_code == 200
-    
+
     # Categories
     def get_categories(self) -> List[CategoriaSubvencion]:
         """Get list of subsidy categories"""
-        response = self.api.request("GET", "/categories/categories_list")
-        return [CategoriaSubvencion(**cat) for cat in response.json()]
-    
+        def load():
+            response = self.api.request("GET", "/categories/categories_list")
+            return self.api.parse_list(response, CategoriaSubvencion)
+        return self.cache.cached_list("categories", None, load)
+
     # Invoices
     def get_invoices_by_movement(self, movement_id: int) -> List[FacturaListItem]:
         """Get invoices for a specific movement"""
-        response = self.api.request(
-            "GET",
-            "/invoices/get_invoices_by_movement",
-            query_params={"movimiento_id": movement_id}
-        )
-        return [FacturaListItem(**invoice) for invoice in response.json()]
-    
-    def create_invoice(self, invoice_data: FacturaCreate) -> bool:
-        """Create a new invoice"""
+        def load():
+            response = self.api.request(
+                "GET",
+                "/invoices/get_invoices_by_movement",
+                query_params={"movimiento_id": movement_id}
+            )
+            return self.api.parse_list(response, FacturaListItem)
+        return self.cache.cached_list("invoices", movement_id, load)
+
+    def create_invoice(self, invoice_data: FacturaCreate) -> CreatedResource:
+        """Create a new invoice and return its ID"""
         response = self.api.request(
             "POST",
             "/invoices/create_invoice",
             json_data=invoice_data
         )
-        return response.status_code == 201
-    
+        self.cache.invalidate("invoices", invoice_data.id_movimiento_economico)
+        return self.api.parse_created(response, "id_factura")
+
     def update_invoice_data(self, invoice_id: int, invoice_data: FacturaUpdate) -> bool:
         """Update invoice data"""
-        response = self.api.request(
-            "POST",
-            "/invoices/update_invoice_data",
-            query_params={"factura_id": invoice_id},
-            json_data=invoice_data
-        )
+        with self.cache.optimistic() as update:
+            self.cache.patch("invoices", "id_factura", invoice_id, self.cache.changes_from(invoice_data))
+            response = self.api.request(
+                "POST",
+                "/invoices/update_invoice_data",
+                query_params={"factura_id": invoice_id},
+                json_data=invoice_data
+            )
+            if response.status_code != 200:
+                update.rollback()
         return response.status_code == 200
-    
+
     def delete_invoice(self, invoice_id: int) -> bool:
         """Delete an invoice"""
-        response = self.api.request(
-            "DELETE",
-            "/invoices/delete_invoice",
-            query_params={"factura_id": invoice_id}
-        )
+        with self.cache.optimistic() as update:
+            self.cache.remove("invoices", "id_factura", invoice_id)
+            response = self.api.request(
+                "DELETE",
+                "/invoices/delete_invoice",
+                query_params={"factura_id": invoice_id}
+            )
+            if response.status_code != 200:
+                update.rollback()
         return response.status_code == 200
+
+
+def _idempotent(idempotency_key: Optional[str], retry: bool) -> dict:
+    """Request kwargs sending the Idempotency-Key; ``retry``: the mutation can be sent again safely"""
+    if not idempotency_key:
+        return {}
+    kwargs = {"headers": {"Idempotency-Key": idempotency_key}}
+    if retry:
+        kwargs["idempotent"] = True
+    return kwargs
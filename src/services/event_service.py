@@ -6,12 +6,17 @@ from models.event import (
     EventCreate,
     EventUpdate
 )
+from models.common import CreatedResource
+from core.tracing import trace_methods
 from .api_client import APIClient
+from .resource_cache import ResourceCache
 from datetime import datetime
 
+@trace_methods
 class EventService:
-    def __init__(self, api_client: APIClient):
+    def __init__(self, api_client: APIClient, cache: Optional[ResourceCache] = None):
         self.api = api_client
+        self.cache = cache or ResourceCache()
     
     def get_events_list(self, year: Optional[int] = None) -> List[EventShortView]:
         """Get list of events, optionally filtered by year"""
@@ -19,36 +24,55 @@ class EventService:
         if year is None:
             year = datetime.now().year
         
-        response = self.api.request(
-            "GET",
-            "/event/events_list",
-            query_params={"year": year}
-        )
-        return [EventShortView(**event) for event in response.json()]
+        def load():
+            response = self.api.request(
+                "GET",
+                "/event/events_list",
+                query_params={"year": year}
+            )
+            return self.api.parse_list(response, EventShortView)
+        return self.cache.cached_list("events", year, load)
     
     def get_event_details(self, event_id: int) -> EventDetail:
         """Get detailed information about a specific event"""
-        response = self.api.request(
-            "GET",
-            "/event/event_details",
-            query_params={"event_id": event_id}
-        )
-        return EventDetail(**response.json())
+        def load():
+            response = self.api.request(
+                "GET",
+                "/event/event_details",
+                query_params={"event_id": event_id}
+            )
+            return self.api.parse_model(response, EventDetail)
+        return self.cache.cached_detail("events", event_id, load)
     
-    def create_event(self, event_data: EventCreate) -> bool:
-        """Create a new event"""
+    def create_event(self, event_data: EventCreate) -> CreatedResource:
+        """Create a new event and return its ID"""
         response = self.api.request(
             "POST",
             "/event/create_event",
             json_data=event_data
         )
-        return response.status_code == 201
+        created = self.api.parse_created(response, "event_id")
+        if created.id is not None:
+            event = EventShortView(event_id=created.id, **event_data.model_dump())
+            self.cache.append("events", event_data.year, event)
+            self.cache.set_detail("events", created.id, EventDetail(**event.model_dump()))
+        else:
+            self.cache.invalidate("events", event_data.year)
+        return created
     
     def update_event(self, event_data: EventUpdate) -> bool:
         """Update existing event"""
-        response = self.api.request(
-            "POST",
-            "/event/update_event",
-            json_data=event_data
-        )
-        return response.status_code == 200
\ No newline at end of file
+        changes = self.cache.changes_from(event_data)
+        with self.cache.optimistic() as update:
+            self.cache.patch("events", "event_id", event_data.event_id, changes)
+            response = self.api.request(
+                "POST",
+                "/event/update_event",
+                json_data=event_data
+            )
+            if response.status_code != 200:
+                update.rollback()
+        if "year" in changes:
+            # El evento cambia de lista (las listas van por año)
+            self.cache.invalidate("events", all_keys=True)
+        return response.status_code == 200
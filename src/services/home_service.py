@@ -1,7 +1,9 @@
 # services/home_service.py
 from models.common import Notifications
+from core.tracing import trace_methods
 from .api_client import APIClient
 
+@trace_methods
 class HomeService:
     def __init__(self, api_client: APIClient):
         self.api = api_client
@@ -9,4 +11,4 @@ class HomeService:
     def get_notifications(self) -> Notifications:
         """Get home notifications"""
         response = self.api.request("GET", "/home/notifications")
-        return Notifications(**response.json())
+        return self.api.parse_model(response, Notifications)
@@ -1,80 +1,110 @@
 # services/invoice_service.py
 from typing import List, Optional
 from models.invoice import FacturaCreate, FacturaUpdate, FacturaListItem
+from models.common import CreatedResource
+from core.tracing import trace_methods
 from .api_client import APIClient
-import tempfile
+from .chunked_upload import ChunkedUploader, HTTPUploadProtocol, ProgressCallback, ProgressReader
+from .document_cache import DocumentCache
+from .resource_cache import ResourceCache
+import os
 
+@trace_methods
 class InvoiceService:
-    def __init__(self, api_client: APIClient):
+    def __init__(self, api_client: APIClient, uploader: Optional[ChunkedUploader] = None,
+                 documents: Optional[DocumentCache] = None, cache: Optional[ResourceCache] = None):
         self.api = api_client
+        self.uploader = uploader or ChunkedUploader(HTTPUploadProtocol(api_client))
+        self.documents = documents or DocumentCache()
+        self.cache = cache or ResourceCache()
 
-    def create_invoice(self, invoice_data: FacturaCreate) -> bool:
-        """Create a new invoice"""
+    def create_invoice(self, invoice_data: FacturaCreate) -> CreatedResource:
+        """Create a new invoice and return its ID"""
         response = self.api.request(
             "POST",
             "/invoices/create_invoice",
             json_data=invoice_data
         )
-        return response.status_code == 201
+        self.cache.invalidate("invoices", invoice_data.id_movimiento_economico)
+        return self.api.parse_created(response, "id_factura")
 
     def update_invoice_data(self, invoice_id: int, update_data: FacturaUpdate) -> bool:
         """Update invoice data"""
-        response = self.api.request(
-            "POST",
-            "/invoices/update_invoice_data",
-            query_params={"factura_id": invoice_id},
-            json_data=update_data
-        )
+        with self.cache.optimistic() as update:
+            self.cache.patch("invoices", "id_factura", invoice_id, self.cache.changes_from(update_data))
+            response = self.api.request(
+                "POST",
+                "/invoices/update_invoice_data",
+                query_params={"factura_id": invoice_id},
+                json_data=update_data
+            )
+            if response.status_code != 200:
+                update.rollback()
         return response.status_code == 200
 
-    def update_invoice_file(self, invoice_id: int, file_path: str) -> bool:
+    def update_invoice_file(self, invoice_id: int, file_path: str,
+                            on_progress: Optional[ProgressCallback] = None) -> bool:
         """Upload invoice file (PDF)"""
-        # This endpoint expects a file upload via multipart/form-data
-        with open(file_path, "rb") as f:
-            files = {"file": f}
-            response = self.api.request(
-                "POST",
+        if self.uploader.should_chunk(file_path):
+            success = self.uploader.upload(
                 "/invoices/update_invoice_file",
+                file_path,
                 query_params={"factura_id": invoice_id},
-                files=files
+                on_progress=on_progress
             )
-        return response.status_code == 200
+        else:
+            # This endpoint expects a file upload via multipart/form-data
+            with open(file_path, "rb") as f:
+                reader = ProgressReader(f, os.path.getsize(file_path), on_progress)
+                files = {"file": (os.path.basename(file_path), reader)}
+                response = self.api.request(
+                    "POST",
+                    "/invoices/update_invoice_file",
+                    query_params={"factura_id": invoice_id},
+                    files=files
+                )
+            success = response.status_code == 200
+
+        # El archivo ha cambiado: la copia local ya no es válida
+        self.documents.invalidate("invoice", invoice_id)
+        return success
     
     def download_invoice(self, invoice_id: int) -> Optional[str]:
-        """Download invoice file and return the local file path"""
-        try:
-            response = self.api.request(
+        """Download invoice file and return the local file path
+
+        A cached copy is returned at once and revalidated in the background
+        once it is older than DOCUMENT_CACHE_REVALIDATE_AFTER.
+        """
+        def request(headers: Optional[dict]):
+            return self.api.request(
                 "GET",
                 "/invoices/download_invoice",
-                query_params={"factura_id": invoice_id}
+                query_params={"factura_id": invoice_id},
+                headers=headers
             )
-            
-            if response.status_code == 200:
-                # Archivo temporal para guardar la factura
-                with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as temp_file:
-                    temp_file.write(response.content)
-                    return temp_file.name
-            else:
-                return None
-                
-        except Exception as e:
-            print(f"Error downloading invoice: {e}")
-            return None
+        return self.documents.fetch("invoice", invoice_id, request)
 
     def delete_invoice(self, invoice_id: int) -> bool:
         """Delete an invoice"""
-        response = self.api.request(
-            "DELETE",
-            "/invoices/delete_invoice",
-            query_params={"factura_id": invoice_id}
-        )
+        with self.cache.optimistic() as update:
+            self.cache.remove("invoices", "id_factura", invoice_id)
+            response = self.api.request(
+                "DELETE",
+                "/invoices/delete_invoice",
+                query_params={"factura_id": invoice_id}
+            )
+            if response.status_code != 200:
+                update.rollback()
+        self.documents.invalidate("invoice", invoice_id)
         return response.status_code == 200
 
     def get_invoices_by_movement(self, movement_id: int) -> List[FacturaListItem]:
         """Get invoices by movement ID"""
-        response = self.api.request(
-            "GET",
-            "/invoices/get_invoices_by_movement",
-            query_params={"movimiento_id": movement_id}
-        )
-        return [FacturaListItem(**invoice) for invoice in response.json()]
\ No newline at end of file
+        def load():
+            response = self.api.request(
+                "GET",
+                "/invoices/get_invoices_by_movement",
+                query_params={"movimiento_id": movement_id}
+            )
+            return self.api.parse_list(response, FacturaListItem)
+        return self.cache.cached_list("invoices", movement_id, load)
\ No newline at end of file
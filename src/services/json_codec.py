@@ -0,0 +1,82 @@
+# services/json_codec.py
+import json
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional, Type, TypeVar
+
+from pydantic import BaseModel, TypeAdapter
+
+from config.settings import settings
+
+try:
+    import orjson
+except ImportError:  # Opcional: pip install orjson
+    orjson = None
+
+try:
+    from pydantic_core import from_json
+except ImportError:  # pydantic < 2.5
+    from_json = None
+
+logger = logging.getLogger(__name__)
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+
+def _available() -> Dict[str, Callable[[bytes], Any]]:
+    backends: Dict[str, Callable[[bytes], Any]] = {}
+    if orjson is not None:
+        backends["orjson"] = orjson.loads
+    if from_json is not None:
+        backends["pydantic_core"] = from_json
+    backends["stdlib"] = json.loads
+    return backends
+
+
+# De más rápido a más lento; "auto" elige el primero
+BACKENDS = _available()
+
+
+class JSONCodec:
+    """Decodes response bodies with the fastest available JSON backend
+
+    ``JSON_DECODER`` picks the backend: ``auto`` (orjson, then pydantic-core's
+    ``from_json``, then the standard library) or one of them by name. With
+    ``JSON_VALIDATE_RAW`` models are built straight from the raw bytes with
+    pydantic's ``validate_json``, skipping the intermediate dicts.
+    """
+
+    def __init__(self, backend: Optional[str] = None, validate_raw: Optional[bool] = None):
+        requested = settings.JSON_DECODER if backend is None else backend
+        if requested == "auto":
+            requested = next(iter(BACKENDS))
+        elif requested not in BACKENDS:
+            logger.warning(f"JSON backend '{requested}' not available, using the standard library")
+            requested = "stdlib"
+        self.name = requested
+        self._loads = BACKENDS[requested]
+        self.validate_raw = settings.JSON_VALIDATE_RAW if validate_raw is None else validate_raw
+        self._adapters: Dict[type, TypeAdapter] = {}
+        self._lock = threading.Lock()
+
+    def loads(self, content: bytes) -> Any:
+        """Decode a JSON body (raises ValueError on invalid JSON)"""
+        return self._loads(content)
+
+    def validate_model(self, content: bytes, model: Type[ModelT]) -> ModelT:
+        """Build a model from the raw JSON bytes of an object"""
+        return model.model_validate_json(content)
+
+    def validate_list(self, content: bytes, model: Type[ModelT]) -> List[ModelT]:
+        """Build a list of models from the raw JSON bytes of an array"""
+        return self._adapter(model).validate_json(content)
+
+    def _adapter(self, model: type) -> TypeAdapter:
+        adapter = self._adapters.get(model)
+        if adapter is None:
+            with self._lock:
+                adapter = self._adapters.get(model)
+                if adapter is None:
+                    adapter = TypeAdapter(List[model])
+                    self._adapters[model] = adapter
+        return adapter
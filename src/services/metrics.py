@@ -0,0 +1,199 @@
+# services/metrics.py
+import bisect
+import json
+import math
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Sequence
+
+from config.settings import settings
+
+# Límites (segundos) de los buckets del histograma de latencia
+LATENCY_BUCKETS: Sequence[float] = (0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class Histogram:
+    """Cumulative-bucket histogram plus a window of recent samples for percentiles"""
+
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS, window: Optional[int] = None):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # El último es +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.samples: Deque[float] = deque(maxlen=window or settings.METRICS_SAMPLE_SIZE)
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.samples.append(value)
+
+    def percentile(self, q: float) -> Optional[float]:
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        # Rango más cercano
+        index = min(len(ordered) - 1, max(0, math.ceil(q / 100 * len(ordered)) - 1))
+        return ordered[index]
+
+    def cumulative(self) -> List[int]:
+        total, result = 0, []
+        for value in self.counts:
+            total += value
+            result.append(total)
+        return result
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "mean": self.sum / self.count if self.count else None,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+        }
+
+
+def _ratio(raw: int, wire: int) -> Optional[float]:
+    """Uncompressed / transferred bytes (1.0 when nothing was compressed)"""
+    return raw / wire if wire else None
+
+
+class EndpointMetrics:
+    def __init__(self):
+        self.count = 0
+        self.errors: Dict[str, int] = {}
+        self.latency = Histogram()
+        self.request_bytes = 0  # Sin comprimir
+        self.response_bytes = 0
+        self.request_wire_bytes = 0  # Lo que viaja por la red (comprimido si aplica)
+        self.response_wire_bytes = 0
+        self.decode = Histogram()  # Tiempo de decodificar el JSON (sin construir modelos)
+        self.parse = Histogram()  # Tiempo de construir los modelos pydantic
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "errors": dict(self.errors),
+            "latency": self.latency.summary(),
+            "request_bytes": self.request_bytes,
+            "response_bytes": self.response_bytes,
+            "request_wire_bytes": self.request_wire_bytes,
+            "response_wire_bytes": self.response_wire_bytes,
+            "response_compression_ratio": _ratio(self.response_bytes, self.response_wire_bytes),
+            "request_compression_ratio": _ratio(self.request_bytes, self.request_wire_bytes),
+            "json_decode": self.decode.summary(),
+            "model_parse": self.parse.summary(),
+        }
+
+
+class MetricsCollector:
+    """Per-endpoint latency, error and payload metrics of the API client
+
+    Endpoints are keyed as ``"<METHOD> <path>"``. Use ``snapshot()`` for a
+    dict, ``to_json()`` or ``to_prometheus()`` to dump them.
+    """
+
+    def __init__(self, enabled: Optional[bool] = None):
+        self.enabled = settings.METRICS_ENABLED if enabled is None else enabled
+        self._endpoints: Dict[str, EndpointMetrics] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(method: str, endpoint: str) -> str:
+        return f"{method.upper()} {endpoint}"
+
+    def record_request(self, key: str, duration: float, request_bytes: int = 0,
+                       response_bytes: int = 0, error: Optional[BaseException] = None,
+                       request_wire_bytes: Optional[int] = None, response_wire_bytes: Optional[int] = None):
+        if not self.enabled:
+            return
+        with self._lock:
+            metrics = self._endpoints.setdefault(key, EndpointMetrics())
+            metrics.count += 1
+            metrics.latency.observe(duration)
+            metrics.request_bytes += request_bytes
+            metrics.response_bytes += response_bytes
+            metrics.request_wire_bytes += request_bytes if request_wire_bytes is None else request_wire_bytes
+            metrics.response_wire_bytes += response_bytes if response_wire_bytes is None else response_wire_bytes
+            if error is not None:
+                name = type(error).__name__
+                metrics.errors[name] = metrics.errors.get(name, 0) + 1
+
+    def record_decode(self, key: str, duration: float):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._endpoints.setdefault(key, EndpointMetrics()).decode.observe(duration)
+
+    def record_parse(self, key: str, duration: float):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._endpoints.setdefault(key, EndpointMetrics()).parse.observe(duration)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {key: metrics.snapshot() for key, metrics in sorted(self._endpoints.items())}
+
+    def reset(self):
+        with self._lock:
+            self._endpoints.clear()
+
+    def to_json(self, indent: Optional[int] = 2) -> str:
+        return json.dumps(self.snapshot(), indent=indent)
+
+    def dump(self, path: str):
+        """Write the metrics to a file: Prometheus text for .prom/.txt, JSON otherwise"""
+        text = self.to_prometheus() if path.endswith((".prom", ".txt")) else self.to_json()
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+
+    def to_prometheus(self) -> str:
+        """Prometheus text exposition format"""
+        with self._lock:
+            endpoints = sorted(self._endpoints.items())
+            lines = [
+                "# HELP api_requests_total API requests by endpoint",
+                "# TYPE api_requests_total counter",
+            ]
+            lines += [f'api_requests_total{{endpoint="{key}"}} {m.count}' for key, m in endpoints]
+
+            lines += ["# HELP api_errors_total API errors by endpoint and exception class",
+                      "# TYPE api_errors_total counter"]
+            for key, m in endpoints:
+                lines += [f'api_errors_total{{endpoint="{key}",error="{name}"}} {count}'
+                          for name, count in sorted(m.errors.items())]
+
+            lines += ["# HELP api_request_duration_seconds API request latency",
+                      "# TYPE api_request_duration_seconds histogram"]
+            for key, m in endpoints:
+                bounds = [str(b) for b in m.latency.buckets] + ["+Inf"]
+                lines += [f'api_request_duration_seconds_bucket{{endpoint="{key}",le="{le}"}} {count}'
+                          for le, count in zip(bounds, m.latency.cumulative())]
+                lines.append(f'api_request_duration_seconds_sum{{endpoint="{key}"}} {m.latency.sum}')
+                lines.append(f'api_request_duration_seconds_count{{endpoint="{key}"}} {m.latency.count}')
+
+            for metric, attr, help_text in (
+                ("api_request_bytes_total", "request_bytes", "Bytes sent (uncompressed)"),
+                ("api_response_bytes_total", "response_bytes", "Bytes received (decompressed)"),
+                ("api_request_wire_bytes_total", "request_wire_bytes", "Bytes sent on the wire (compressed)"),
+                ("api_response_wire_bytes_total", "response_wire_bytes", "Bytes received on the wire (compressed)"),
+            ):
+                lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} counter"]
+                lines += [f'{metric}{{endpoint="{key}"}} {getattr(m, attr)}' for key, m in endpoints]
+
+            for metric, attr, help_text in (
+                ("api_json_decode_seconds", "decode", "Time decoding JSON bodies"),
+                ("api_model_parse_seconds", "parse", "Time building pydantic models"),
+            ):
+                lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} summary"]
+                for key, m in endpoints:
+                    hist = getattr(m, attr)
+                    lines.append(f'{metric}_sum{{endpoint="{key}"}} {hist.sum}')
+                    lines.append(f'{metric}_count{{endpoint="{key}"}} {hist.count}')
+        return "\n".join(lines) + "\n"
+
+
+# Colector global: lo comparten todos los APIClient del proceso
+metrics = MetricsCollector()
@@ -1,45 +1,71 @@
 # services/organization_service.py
-from typing import List
+from typing import List, Optional
 from models.organization import (
     OrganizationShortView,
     OrganizationDetail,
     OrganizationCreate,
     OrganizationUpdate
 )
+from models.common import CreatedResource
+from core.tracing import trace_methods
 from .api_client import APIClient
+from .resource_cache import ResourceCache
 
+@trace_methods
 class OrganizationService:
-    def __init__(self, api_client: APIClient):
+    def __init__(self, api_client: APIClient, cache: Optional[ResourceCache] = None):
         self.api = api_client
+        self.cache = cache or ResourceCache()
     
     def get_organizations_list(self) -> List[OrganizationShortView]:
         """Get list of all organizations"""
-        response = self.api.request("GET", "/organization/organizations_list")
-        return [OrganizationShortView(**org) for org in response.json()]
+        def load():
+            response = self.api.request("GET", "/organization/organizations_list")
+            return self.api.parse_list(response, OrganizationShortView)
+        return self.cache.cached_list("organizations", None, load)
     
     def get_organization_details(self, org_id: int) -> OrganizationDetail:
         """Get detailed information about a specific organization"""
-        response = self.api.request(
-            "GET",
-            "/organization/organization_details",
-            query_params={"organization_id": org_id}
-        )
-        return OrganizationDetail(**response.json())
+        def load():
+            response = self.api.request(
+                "GET",
+                "/organization/organization_details",
+                query_params={"organization_id": org_id}
+            )
+            return self.api.parse_model(response, OrganizationDetail)
+        return self.cache.cached_detail("organizations", org_id, load)
     
-    def create_organization(self, org_data: OrganizationCreate) -> bool:
-        """Create a new organization"""
+    def create_organization(self, org_data: OrganizationCreate) -> CreatedResource:
+        """Create a new organization and return its ID"""
         response = self.api.request(
             "POST",
             "/organization/create_organization",
             json_data=org_data
         )
-        return response.status_code == 201
+        created = self.api.parse_created(response, "id_organizacion")
+        if created.id is not None:
+            # Añadir a la lista en caché sin volver a pedirla
+            self.cache.append("organizations", None, OrganizationShortView(
+                id_organizacion=created.id,
+                nif=org_data.nif,
+                nombre=org_data.nombre,
+                telefono=org_data.telefono,
+                email=org_data.email
+            ))
+        else:
+            self.cache.invalidate("organizations")
+        return created
     
     def update_organization(self, org_data: OrganizationUpdate) -> bool:
         """Update existing organization"""
-        response = self.api.request(
-            "POST",
-            "/organization/organization_update",
-            json_data=org_data
-        )
-        return response.status_code == 200
\ No newline at end of file
+        with self.cache.optimistic() as update:
+            self.cache.patch("organizations", "id_organizacion", org_data.id_organizacion,
+                             self.cache.changes_from(org_data))
+            response = self.api.request(
+                "POST",
+                "/organization/organization_update",
+                json_data=org_data
+            )
+            if response.status_code != 200:
+                update.rollback()
+        return response.status_code == 200
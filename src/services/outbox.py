@@ -0,0 +1,325 @@
+# services/outbox.py
+import json
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from config.settings import settings
+from core.exceptions import AuthenticationError, NetworkError, ServerError
+
+logger = logging.getLogger(__name__)
+
+# Respuesta de un conflict hook
+RETRY = "retry"  # Volver a intentarlo más tarde
+DROP = "drop"  # Descartar la operación
+KEEP = "keep"  # Dejarla en conflicto hasta que el usuario decida
+
+# Un lock por fichero (escrituras en SQLite, breves) y uno por fichero y usuario
+# (reenvío, con peticiones de red): las sesiones del mismo usuario no reenvían lo mismo a la vez
+_PATH_LOCKS: Dict[str, threading.RLock] = {}
+_PATH_LOCKS_GUARD = threading.Lock()
+
+Handler = Callable[[Dict[str, Any], str], Any]
+ConflictHook = Callable[["OutboxEntry", Exception], str]
+
+
+def _lock_for(path: str) -> threading.RLock:
+    with _PATH_LOCKS_GUARD:
+        return _PATH_LOCKS.setdefault(path, threading.RLock())
+
+
+def _default_path() -> str:
+    """Outbox file in the app data directory (not the temp dir: it must survive reboots)"""
+    base = os.getenv("FLET_APP_STORAGE_DATA")  # Apps empaquetadas con flet build
+    if not base:
+        if sys.platform == "win32":
+            base = os.path.join(os.getenv("APPDATA") or os.path.expanduser("~"), "FrontendFletSatanica")
+        elif sys.platform == "darwin":
+            base = os.path.expanduser("~/Library/Application Support/FrontendFletSatanica")
+        else:
+            data_home = os.getenv("XDG_DATA_HOME") or os.path.expanduser("~/.local/share")
+            base = os.path.join(data_home, "FrontendFletSatanica")
+    return os.path.join(base, "outbox.sqlite3")
+
+
+def new_idempotency_key() -> str:
+    return uuid.uuid4().hex
+
+
+class OutboxEntry:
+    """A queued mutation"""
+
+    PENDING = "pending"
+    CONFLICT = "conflict"
+
+    def __init__(self, row: sqlite3.Row):
+        self.id: int = row["id"]
+        self.kind: str = row["kind"]
+        self.payload: Dict[str, Any] = json.loads(row["payload"])
+        self.idempotency_key: str = row["idempotency_key"]
+        self.owner: str = row["owner"]
+        self.label: str = row["label"]
+        self.created_at: float = row["created_at"]
+        self.attempts: int = row["attempts"]
+        self.next_attempt_at: float = row["next_attempt_at"]
+        self.last_error: Optional[str] = row["last_error"]
+        self.state: str = row["state"]
+
+
+class MutationOutbox:
+    """Durable queue of mutations made while the backend was unreachable
+
+    Entries live in a SQLite file shared by every session of the process and
+    are replayed in order, per user, by a background thread. Each one carries
+    an idempotency key sent as ``Idempotency-Key`` so a replay of a request
+    that did reach the server is not applied twice (the backend must honour
+    the header; until it does, services only queue mutations that are safe
+    to repeat, see BACKEND_IDEMPOTENCY_KEYS). Network and 5xx errors are retried with exponential backoff
+    and stop the replay (later entries may depend on earlier ones); any other
+    API error goes to the conflict hook of the operation kind.
+    """
+
+    def __init__(self, path: Optional[str] = None, enabled: Optional[bool] = None):
+        self.enabled = settings.OUTBOX_ENABLED if enabled is None else enabled
+        self.path = os.path.abspath(path or settings.OUTBOX_PATH or _default_path())
+        self.owner: Optional[str] = None
+        self._handlers: Dict[str, Handler] = {}
+        self._conflict_hooks: Dict[str, ConflictHook] = {}
+        self._listeners: List[Callable[[int], None]] = []
+        self._lock = _lock_for(self.path)
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        # Cada hilo de reenvío tiene su propio aviso de parada: un start() rápido tras stop() no reutiliza uno que se va
+        self._stopping = threading.Event()
+        self._stopping.set()
+        if self.enabled:
+            self._create_private_file()
+            with self._db() as db:
+                db.execute(
+                    "CREATE TABLE IF NOT EXISTS outbox ("
+                    " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+                    " kind TEXT NOT NULL, payload TEXT NOT NULL,"
+                    " idempotency_key TEXT NOT NULL UNIQUE, owner TEXT NOT NULL, label TEXT NOT NULL,"
+                    " created_at REAL NOT NULL, attempts INTEGER NOT NULL DEFAULT 0,"
+                    " next_attempt_at REAL NOT NULL, last_error TEXT,"
+                    " state TEXT NOT NULL DEFAULT 'pending')"
+                )
+
+    # Registro de operaciones
+
+    def register(self, kind: str, handler: Handler, on_conflict: Optional[ConflictHook] = None):
+        """handler(payload, idempotency_key) performs the mutation; False or an APIError is a failure"""
+        self._handlers[kind] = handler
+        if on_conflict:
+            self._conflict_hooks[kind] = on_conflict
+
+    def add_listener(self, callback: Callable[[int], None]) -> Callable[[], None]:
+        """callback(pending_count) after every change; returns an unsubscribe function"""
+        self._listeners.append(callback)
+
+        def unsubscribe():
+            if callback in self._listeners:
+                self._listeners.remove(callback)
+        return unsubscribe
+
+    # Cola
+
+    def enqueue(self, kind: str, payload: Dict[str, Any], idempotency_key: Optional[str] = None,
+                label: str = "") -> Optional[int]:
+        """Store a mutation of the current user; returns its id (None if the outbox is off)"""
+        if not self.enabled or not self.owner:
+            return None
+        if kind not in self._handlers:
+            raise ValueError(f"Unknown outbox operation: {kind}")
+        now = time.time()
+        with self._lock, self._db() as db:
+            cursor = db.execute(
+                "INSERT OR IGNORE INTO outbox (kind, payload, idempotency_key, owner, label, created_at, next_attempt_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (kind, json.dumps(payload), idempotency_key or new_idempotency_key(), self.owner, label, now, now),
+            )
+            entry_id = cursor.lastrowid
+        logger.info(f"Mutation queued offline: {kind} ({label})")
+        self._notify()
+        self._wake.set()
+        return entry_id
+
+    def entries(self, include_conflicts: bool = True) -> List[OutboxEntry]:
+        if not self.enabled or not self.owner:
+            return []
+        query = "SELECT * FROM outbox WHERE owner = ?"
+        if not include_conflicts:
+            query += " AND state = 'pending'"
+        with self._db() as db:
+            return [OutboxEntry(row) for row in db.execute(query + " ORDER BY id", (self.owner,))]
+
+    def pending_count(self) -> int:
+        if not self.enabled or not self.owner:
+            return 0
+        with self._db() as db:
+            return db.execute("SELECT COUNT(*) FROM outbox WHERE owner = ?", (self.owner,)).fetchone()[0]
+
+    def discard(self, entry_id: int):
+        with self._lock, self._db() as db:
+            db.execute("DELETE FROM outbox WHERE id = ? AND owner = ?", (entry_id, self.owner))
+        self._notify()
+
+    def retry_now(self):
+        """Make every entry (conflicts included) due and wake the replay thread"""
+        with self._lock, self._db() as db:
+            db.execute("UPDATE outbox SET state = 'pending', next_attempt_at = ? WHERE owner = ?",
+                       (time.time(), self.owner))
+        self._wake.set()
+
+    # Reenvío
+
+    def replay(self) -> int:
+        """Send the due entries of the current user in order; returns how many were applied"""
+        owner = self.owner
+        if not self.enabled or not owner:
+            return 0
+        applied = 0
+        # Solo se bloquea a otras sesiones del mismo usuario; encolar y descartar no esperan a la red
+        with _lock_for(f"{self.path}#{owner}"):
+            for entry in self.entries(include_conflicts=False):
+                if entry.next_attempt_at > time.time():
+                    break  # Se respeta el orden: las siguientes esperan a esta
+                handler = self._handlers.get(entry.kind)
+                if handler is None:
+                    continue  # Operación de otra versión de la app
+                if not self._is_pending(entry.id):
+                    continue  # Descartada por el usuario durante el reenvío
+                try:
+                    result = handler(entry.payload, entry.idempotency_key)
+                    if result is False:
+                        raise ValueError("El servidor rechazó la operación")
+                except AuthenticationError as e:
+                    if e.status_code != 403:
+                        break  # 401: se reintenta tras volver a iniciar sesión
+                    # Sin permiso: reintentar no lo arregla, decide el conflict hook
+                    self._conflict(entry, e)
+                    continue
+                except (NetworkError, ServerError) as e:
+                    self._backoff(entry, e)
+                    break
+                except Exception as e:
+                    self._conflict(entry, e)
+                    continue
+                self._delete(entry.id)
+                applied += 1
+        if applied:
+            logger.info(f"Outbox replayed {applied} mutations")
+            self._notify()
+        return applied
+
+    def start(self, owner: Optional[str]):
+        """Start replaying the entries of owner (the logged-in user) in the background"""
+        self.owner = str(owner) if owner is not None else None
+        if not self.enabled or not self.owner:
+            return
+        self._notify()
+        if self._stopping.is_set() or self._thread is None or not self._thread.is_alive():
+            self._stopping = threading.Event()
+            self._thread = threading.Thread(target=self._run, args=(self._stopping,),
+                                            name="outbox-replay", daemon=True)
+            self._thread.start()
+        self._wake.set()
+
+    def stop(self):
+        """Stop the replay thread (logout); queued entries stay on disk"""
+        self._stopping.set()
+        self.owner = None
+        self._wake.set()
+
+    def wake(self):
+        """Try again now (e.g. the connection came back)"""
+        self._wake.set()
+
+    def _run(self, stopping: threading.Event):
+        while not stopping.is_set():
+            self._wake.clear()
+            try:
+                self.replay()
+            except Exception as e:
+                logger.warning(f"Outbox replay failed: {str(e)}")
+            self._wake.wait(self._next_delay())
+
+    def _next_delay(self) -> float:
+        if not self.owner:
+            return settings.OUTBOX_POLL_INTERVAL
+        with self._db() as db:
+            row = db.execute("SELECT MIN(next_attempt_at) FROM outbox WHERE owner = ? AND state = 'pending'",
+                             (self.owner,)).fetchone()
+        if row[0] is None:
+            return settings.OUTBOX_POLL_INTERVAL
+        return min(settings.OUTBOX_POLL_INTERVAL, max(0.0, row[0] - time.time()))
+
+    def _backoff(self, entry: OutboxEntry, error: Exception):
+        attempts = entry.attempts + 1
+        delay = min(settings.OUTBOX_MAX_RETRY_DELAY, settings.OUTBOX_RETRY_DELAY * 2 ** (attempts - 1))
+        with self._lock, self._db() as db:
+            db.execute("UPDATE outbox SET attempts = ?, next_attempt_at = ?, last_error = ? WHERE id = ?",
+                       (attempts, time.time() + delay, str(error), entry.id))
+
+    def _conflict(self, entry: OutboxEntry, error: Exception):
+        hook = self._conflict_hooks.get(entry.kind)
+        decision = KEEP
+        if hook:
+            try:
+                decision = hook(entry, error)
+            except Exception as e:
+                logger.warning(f"Outbox conflict hook failed: {str(e)}")
+        logger.warning(f"Outbox conflict in {entry.kind} ({entry.label}): {str(error)} -> {decision}")
+        if decision == DROP:
+            self._delete(entry.id)
+        elif decision == RETRY:
+            self._backoff(entry, error)
+        else:
+            with self._lock, self._db() as db:
+                db.execute("UPDATE outbox SET state = 'conflict', attempts = attempts + 1, last_error = ?"
+                           " WHERE id = ?", (str(error), entry.id))
+        self._notify()
+
+    def _create_private_file(self):
+        # Los payloads son datos económicos: solo el usuario del sistema puede leerlos
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, mode=0o700, exist_ok=True)
+        os.close(os.open(self.path, os.O_CREAT | os.O_RDWR, 0o600))
+        try:
+            os.chmod(self.path, 0o600)  # Ficheros creados por versiones anteriores
+        except OSError:
+            pass
+
+    def _is_pending(self, entry_id: int) -> bool:
+        with self._db() as db:
+            return db.execute("SELECT 1 FROM outbox WHERE id = ? AND state = 'pending'",
+                              (entry_id,)).fetchone() is not None
+
+    def _delete(self, entry_id: int):
+        with self._lock, self._db() as db:
+            db.execute("DELETE FROM outbox WHERE id = ?", (entry_id,))
+
+    def _notify(self):
+        count = self.pending_count()
+        for callback in list(self._listeners):
+            try:
+                callback(count)
+            except Exception as e:
+                logger.debug(f"Outbox listener failed: {str(e)}")
+
+    @contextmanager
+    def _db(self) -> Iterator[sqlite3.Connection]:
+        # Una conexión por operación: se usa desde la UI y desde el hilo de reenvío
+        db = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+        db.row_factory = sqlite3.Row
+        try:
+            yield db
+        finally:
+            db.close()
@@ -1,46 +1,110 @@
 # services/permission_service.py
-from typing import List, Dict, Set, Optional
+from typing import Callable, Dict, FrozenSet, Iterable, List, Optional, Set, Union
+from config.constants import Permissions, ROUTE_PERMISSIONS
 from .api_client import APIClient
 
+PermissionLike = Union[str, Permissions]
+
+# Bit de cada permiso conocido, según su posición en el enum
+PERMISSION_BITS: Dict[str, int] = {perm.value: 1 << index for index, perm in enumerate(Permissions)}
+
+
+def permission_mask(permissions: Iterable[PermissionLike]) -> int:
+    """Bitset of the known permissions in an iterable (unknown ones are ignored)"""
+    mask = 0
+    for perm in permissions:
+        value = perm.value if isinstance(perm, Permissions) else perm
+        mask |= PERMISSION_BITS.get(value, 0)
+    return mask
+
+
+# Máscara requerida por cada ruta (basta con uno de sus permisos)
+ROUTE_MASKS: Dict[str, int] = {route: permission_mask(perms) for route, perms in ROUTE_PERMISSIONS.items()}
+
+
 class PermissionService:
     def __init__(self, api_client: APIClient):
         self.api = api_client
         self._user_permissions: Set[str] = set()
         self._permissions_loaded = False
-    
+        self._mask = 0
+        self._allowed_routes: FrozenSet[str] = frozenset()
+        # Se llama con cada lista de permisos descargada (para persistirla)
+        self.on_loaded: Optional[Callable[[List[str]], None]] = None
+
     def load_user_permissions(self) -> List[str]:
         """Cargar permisos del usuario desde el backend"""
         response = self.api.request(
             "GET",
             "/user/my_permissions"
         )
-        permissions = response.json()
+        permissions = self.api.json(response)
+        self.set_permissions(permissions)
+        if self.on_loaded:
+            self.on_loaded(permissions)
+        return permissions
+
+    def set_permissions(self, permissions: Iterable[str]):
+        """Compilar los permisos en un bitset y precalcular las rutas permitidas"""
         self._user_permissions = set(permissions)
+        self._mask = permission_mask(self._user_permissions)
+        self._allowed_routes = frozenset(
+            route for route, required in ROUTE_MASKS.items() if self._mask & required
+        )
         self._permissions_loaded = True
-        return permissions
-    
-    def has_permission(self, permission: str) -> bool:
-        """Verificar si el usuario tiene un permiso específico"""
+        # Las cachés de peticiones se separan por conjunto de permisos
+        self.api.set_permission_scope(self._mask)
+
+    @property
+    def loaded(self) -> bool:
+        return self._permissions_loaded
+
+    @property
+    def mask(self) -> int:
+        """Bitset de permisos del usuario"""
+        self._ensure_loaded()
+        return self._mask
+
+    def _ensure_loaded(self):
         if not self._permissions_loaded:
             # Cargar permisos si no están cargados
             self.load_user_permissions()
-        return permission in self._user_permissions
-    
-    def has_any_permission(self, permissions: List[str]) -> bool:
+
+    def has_permission(self, permission: PermissionLike) -> bool:
+        """Verificar si el usuario tiene un permiso específico"""
+        self._ensure_loaded()
+        if isinstance(permission, Permissions):
+            return bool(self._mask & PERMISSION_BITS[permission.value])
+        bit = PERMISSION_BITS.get(permission)
+        if bit is None:
+            # Permiso que no está en el enum: comprobación por nombre
+            return permission in self._user_permissions
+        return bool(self._mask & bit)
+
+    def has_any_permission(self, permissions: List[PermissionLike]) -> bool:
         """Verificar si el usuario tiene al menos uno de los permisos"""
         return any(self.has_permission(perm) for perm in permissions)
-    
-    def has_all_permissions(self, permissions: List[str]) -> bool:
+
+    def has_all_permissions(self, permissions: List[PermissionLike]) -> bool:
         """Verificar si el usuario tiene todos los permisos"""
         return all(self.has_permission(perm) for perm in permissions)
-    
+
+    def can_access_route(self, route: str) -> bool:
+        """Verificar si el usuario puede acceder a una ruta (rutas sin permisos definidos: acceso libre)"""
+        if route not in ROUTE_MASKS:
+            return True
+        self._ensure_loaded()
+        return route in self._allowed_routes
+
     def get_user_permissions(self) -> Set[str]:
         """Obtener todos los permisos del usuario"""
-        if not self._permissions_loaded:
-            self.load_user_permissions()
+        self._ensure_loaded()
         return self._user_permissions.copy()
-    
+
     def clear_permissions(self):
         """Limpiar permisos (útil para logout)"""
         self._user_permissions.clear()
-        self._permissions_loaded = False
\ No newline at end of file
+        self._permissions_loaded = False
+        self._mask = 0
+        self._allowed_routes = frozenset()
+        self.api.set_permission_scope(None)
@@ -0,0 +1,109 @@
+# services/request_scheduler.py
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+from config.settings import settings
+
+
+class Priority:
+    INTERACTIVE = "interactive"  # Lo que el usuario está esperando en pantalla
+    PREFETCH = "prefetch"
+    BACKGROUND = "background"  # Subidas por lotes, sincronización...
+
+    ALL = (INTERACTIVE, PREFETCH, BACKGROUND)
+
+
+class TokenBucket:
+    """Token bucket rate limiter (``rate`` tokens per second, up to ``burst``)"""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def try_take(self, keep: float = 0.0) -> float:
+        """Take a token if more than ``keep`` would remain; else return seconds to wait"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens - 1 >= keep:
+                self._tokens -= 1
+                return 0.0
+            return (keep + 1 - self._tokens) / self.rate
+
+    def take(self, keep: float = 0.0):
+        while True:
+            wait = self.try_take(keep)
+            if not wait:
+                return
+            time.sleep(min(wait, 0.25))
+
+
+# Un bucket por host, compartido por todas las sesiones (el límite es del backend)
+_BUCKETS: Dict[str, TokenBucket] = {}
+_BUCKETS_GUARD = threading.Lock()
+
+
+def _bucket_for(host: str, rate: float, burst: float) -> TokenBucket:
+    with _BUCKETS_GUARD:
+        return _BUCKETS.setdefault(host, TokenBucket(rate, burst))
+
+
+class RequestScheduler:
+    """Admits requests by priority class so background work cannot starve the UI
+
+    Each class has its own concurrency limit, and every host has a token
+    bucket. Interactive requests may use the whole bucket; the other classes
+    leave a reserve of tokens for them. The class of a request is given
+    explicitly or taken from the thread's current ``use_priority`` block.
+    """
+
+    def __init__(self, rate: Optional[float] = None, burst: Optional[float] = None,
+                 concurrency: Optional[Dict[str, int]] = None, reserve: Optional[float] = None):
+        self.rate = rate or settings.SCHEDULER_RATE
+        self.burst = burst or settings.SCHEDULER_BURST
+        self.reserve = settings.SCHEDULER_INTERACTIVE_RESERVE if reserve is None else reserve
+        limits = concurrency or settings.SCHEDULER_CONCURRENCY
+        self._slots = {name: threading.BoundedSemaphore(limits.get(name, 1)) for name in Priority.ALL}
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self.admitted = {name: 0 for name in Priority.ALL}
+        self.wait_time = {name: 0.0 for name in Priority.ALL}
+
+    def current_priority(self) -> str:
+        return getattr(self._local, "priority", Priority.INTERACTIVE)
+
+    @contextmanager
+    def use_priority(self, priority: str):
+        """Requests made by this thread inside the block use ``priority``"""
+        previous = self.current_priority()
+        self._local.priority = priority
+        try:
+            yield
+        finally:
+            self._local.priority = previous
+
+    @contextmanager
+    def slot(self, host: str, priority: Optional[str] = None):
+        """Wait for a concurrency slot and a rate token before sending"""
+        priority = priority or self.current_priority()
+        if priority not in self._slots:
+            raise ValueError(f"Unknown request priority: {priority}")
+
+        started = time.monotonic()
+        semaphore = self._slots[priority]
+        semaphore.acquire()
+        try:
+            keep = {Priority.INTERACTIVE: 0.0, Priority.PREFETCH: self.reserve / 2}.get(priority, self.reserve)
+            _bucket_for(host, self.rate, self.burst).take(min(keep, self.burst - 1))
+            with self._stats_lock:
+                self.admitted[priority] += 1
+                self.wait_time[priority] += time.monotonic() - started
+            yield
+        finally:
+            semaphore.release()
@@ -0,0 +1,335 @@
+# services/resource_cache.py
+import logging
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from pydantic import BaseModel, ValidationError as PydanticValidationError
+
+from config.settings import settings
+from core.exceptions import NetworkError
+
+logger = logging.getLogger(__name__)
+
+Listener = Callable[[str], None]
+
+
+class OptimisticUpdate:
+    """Handle returned by ResourceCache.optimistic() to undo the local changes"""
+
+    def __init__(self, cache: "ResourceCache", snapshot):
+        self._cache = cache
+        self._snapshot = snapshot
+        self._touched: set = set()
+        self.rolled_back = False
+
+    def rollback(self):
+        if self.rolled_back:
+            return
+        self.rolled_back = True
+        self._cache._restore(self._snapshot, self._touched)
+
+
+class ResourceCache:
+    """Session-local cache of lists and details with write-through mutations
+
+    Services read through it (``cached_list`` / ``cached_detail``) and apply
+    successful mutations to it (``patch`` / ``remove`` / ``append``), so views
+    can reload their data without another request. Mutations can be applied
+    optimistically and rolled back if the request fails. Expired entries are
+    still served when the backend is unreachable (NetworkError).
+
+    Reads only skip the request for resources with a TTL (``CACHE_TTLS``,
+    reference data such as roles); everything else is fetched every time
+    and its stored copy is used for write-through and offline fallback.
+
+    With ``scope`` (e.g. ``APIClient.cache_scope``) entries belong to the
+    user and permissions they were loaded with and are dropped when it
+    changes, so another login or a new permission set never sees them.
+    """
+
+    def __init__(self, ttl: Optional[float] = None, scope: Optional[Callable[[], Hashable]] = None,
+                 ttls: Optional[Dict[str, float]] = None):
+        self.enabled = settings.CACHE_ENABLED
+        self.ttl = settings.CACHE_TTL if ttl is None else ttl
+        self.ttls = dict(settings.CACHE_TTLS if ttls is None else ttls)  # TTL por recurso
+        self._scope_of = scope
+        self._scope: Hashable = None
+        self._lists: Dict[Tuple[str, Hashable], Tuple[float, List[BaseModel]]] = {}
+        self._details: Dict[Tuple[str, Hashable], Tuple[float, BaseModel]] = {}
+        self._listeners: Dict[str, List[Listener]] = {}
+        self._lock = threading.RLock()
+        self._local = threading.local()  # Actualización optimista en curso (por hilo)
+
+    # Lectura
+
+    def get_list(self, resource: str, key: Hashable = None) -> Optional[List[BaseModel]]:
+        """Return a copy of a cached list, or None if missing or expired"""
+        with self._lock:
+            self._bind_scope()
+            entry = self._lists.get((resource, key))
+            if entry is None or self._expired(resource, entry[0]):
+                return None
+            return list(entry[1])
+
+    def peek_list(self, resource: str, key: Hashable = None) -> Optional[List[BaseModel]]:
+        """Return a copy of the stored list even if expired (to re-render after a local mutation)"""
+        with self._lock:
+            self._bind_scope()
+            entry = self._lists.get((resource, key))
+            return list(entry[1]) if entry else None
+
+    def get_detail(self, resource: str, item_id: Hashable) -> Optional[BaseModel]:
+        with self._lock:
+            self._bind_scope()
+            entry = self._details.get((resource, item_id))
+            if entry is None or self._expired(resource, entry[0]):
+                return None
+            return entry[1]
+
+    def peek_detail(self, resource: str, item_id: Hashable) -> Optional[BaseModel]:
+        """Return the stored detail even if expired (to re-render after a local mutation)"""
+        with self._lock:
+            self._bind_scope()
+            entry = self._details.get((resource, item_id))
+            return entry[1] if entry else None
+
+    def set_list(self, resource: str, key: Hashable, items: List[BaseModel]):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._bind_scope()
+            self._lists[(resource, key)] = (time.monotonic(), list(items))
+
+    def set_detail(self, resource: str, item_id: Hashable, item: BaseModel):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._bind_scope()
+            self._details[(resource, item_id)] = (time.monotonic(), item)
+
+    def cached_list(self, resource: str, key: Hashable, loader: Callable[[], List[BaseModel]]) -> List[BaseModel]:
+        """Return the cached list or load it and store it"""
+        cached = self.get_list(resource, key)
+        if cached is not None:
+            return cached
+        try:
+            items = loader()
+        except NetworkError:
+            stale = self._stale(self._lists, (resource, key))
+            if stale is None:
+                raise
+            logger.info(f"Serving stale {resource} list while the backend is unreachable")
+            return list(stale)
+        self.set_list(resource, key, items)
+        return list(items)
+
+    def cached_detail(self, resource: str, item_id: Hashable, loader: Callable[[], BaseModel]) -> BaseModel:
+        """Return the cached detail or load it and store it"""
+        cached = self.get_detail(resource, item_id)
+        if cached is not None:
+            return cached
+        try:
+            item = loader()
+        except NetworkError:
+            stale = self._stale(self._details, (resource, item_id))
+            if stale is None:
+                raise
+            logger.info(f"Serving stale {resource} detail while the backend is unreachable")
+            return stale
+        self.set_detail(resource, item_id, item)
+        return item
+
+    # Escritura directa tras mutaciones
+
+    def patch(self, resource: str, id_field: str, item_id: Any, changes: Dict[str, Any],
+              lists: bool = True, details: bool = True):
+        """Apply field changes to every cached copy of an item (lists and detail)"""
+        if not changes:
+            return
+        with self._lock:
+            self._bind_scope()
+            for cache_key, (stamp, items) in list(self._lists.items()):
+                if not lists or cache_key[0] != resource:
+                    continue
+                updated = [self._apply(item, changes) if getattr(item, id_field, None) == item_id else item
+                           for item in items]
+                if any(new is None for new in updated):
+                    del self._lists[cache_key]
+                else:
+                    self._lists[cache_key] = (stamp, updated)
+
+            detail_key = (resource, item_id)
+            if details and detail_key in self._details:
+                stamp, item = self._details[detail_key]
+                new_item = self._apply(item, changes)
+                if new_item is None:
+                    del self._details[detail_key]
+                else:
+                    self._details[detail_key] = (stamp, new_item)
+            self._touch(resource)
+        self._notify(resource)
+
+    def remove(self, resource: str, id_field: str, item_id: Any):
+        """Remove an item from every cached list and drop its detail"""
+        with self._lock:
+            self._bind_scope()
+            for cache_key, (stamp, items) in list(self._lists.items()):
+                if cache_key[0] == resource:
+                    self._lists[cache_key] = (stamp, [item for item in items
+                                                      if getattr(item, id_field, None) != item_id])
+            self._details.pop((resource, item_id), None)
+            self._touch(resource)
+        self._notify(resource)
+
+    def append(self, resource: str, key: Hashable, item: BaseModel):
+        """Append an item to a cached list (if that list is cached)"""
+        with self._lock:
+            self._bind_scope()
+            entry = self._lists.get((resource, key))
+            if entry is None:
+                return
+            self._lists[(resource, key)] = (entry[0], entry[1] + [item])
+            self._touch(resource)
+        self._notify(resource)
+
+    def invalidate(self, resource: str, key: Hashable = None, all_keys: bool = False):
+        """Drop a cached list (or every list of the resource) so it is fetched again"""
+        with self._lock:
+            if all_keys:
+                for cache_key in [k for k in self._lists if k[0] == resource]:
+                    del self._lists[cache_key]
+            else:
+                self._lists.pop((resource, key), None)
+
+    def invalidate_detail(self, resource: str, item_id: Hashable):
+        with self._lock:
+            self._details.pop((resource, item_id), None)
+
+    def clear(self):
+        with self._lock:
+            self._lists.clear()
+            self._details.clear()
+
+    def approx_bytes(self, sample: int = 20) -> int:
+        """Rough size of the cached models (lists are estimated from a sample of items)"""
+        with self._lock:
+            lists = [items for _, items in self._lists.values()]
+            details = [item for _, item in self._details.values()]
+        total = sum(self._model_bytes(item) for item in details)
+        for items in lists:
+            if items:
+                head = items[:sample]
+                total += sys.getsizeof(items) + sum(map(self._model_bytes, head)) * len(items) // len(head)
+        return total
+
+    @staticmethod
+    def _model_bytes(item: BaseModel) -> int:
+        fields = item.__dict__
+        return sys.getsizeof(item) + sys.getsizeof(fields) + sum(sys.getsizeof(v) for v in fields.values())
+
+    @staticmethod
+    def changes_from(model: BaseModel) -> Dict[str, Any]:
+        """Fields of an update model that will actually be sent (APIClient drops None values)"""
+        return {k: v for k, v in model.model_dump(exclude_unset=True).items() if v is not None}
+
+    # Actualizaciones optimistas
+
+    @contextmanager
+    def optimistic(self):
+        """
+        Apply cache mutations before the request finishes; undo them if it fails
+
+        Usage:
+            with cache.optimistic() as update:
+                cache.patch(...)
+                response = api.request(...)
+                if response.status_code != 200:
+                    update.rollback()
+        """
+        with self._lock:
+            snapshot = (dict(self._lists), dict(self._details))
+            update = OptimisticUpdate(self, snapshot)
+        previous = getattr(self._local, "update", None)
+        self._local.update = update
+        try:
+            yield update
+        except Exception:
+            update.rollback()
+            raise
+        finally:
+            self._local.update = previous
+
+    def _restore(self, snapshot, touched: set):
+        # Solo se restauran los recursos modificados en esta actualización
+        with self._lock:
+            for current, saved in ((self._lists, snapshot[0]), (self._details, snapshot[1])):
+                for cache_key in [k for k in current if k[0] in touched]:
+                    del current[cache_key]
+                current.update({k: v for k, v in saved.items() if k[0] in touched})
+        for resource in touched:
+            self._notify(resource)
+
+    # Suscripciones (las vistas se redibujan cuando cambia un recurso)
+
+    def subscribe(self, resource: str, listener: Listener) -> Callable[[], None]:
+        """Call listener(resource) whenever cached data of the resource changes"""
+        with self._lock:
+            self._listeners.setdefault(resource, []).append(listener)
+
+        def unsubscribe():
+            with self._lock:
+                listeners = self._listeners.get(resource, [])
+                if listener in listeners:
+                    listeners.remove(listener)
+        return unsubscribe
+
+    def _notify(self, resource: str):
+        with self._lock:
+            listeners = list(self._listeners.get(resource, []))
+        for listener in listeners:
+            try:
+                listener(resource)
+            except Exception as e:
+                logger.warning(f"Cache listener for {resource} failed: {str(e)}")
+
+    def _touch(self, resource: str):
+        update = getattr(self._local, "update", None)
+        if update is not None:
+            update._touched.add(resource)
+
+    def _bind_scope(self):
+        # Llamar con el lock: descarta lo cargado con otro usuario o permisos
+        if self._scope_of is None:
+            return
+        scope = self._scope_of()
+        if scope != self._scope:
+            if self._lists or self._details:
+                logger.debug("Cache scope changed, dropping cached entries")
+            self._lists.clear()
+            self._details.clear()
+            self._scope = scope
+
+    def _stale(self, entries: Dict, cache_key: Tuple[str, Hashable]):
+        """Expired entries stay until replaced: they are the offline fallback"""
+        with self._lock:
+            entry = entries.get(cache_key)
+            return entry[1] if entry else None
+
+    def _expired(self, resource: str, stamp: float) -> bool:
+        return time.monotonic() - stamp >= self.ttls.get(resource, self.ttl)
+
+    @staticmethod
+    def _apply(item: BaseModel, changes: Dict[str, Any]) -> Optional[BaseModel]:
+        """Return a validated copy of item with changes applied (None if it no longer validates)"""
+        fields = type(item).model_fields
+        relevant = {k: v for k, v in changes.items() if k in fields}
+        if not relevant:
+            return item
+        try:
+            return type(item).model_validate({**item.model_dump(), **relevant})
+        except PydanticValidationError as e:
+            logger.info(f"Could not patch cached {type(item).__name__}: {str(e)}")
+            return None
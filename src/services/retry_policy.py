@@ -0,0 +1,135 @@
+# services/retry_policy.py
+import logging
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, Iterable, Optional
+
+import httpx
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class RetryStats:
+    """Counters for the retry policy (shared by every request of a client)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.retries = 0
+        self.recovered = 0  # Peticiones que acabaron bien tras algún reintento
+        self.gave_up = 0
+        self.retry_after_used = 0
+        self.total_delay = 0.0
+
+    def add(self, **counters):
+        with self._lock:
+            for name, value in counters.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {k: v for k, v in self.__dict__.items() if not k.startswith("_")}
+
+
+class RetryPolicy:
+    """Retries transient failures of idempotent requests
+
+    Transport errors (timeouts, connection failures) and 429/502/503/504
+    responses are retried with exponential backoff and full jitter. A
+    Retry-After header on 429/503 replaces the computed delay. Each request
+    has a deadline, and the time spent sleeping is capped separately.
+    """
+
+    IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+    RETRY_STATUSES = frozenset({429, 502, 503, 504})
+    RETRY_AFTER_STATUSES = frozenset({429, 503})
+
+    def __init__(self, max_attempts: Optional[int] = None, base_delay: Optional[float] = None,
+                 max_delay: Optional[float] = None, max_total_delay: Optional[float] = None,
+                 deadline: Optional[float] = None, methods: Optional[Iterable[str]] = None,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.max_attempts = max_attempts or settings.RETRY_MAX_ATTEMPTS
+        self.base_delay = settings.RETRY_BASE_DELAY if base_delay is None else base_delay
+        self.max_delay = settings.RETRY_MAX_DELAY if max_delay is None else max_delay
+        self.max_total_delay = settings.RETRY_MAX_TOTAL_DELAY if max_total_delay is None else max_total_delay
+        self.deadline = settings.RETRY_DEADLINE if deadline is None else deadline
+        self.methods = frozenset(m.upper() for m in methods) if methods else self.IDEMPOTENT_METHODS
+        self.sleep = sleep
+        self.stats = RetryStats()
+
+    def can_retry(self, method: str, idempotent: Optional[bool] = None) -> bool:
+        """POST and friends are only retried when the caller marks them idempotent"""
+        if idempotent is not None:
+            return idempotent
+        return method.upper() in self.methods
+
+    def backoff(self, attempt: int) -> float:
+        """Full jitter: uniform between 0 and the exponential cap"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    @staticmethod
+    def retry_after(response: httpx.Response) -> Optional[float]:
+        """Seconds requested by a Retry-After header (delta-seconds or HTTP date)"""
+        value = response.headers.get("Retry-After")
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+    def run(self, method: str, send: Callable[[], httpx.Response],
+            idempotent: Optional[bool] = None, deadline: Optional[float] = None) -> httpx.Response:
+        """Call send() until it succeeds, stops being retryable or the budgets run out"""
+        retryable = self.can_retry(method, idempotent)
+        budget = self.deadline if deadline is None else deadline
+        expires_at = time.monotonic() + budget
+        slept = 0.0
+        attempt = 0
+        self.stats.add(requests=1)
+
+        while True:
+            error: Optional[Exception] = None
+            response: Optional[httpx.Response] = None
+            try:
+                response = send()
+            except (httpx.TimeoutException, httpx.NetworkError) as e:
+                error = e
+
+            if error is None and response.status_code not in self.RETRY_STATUSES:
+                if attempt:
+                    self.stats.add(recovered=1)
+                return response
+
+            attempt += 1
+            delay = self._delay(attempt, response)
+            if (not retryable or attempt >= self.max_attempts
+                    or slept + delay > self.max_total_delay
+                    or time.monotonic() + delay > expires_at):
+                if retryable:
+                    self.stats.add(gave_up=1)
+                if error is not None:
+                    raise error
+                return response
+
+            reason = type(error).__name__ if error is not None else f"HTTP {response.status_code}"
+            logger.info(f"Retrying {method} after {reason} (attempt {attempt + 1}, waiting {delay:.2f}s)")
+            self.stats.add(retries=1, total_delay=delay)
+            self.sleep(delay)
+            slept += delay
+
+    def _delay(self, attempt: int, response: Optional[httpx.Response]) -> float:
+        if response is not None and response.status_code in self.RETRY_AFTER_STATUSES:
+            requested = self.retry_after(response)
+            if requested is not None:
+                self.stats.add(retry_after_used=1)
+                return requested
+        return self.backoff(attempt - 1)
@@ -1,46 +1,75 @@
 # services/role_service.py
-from typing import List, Dict, Any
+from datetime import datetime
+from typing import List, Dict, Any, Optional
 from models.role import Role, UserRole
+from core.tracing import trace_methods
 from .api_client import APIClient
+from .resource_cache import ResourceCache
 
+@trace_methods
 class RoleService:
-    def __init__(self, api_client: APIClient):
+    def __init__(self, api_client: APIClient, cache: Optional[ResourceCache] = None):
         self.api = api_client
+        self.cache = cache or ResourceCache()
     
     def get_roles_list(self) -> List[Role]:
         """Get list of all available roles"""
-        response = self.api.request("GET", "/roles/roles_list")
-        return [Role(**role) for role in response.json()]
+        def load():
+            response = self.api.request("GET", "/roles/roles_list")
+            return self.api.parse_list(response, Role)
+        return self.cache.cached_list("roles", None, load)
     
     def get_user_roles(self, user_id: int) -> List[UserRole]:
         """Get roles assigned to a specific user"""
-        response = self.api.request(
-            "GET", 
-            "/roles/get_user_roles",
-            query_params={"user_id": user_id}
-        )
-        return [UserRole(**role) for role in response.json()]
+        def load():
+            response = self.api.request(
+                "GET", 
+                "/roles/get_user_roles",
+                query_params={"user_id": user_id}
+            )
+            return self.api.parse_list(response, UserRole)
+        return self.cache.cached_list("user_roles", user_id, load)
     
     def add_role_to_user(self, user_id: int, role_id: int) -> bool:
         """Add a role to a user"""
-        response = self.api.request(
-            "POST",
-            "/roles/add_role_to_user",
-            json_data={
-                "user_id": user_id,
-                "role_id": role_id
-            }
-        )
+        role = next((r for r in self.cache.peek_list("roles") or [] if r.id_rol == role_id), None)
+        with self.cache.optimistic() as update:
+            if role is not None:
+                self.cache.append("user_roles", user_id, UserRole(
+                    id_rol=role.id_rol,
+                    nombre=role.nombre,
+                    descripcion=role.descripcion,
+                    fecha_asignacion=datetime.now()
+                ))
+            else:
+                self.cache.invalidate("user_roles", user_id)
+            response = self.api.request(
+                "POST",
+                "/roles/add_role_to_user",
+                json_data={
+                    "user_id": user_id,
+                    "role_id": role_id
+                }
+            )
+            if response.status_code != 200:
+                update.rollback()
         return response.status_code == 200
     
     def remove_role_from_user(self, user_id: int, role_id: int) -> bool:
         """Remove a role from a user"""
-        response = self.api.request(
-            "DELETE",
-            "/roles/remove_role_from_user",
-            json_data={
-                "user_id": user_id,
-                "role_id": role_id
-            }
-        )
-        return response.status_code == 200
\ No newline at end of file
+        with self.cache.optimistic() as update:
+            # Solo la lista de ese usuario (id_rol se repite entre usuarios)
+            user_roles = self.cache.peek_list("user_roles", user_id)
+            if user_roles is not None:
+                self.cache.set_list("user_roles", user_id, [r for r in user_roles if r.id_rol != role_id])
+            response = self.api.request(
+                "DELETE",
+                "/roles/remove_role_from_user",
+                json_data={
+                    "user_id": user_id,
+                    "role_id": role_id
+                }
+            )
+            if response.status_code != 200:
+                update.rollback()
+        return response.status_code == 200
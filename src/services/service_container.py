@@ -10,25 +10,47 @@ from .event_service import EventService
 from .invoice_service import InvoiceService
 from .permission_service import PermissionService
 from .role_service import RoleService
+from .chunked_upload import ChunkedUploader, HTTPUploadProtocol, UploadJournal
+from .document_cache import DocumentCache
+from .batch_upload import BatchUploader
+from .resource_cache import ResourceCache
+from .outbox import MutationOutbox
 
 class ServiceContainer:
     """Dependency injection container for services"""
     
-    def __init__(self):
-        # Initialize API client
-        self.api_client = APIClient()
+    def __init__(self, transport=None):
+        # Initialize API client (transport: optional httpx transport, e.g. a stub backend)
+        self.api_client = APIClient(transport=transport)
+        self.metrics = self.api_client.metrics
+        
+        # Shared chunked uploader (one journal per user for invoices and documents)
+        self.uploader = ChunkedUploader(
+            HTTPUploadProtocol(self.api_client),
+            journal=UploadJournal(scope=self.api_client.cache_scope)
+        )
+        
+        # Local cache of downloaded invoices and accounting documents (per user, revalidated with ETag)
+        self.documents = DocumentCache(scope=self.api_client.cache_scope)
+        
+        # Session cache of lists and details (write-through on mutations), per user and permissions
+        self.cache = ResourceCache(scope=self.api_client.cache_scope)
+        
+        # Mutations made without connection, replayed in the background
+        self.outbox = MutationOutbox()
         
         # Initialize services
         self.auth = AuthService(self.api_client)
-        self.users = UserService(self.api_client)
-        self.economic = EconomicService(self.api_client)
-        self.accounting = AccountingService(self.api_client)
-        self.organizations = OrganizationService(self.api_client)
+        self.users = UserService(self.api_client, cache=self.cache)
+        self.economic = EconomicService(self.api_client, cache=self.cache, outbox=self.outbox)
+        self.accounting = AccountingService(self.api_client, uploader=self.uploader, documents=self.documents, cache=self.cache)
+        self.organizations = OrganizationService(self.api_client, cache=self.cache)
         self.home = HomeService(self.api_client)
-        self.events = EventService(self.api_client)
-        self.invoices = InvoiceService(self.api_client)
+        self.events = EventService(self.api_client, cache=self.cache)
+        self.invoices = InvoiceService(self.api_client, uploader=self.uploader, documents=self.documents, cache=self.cache)
         self.permissions = PermissionService(self.api_client)
-        self.roles = RoleService(self.api_client)
+        self.roles = RoleService(self.api_client, cache=self.cache)
+        self.batch_uploads = BatchUploader(self.accounting)
     
     def set_session_manager(self, session_manager):
         """Set session manager for token handling"""
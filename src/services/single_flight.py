@@ -0,0 +1,73 @@
+# services/single_flight.py
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from config.settings import settings
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Coalesces concurrent identical calls into one
+
+    The first caller for a key runs the function; callers arriving while it
+    is in flight wait and receive the same result (or the same exception).
+    Nothing is cached once the call finishes.
+
+    With ``share_errors=False`` (keys shared across users) only a successful
+    result is shared: if the leader fails, each waiter runs its own ``fn``
+    so an auth error from another user's token never reaches it.
+    """
+
+    def __init__(self, enabled: Optional[bool] = None):
+        self.enabled = settings.SINGLE_FLIGHT_ENABLED if enabled is None else enabled
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+        self.executed = 0
+        self.shared = 0  # Llamadas que reutilizaron una petición en curso
+
+    def do(self, key: Hashable, fn: Callable[[], Any], share_errors: bool = True) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.shared += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self.executed += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                if not share_errors:
+                    return fn()
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+        return call.result
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+
+# Compartido por todas las sesiones del proceso (las claves llevan el usuario y sus permisos)
+flights = SingleFlight()
@@ -0,0 +1,54 @@
+# services/timeout_profiles.py
+from fnmatch import fnmatchcase
+from typing import Dict, Optional
+
+import httpx
+
+from config.settings import settings
+
+DEFAULT_PROFILE = "default"
+
+
+class TimeoutProfiles:
+    """Resolves the httpx timeouts (connect/read/write/pool) for each endpoint
+
+    Profiles come from ``TIMEOUT_PROFILES``; endpoints are mapped to a profile
+    by the first matching pattern in ``TIMEOUT_ROUTES`` (fnmatch syntax).
+    Anything unmatched uses the ``default`` profile, built from API_TIMEOUT
+    unless overridden.
+    """
+
+    def __init__(self, profiles: Optional[Dict[str, Dict[str, float]]] = None,
+                 routes: Optional[Dict[str, str]] = None, default_timeout: Optional[float] = None):
+        default_timeout = settings.API_TIMEOUT if default_timeout is None else default_timeout
+        configured = settings.TIMEOUT_PROFILES if profiles is None else profiles
+        self.routes = dict(settings.TIMEOUT_ROUTES if routes is None else routes)
+
+        self.profiles: Dict[str, httpx.Timeout] = {DEFAULT_PROFILE: httpx.Timeout(default_timeout)}
+        for name, values in configured.items():
+            self.profiles[name] = httpx.Timeout(
+                default_timeout,
+                connect=values.get("connect", default_timeout),
+                read=values.get("read", default_timeout),
+                write=values.get("write", default_timeout),
+                pool=values.get("pool", default_timeout)
+            )
+        self._by_endpoint: Dict[str, str] = {}
+
+    def profile_for(self, endpoint: str) -> str:
+        """Name of the profile used for an endpoint path"""
+        name = self._by_endpoint.get(endpoint)
+        if name is None:
+            name = next(
+                (profile for pattern, profile in self.routes.items() if fnmatchcase(endpoint, pattern)),
+                DEFAULT_PROFILE
+            )
+            self._by_endpoint[endpoint] = name
+        return name
+
+    def timeout_for(self, endpoint: str, profile: Optional[str] = None) -> httpx.Timeout:
+        """Timeout for a request; an explicit profile wins over the endpoint patterns"""
+        name = profile or self.profile_for(endpoint)
+        if name not in self.profiles:
+            raise ValueError(f"Unknown timeout profile: {name}")
+        return self.profiles[name]
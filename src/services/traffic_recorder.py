@@ -0,0 +1,328 @@
+# services/traffic_recorder.py
+import atexit
+import base64
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Deque, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode
+
+import httpx
+import jwt
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+REDACTED = "REDACTED"
+_TEXT_TYPES = ("application/json", "text/", "application/x-www-form-urlencoded")
+
+# Una grabadora por fichero: todas las sesiones del proceso escriben en el mismo HAR
+_RECORDERS: Dict[str, "TrafficRecorder"] = {}
+_RECORDERS_GUARD = threading.Lock()
+
+
+def recorder_for(path: str, include_bodies: Optional[bool] = None) -> "TrafficRecorder":
+    path = os.path.abspath(path)
+    with _RECORDERS_GUARD:
+        recorder = _RECORDERS.get(path)
+        if recorder is None:
+            recorder = _RECORDERS[path] = TrafficRecorder(path, include_bodies)
+            atexit.register(recorder.save)
+        return recorder
+
+
+class Redactor:
+    """Hides secrets in URLs, headers and JSON bodies before they are written
+
+    Values of keys ending with any of ``TRAFFIC_REDACT_KEYS`` are replaced
+    (``access_token`` and ``Set-Cookie`` are, ``token_type`` is not).
+    JWTs keep their header and claims (the app reads them without checking
+    the signature, so a replay can still log in) but lose the signature.
+    """
+
+    def __init__(self, keys: Optional[str] = None):
+        keys = settings.TRAFFIC_REDACT_KEYS if keys is None else keys
+        self.keys = tuple(key.strip().lower() for key in keys.split(",") if key.strip())
+
+    def is_secret(self, name: str) -> bool:
+        return name.lower().endswith(self.keys)
+
+    def value(self, value: Any) -> Any:
+        if isinstance(value, str) and value.count(".") == 2 and value.startswith("eyJ"):
+            header, claims, _ = value.split(".")
+            return f"{header}.{claims}.{REDACTED}"
+        return REDACTED
+
+    def pairs(self, pairs: List[Tuple[str, str]]) -> List[Tuple[str, str]]:
+        return [(name, self.value(value) if self.is_secret(name) else value) for name, value in pairs]
+
+    def data(self, data: Any) -> Any:
+        if isinstance(data, dict):
+            return {key: self.value(value) if self.is_secret(key) and value is not None else self.data(value)
+                    for key, value in data.items()}
+        if isinstance(data, list):
+            return [self.data(item) for item in data]
+        return data
+
+    def url(self, url: httpx.URL) -> str:
+        query = self.pairs(parse_qsl(url.query.decode(), keep_blank_values=True))
+        return str(url.copy_with(query=urlencode(query).encode() if query else None))
+
+
+class TrafficRecorder:
+    """Collects requests and responses and writes them as a HAR 1.2 file
+
+    Each entry is appended to ``<path>.jsonl`` as soon as it is recorded
+    (flushed every ``TRAFFIC_RECORD_FLUSH_EVERY`` entries), so nothing piles
+    up in memory; ``save()`` streams those lines into the HAR file. Bodies
+    are only stored with ``include_bodies`` (``TRAFFIC_RECORD_BODIES``);
+    sizes and timings always are.
+    """
+
+    def __init__(self, path: str, include_bodies: Optional[bool] = None, redactor: Optional[Redactor] = None):
+        self.path = os.path.abspath(path)
+        self.lines_path = f"{self.path}.jsonl"
+        self.include_bodies = settings.TRAFFIC_RECORD_BODIES if include_bodies is None else include_bodies
+        self.redactor = redactor or Redactor()
+        self.flush_every = settings.TRAFFIC_RECORD_FLUSH_EVERY
+        self.count = 0
+        self._unflushed = 0
+        self._file = None
+        self._lock = threading.Lock()  # Solo para añadir una línea al fichero
+        self._save_lock = threading.Lock()
+
+    def record(self, request: httpx.Request, response: httpx.Response, started: float,
+               wait: float, receive: float):
+        """Add one exchange (``wait``: until the headers arrived, ``receive``: reading the body)"""
+        entry = {
+            "startedDateTime": datetime.fromtimestamp(started, timezone.utc).isoformat(),
+            "time": (wait + receive) * 1000,
+            "request": self._request(request),
+            "response": self._response(response),
+            "cache": {},
+            "timings": {"send": 0, "wait": wait * 1000, "receive": receive * 1000},
+            "_endpoint": f"{request.method} {request.url.path}",
+        }
+        line = json.dumps(entry, ensure_ascii=False) + "\n"  # Serializado fuera del lock
+        with self._lock:
+            if self._file is None:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                self._file = open(self.lines_path, "w", encoding="utf-8")
+            self._file.write(line)
+            self.count += 1
+            self._unflushed += 1
+            if self._unflushed >= self.flush_every:
+                self._file.flush()
+                self._unflushed = 0
+
+    def save(self):
+        """Write the HAR file with every entry recorded so far"""
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+                self._unflushed = 0
+            size = self._file.tell() if self._file is not None else 0
+        # La conversión lee el .jsonl hasta donde estaba escrito; las peticiones siguen grabándose
+        with self._save_lock:
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as har:
+                har.write('{"log": {"version": "1.2", "creator": ')
+                har.write(json.dumps({"name": "FrontendFletSatanica", "version": settings.APP_VERSION}))
+                har.write(', "entries": [')
+                if size:
+                    with open(self.lines_path, "r", encoding="utf-8") as lines:
+                        remaining = size
+                        first = True
+                        for line in lines:
+                            remaining -= len(line.encode("utf-8"))
+                            if remaining < 0:
+                                break  # Línea a medias escrita después del flush
+                            har.write(("" if first else ",\n") + line.rstrip("\n"))
+                            first = False
+                har.write("]}}\n")
+            os.replace(tmp_path, self.path)
+
+    def _request(self, request: httpx.Request) -> Dict[str, Any]:
+        body = request.content if isinstance(request.stream, httpx.ByteStream) else b""
+        data = {
+            "method": request.method,
+            "url": self.redactor.url(request.url),
+            "httpVersion": "HTTP/1.1",
+            "headers": self._headers(request.headers),
+            "queryString": [{"name": name, "value": value} for name, value in
+                            self.redactor.pairs(parse_qsl(request.url.query.decode(), keep_blank_values=True))],
+            "cookies": [],
+            "headersSize": -1,
+            "bodySize": len(body),
+        }
+        content_type = request.headers.get("Content-Type", "")
+        if body and self.include_bodies and request.headers.get("Content-Encoding") is None:
+            text = self._text(body, content_type)
+            if text is not None:
+                data["postData"] = {"mimeType": content_type, "text": text}
+        return data
+
+    def _response(self, response: httpx.Response) -> Dict[str, Any]:
+        body = response.content
+        content_type = response.headers.get("Content-Type", "")
+        content: Dict[str, Any] = {"size": len(body), "mimeType": content_type}
+        if self.include_bodies and body:
+            text = self._text(body, content_type)
+            if text is not None:
+                content["text"] = text
+            else:
+                content["text"] = base64.b64encode(body).decode()
+                content["encoding"] = "base64"
+        return {
+            "status": response.status_code,
+            "statusText": response.reason_phrase,
+            "httpVersion": response.http_version,
+            # Cuerpo ya descomprimido: sin Content-Encoding/Length para que la reproducción sea coherente
+            "headers": self._headers(response.headers, skip=("content-encoding", "content-length")),
+            "cookies": [],
+            "content": content,
+            "redirectURL": response.headers.get("Location", ""),
+            "headersSize": -1,
+            "bodySize": response.num_bytes_downloaded or int(response.headers.get("Content-Length") or len(body)),
+        }
+
+    def _headers(self, headers: httpx.Headers, skip: Tuple[str, ...] = ()) -> List[Dict[str, str]]:
+        return [{"name": name, "value": value} for name, value in self.redactor.pairs(headers.multi_items())
+                if name.lower() not in skip]
+
+    def _text(self, body: bytes, content_type: str) -> Optional[str]:
+        if not content_type.startswith(_TEXT_TYPES):
+            return None
+        if content_type.startswith("application/json"):
+            try:
+                return json.dumps(self.redactor.data(json.loads(body)), ensure_ascii=False)
+            except ValueError:
+                pass
+        elif content_type.startswith("application/x-www-form-urlencoded"):
+            return urlencode(self.redactor.pairs(parse_qsl(body.decode(errors="replace"))))
+        return body.decode(errors="replace")
+
+
+class RecordingTransport(httpx.BaseTransport):
+    """Transport that sends through ``inner`` and records every exchange
+
+    ``inner`` is kept open across requests (APIClient opens a Client per
+    request and closing it would drop the connection pool).
+    """
+
+    def __init__(self, recorder: TrafficRecorder, inner: Optional[httpx.BaseTransport] = None):
+        self.recorder = recorder
+        self.wrapped = inner  # Transporte que había antes de grabar (None: el de httpx)
+        self.inner = inner or httpx.HTTPTransport()
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        started = time.time()
+        start = time.perf_counter()
+        response = self.inner.handle_request(request)
+        headers_at = time.perf_counter()
+        response.read()
+        done = time.perf_counter()
+        try:
+            self.recorder.record(request, response, started, headers_at - start, done - headers_at)
+        except Exception as e:
+            logger.warning(f"Could not record {request.method} {request.url.path}: {str(e)}")
+        return response
+
+    def close(self):
+        pass
+
+
+class ReplayTransport(httpx.BaseTransport):
+    """Serves a recorded HAR file back without a network
+
+    Requests are matched by method, path and query string (the token
+    parameter ignored). Repeated requests get the recorded responses in
+    order; the last one is repeated when they run out. Unknown requests get
+    a 404, or raise with ``strict``. ``latency``: ``"recorded"`` sleeps the
+    recorded time of each exchange, a number sleeps that many seconds.
+    Tokens in login/refresh bodies are re-signed with a fresh ``exp`` so the
+    session of the recording is accepted again.
+    """
+
+    IGNORED_PARAMS = ("token",)
+
+    def __init__(self, path: str, latency: Any = 0.0, strict: bool = False):
+        self.path = path
+        self.latency = latency
+        self.strict = strict
+        self.requests = 0
+        self.misses: List[str] = []
+        self._entries: Dict[Tuple[str, str, tuple], Deque[Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+        with open(path, encoding="utf-8") as f:
+            for entry in json.load(f)["log"]["entries"]:
+                request = entry["request"]
+                url = httpx.URL(request["url"])
+                self._entries.setdefault(self._key(request["method"], url), deque()).append(entry)
+
+    def _key(self, method: str, url: httpx.URL) -> Tuple[str, str, tuple]:
+        query = tuple(sorted((name, value) for name, value in parse_qsl(url.query.decode(), keep_blank_values=True)
+                             if name not in self.IGNORED_PARAMS))
+        return method.upper(), url.path, query
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        return self.handle_request(request)
+
+    def transport(self) -> "ReplayTransport":
+        # Misma interfaz que el backend simulado de los benchmarks
+        return self
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        key = self._key(request.method, request.url)
+        with self._lock:
+            self.requests += 1
+            queue = self._entries.get(key)
+            if not queue:
+                self.misses.append(f"{request.method} {request.url.path}")
+                entry = None
+            else:
+                entry = queue.popleft() if len(queue) > 1 else queue[0]
+        if entry is None:
+            if self.strict:
+                raise httpx.ConnectError(f"Not recorded: {request.method} {request.url}", request=request)
+            return httpx.Response(404, json={"detail": "Not recorded"}, request=request)
+
+        if self.latency == "recorded":
+            time.sleep(entry.get("time", 0) / 1000)
+        elif self.latency:
+            time.sleep(float(self.latency))
+
+        recorded = entry["response"]
+        content = recorded.get("content", {})
+        body = b""
+        if "text" in content:
+            body = (base64.b64decode(content["text"]) if content.get("encoding") == "base64"
+                    else content["text"].encode("utf-8"))
+            if content.get("mimeType", "").startswith("application/json"):
+                body = self._fresh_tokens(body)
+        headers = [(h["name"], h["value"]) for h in recorded.get("headers", [])
+                   if h["name"].lower() not in ("content-encoding", "content-length", "transfer-encoding")]
+        return httpx.Response(recorded["status"], headers=headers, content=body, request=request)
+
+    @staticmethod
+    def _fresh_tokens(body: bytes) -> bytes:
+        try:
+            data = json.loads(body)
+        except ValueError:
+            return body
+        if not isinstance(data, dict) or not isinstance(data.get("access_token"), str):
+            return body
+        try:
+            claims = jwt.decode(data["access_token"], options={"verify_signature": False})
+        except jwt.PyJWTError:
+            return body
+        claims["exp"] = int(time.time()) + 3600
+        data["access_token"] = jwt.encode(claims, "replay", algorithm="HS256")
+        return json.dumps(data).encode()
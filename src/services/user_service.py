@@ -1,77 +1,147 @@
 # services/user_service.py
-from typing import List, Optional, Dict
+from typing import Any, List, Optional, Dict
+from config.constants import UserStatus, CREStatus, RGCREStatus
 from models.user import (
     UserShortView, 
     UserDetail, 
     UserCreate, 
     UserUpdate
 )
+from models.common import CreatedResource
+from core.tracing import trace_methods
 from .api_client import APIClient
+from .resource_cache import ResourceCache
 
+# Campos de UserUpdate (API) -> campos de UserShortView / UserDetail
+_USER_FIELD_MAP = {
+    "nombre": "name",
+    "apellidos": "surname",
+    "nif_nie": "nif_nie",
+    "email": "email",
+    "telefono": "phone",
+    "fecha_nacimiento": "birth_date",
+    "domicilio": "address",
+    "poblacion": "city",
+    "numero_ss": "social_security",
+    "titular_cuenta": "account_holder",
+    "iban": "iban",
+    "nombre_progenitor1": "parent1_name",
+    "nombre_progenitor2": "parent2_name",
+    "nif_nie_progenitor1": "parent1_id",
+    "nif_nie_progenitor2": "parent2_id",
+    "telefono_progenitor1": "parent1_phone",
+    "telefono_progenitor2": "parent2_phone",
+    "email_progenitor1": "parent1_email",
+    "email_progenitor2": "parent2_email",
+    "consideraciones": "notes",
+}
+
+# El listado devuelve los indicadores por nombre y el detalle por ID
+_STATUS_NAMES = {
+    int(status_id.value): name.value
+    for status_id, name in (
+        (UserStatus.ACTIVE_ID, UserStatus.ACTIVE),
+        (UserStatus.INACTIVE_ID, UserStatus.INACTIVE),
+        (CREStatus.COMPLETE_ID, CREStatus.COMPLETE),
+        (CREStatus.INCOMPLETE_ID, CREStatus.INCOMPLETE),
+        (RGCREStatus.COMPLETE_ID, RGCREStatus.COMPLETE),
+        (RGCREStatus.INCOMPLETE_ID, RGCREStatus.INCOMPLETE),
+    )
+}
+
+@trace_methods
 class UserService:
-    def __init__(self, api_client: APIClient):
+    def __init__(self, api_client: APIClient, cache: Optional[ResourceCache] = None):
         self.api = api_client
+        self.cache = cache or ResourceCache()
     
     def get_users_list(self) -> List[UserShortView]:
         """Get list of all users"""
-        response = self.api.request("GET", "/user/users_list")
-        return [UserShortView(**user) for user in response.json()]
+        def load():
+            response = self.api.request("GET", "/user/users_list")
+            return self.api.parse_list(response, UserShortView)
+        return self.cache.cached_list("users", None, load)
     
     def get_user_details(self, user_id: int) -> UserDetail:
         """Get detailed information about a specific user"""
-        response = self.api.request(
-            "GET", 
-            "/user/user_details",
-            query_params={"user_request_id": user_id}
-        )
-        return UserDetail(**response.json())
+        def load():
+            response = self.api.request(
+                "GET", 
+                "/user/user_details",
+                query_params={"user_request_id": user_id}
+            )
+            return self.api.parse_model(response, UserDetail)
+        return self.cache.cached_detail("users", user_id, load)
     
-    def create_user(self, user_data: UserCreate) -> bool:
-        """Create a new user"""
+    def create_user(self, user_data: UserCreate) -> CreatedResource:
+        """Create a new user and return its ID"""
         response = self.api.request(
             "POST",
             "/user/create_user",
             json_data=user_data
         )
-        return response.status_code == 201
+        self.cache.invalidate("users")
+        return self.api.parse_created(response, "id_user", "id_usuario")
     
     def update_user(self, user_data: UserUpdate) -> bool:
         """Update existing user"""
-        response = self.api.request(
-            "POST",
-            "/user/user_update",
-            json_data=user_data
-        )
-        return response.status_code == 200
+        return self._update_user(user_data.id_usuario, self.cache.changes_from(user_data), user_data)
     
     def delete_user(self, user_id: int) -> bool:
         """Delete a user (admin only)"""
-        response = self.api.request(
-            "DELETE",
-            "/user/delete_user",
-            query_params={"user_id_to_delete": user_id}
-        )
+        with self.cache.optimistic() as update:
+            self.cache.remove("users", "id_user", user_id)
+            response = self.api.request(
+                "DELETE",
+                "/user/delete_user",
+                query_params={"user_id_to_delete": user_id}
+            )
+            if response.status_code != 200:
+                update.rollback()
         return response.status_code == 200
     
     def deactivate_user(self, user_id: int) -> bool:
         """Deactivate a user"""
-        response = self.api.request(
-            "POST",
-            "/user/deactivate_user",
-            query_params={"user_id_to_deactivate": user_id}
-        )
+        with self.cache.optimistic() as update:
+            self._patch_cached_user(user_id, {"ind_estado": int(UserStatus.INACTIVE_ID.value)})
+            response = self.api.request(
+                "POST",
+                "/user/deactivate_user",
+                query_params={"user_id_to_deactivate": user_id}
+            )
+            if response.status_code != 200:
+                update.rollback()
         return response.status_code == 200
     
     def activate_user(self, user_id: int) -> bool:
         """Activate a user"""
-        response = self.api.request(
-            "POST",
-            "/user/user_update",
-            json_data={"ind_estado": 1, "id_usuario": user_id}
-        )
-        return response.status_code == 200
+        return self._update_user(user_id, {"ind_estado": 1}, {"ind_estado": 1, "id_usuario": user_id})
     
     def create_user_link(self) -> Dict[str, str]:
         """Generate invitation link for user registration"""
         response = self.api.request("POST", "/user/create_user_link")
-        return response.json()
\ No newline at end of file
+        return self.api.json(response)
+    
+    def _update_user(self, user_id: int, changes: Dict[str, Any], payload) -> bool:
+        with self.cache.optimistic() as update:
+            self._patch_cached_user(user_id, changes)
+            response = self.api.request(
+                "POST",
+                "/user/user_update",
+                json_data=payload
+            )
+            if response.status_code != 200:
+                update.rollback()
+        return response.status_code == 200
+    
+    def _patch_cached_user(self, user_id: int, changes: Dict[str, Any]):
+        """Translate API field names to the list/detail models and patch the cache"""
+        cached_changes = {_USER_FIELD_MAP[k]: v for k, v in changes.items() if k in _USER_FIELD_MAP}
+        
+        # Indicadores: el detalle guarda el ID ("1") y el listado el nombre ("usuario_activo")
+        status_changes = {k: int(v) for k, v in changes.items() if k in ("ind_estado", "ind_cre", "ind_rgcre")}
+        detail_changes = {**cached_changes, **{k: str(v) for k, v in status_changes.items()}}
+        list_changes = {**cached_changes, **{k: _STATUS_NAMES.get(v) for k, v in status_changes.items()}}
+        
+        self.cache.patch("users", "id_user", user_id, detail_changes, lists=False)
+        self.cache.patch("users", "id_user", user_id, list_changes, details=False)
@@ -70,15 +70,15 @@ def show_info_message(page: ft.Page, message: str):
 
 def check_permission(services: ServiceContainer, permission: Permissions) -> bool:
     """Verificar si el usuario tiene un permiso específico"""
-    return services.permissions.has_permission(permission.value)
+    return services.permissions.has_permission(permission)
 
 def check_any_permission(services: ServiceContainer, permissions: List[Permissions]) -> bool:
     """Verificar si el usuario tiene al menos uno de los permisos"""
-    return services.permissions.has_any_permission([perm.value for perm in permissions])
+    return services.permissions.has_any_permission(permissions)
 
 def check_all_permissions(services: ServiceContainer, permissions: List[Permissions]) -> bool:
     """Verificar si el usuario tiene todos los permisos"""
-    return services.permissions.has_all_permissions([perm.value for perm in permissions])
+    return services.permissions.has_all_permissions(permissions)
 
 """ Ejemplo:
 # En cualquier vista donde necesites verificar permisos
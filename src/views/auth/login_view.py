@@ -114,6 +114,7 @@ class LoginView(BaseView):
                 
                 # Set token in API client
                 self.services.api_client.set_token(result.access_token)
+                self.router.start_session_tasks()
 
                 self.safe_api_call(
                     lambda: self.services.permissions.load_user_permissions(),
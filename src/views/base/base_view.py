@@ -3,10 +3,16 @@ from abc import ABC, abstractmethod
 from typing import Any, Dict, Optional
 import flet as ft
 from core.navigation import NavigationMixin
+from core.overlay_manager import overlays_for
+from core.tracing import tracer
 from core.exceptions import APIError, AuthenticationError, NetworkError
 from utils.helpers import show_error_message, show_success_message, show_info_message
 
 
+# Resultado de call_or_queue cuando el cambio queda en la outbox
+QUEUED_OFFLINE = object()
+
+
 class LoadingMixin:
     """Mixin for loading state management"""
     
@@ -71,6 +77,8 @@ class BaseView(ABC, NavigationMixin, LoadingMixin, ErrorHandlingMixin):
         self.services = services
         self.session_manager = session_manager
         self.kwargs = kwargs
+        self._unsubscribers = []
+        self.overlays = overlays_for(page)
         
         # Clear any existing floating action button
         self.page.floating_action_button = None
@@ -80,6 +88,19 @@ class BaseView(ABC, NavigationMixin, LoadingMixin, ErrorHandlingMixin):
         """Each view must implement this method"""
         pass
     
+    def dispose(self):
+        """Release cache subscriptions and pickers when the router leaves this view"""
+        for unsubscribe in self._unsubscribers:
+            unsubscribe()
+        self._unsubscribers = []
+        self.overlays.release(self, update=False)
+    
+    def watch_resource(self, resource: str, callback):
+        """Call callback() whenever cached data of a resource changes while the view is shown"""
+        self._unsubscribers.append(
+            self.services.cache.subscribe(resource, lambda _resource: callback())
+        )
+    
     def setup_page_config(self, title: str):
         """Setup basic page configuration"""
         self.setup_navigation(title)
@@ -90,7 +111,8 @@ class BaseView(ABC, NavigationMixin, LoadingMixin, ErrorHandlingMixin):
         """Safely execute API call with error handling and loading states"""
         try:
             #self.show_loading(loading_message)
-            result = api_call()
+            with tracer.span("safe_api_call", message=loading_message):
+                result = api_call()
             
             if success_message:
                 show_success_message(self.page, success_message)
@@ -104,3 +126,22 @@ class BaseView(ABC, NavigationMixin, LoadingMixin, ErrorHandlingMixin):
             pass
              
         return result
+    
+    def call_or_queue(self, api_call, queue_call, loading_message: str = "Guardando..."):
+        """
+        Run a mutation; if the server cannot be reached, queue_call() stores it
+        in the outbox for a background replay
+        
+        Returns the result of api_call, QUEUED_OFFLINE, or None after showing the error.
+        """
+        try:
+            with tracer.span("safe_api_call", message=loading_message):
+                return api_call()
+        except NetworkError as e:
+            if queue_call():
+                show_info_message(self.page, "Sin conexión: el cambio se enviará automáticamente al recuperar la conexión")
+                return QUEUED_OFFLINE
+            self.handle_error(e)
+        except Exception as e:
+            self.handle_error(e)
+        return None
@@ -51,10 +51,10 @@ class FilterMixin:
     
     def _show_date_picker(self, key: str, callback: Callable = None):
         """Show date picker for date filters"""
-        date_picker = ft.DatePicker(
+        date_picker = self.overlays.date_picker(
+            self, f"filter:{key}",
             on_change=lambda e: self._handle_date_selection(key, e.control.value, callback)
         )
-        self.page.overlay.append(date_picker)
         date_picker.pick_date()
         self.page.update()
     
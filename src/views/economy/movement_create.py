@@ -2,7 +2,8 @@
 import flet as ft
 from datetime import datetime
 from typing import List, Optional
-from views.base.base_view import BaseView
+from views.base.base_view import BaseView, QUEUED_OFFLINE
+from services.outbox import new_idempotency_key
 from models.economic import EconomicMovementCreate, CategoriaSubvencion
 from config.constants import Routes, MovementType, CashBoxState
 from utils.helpers import format_currency, create_responsive_columns, show_error_message, show_success_message
@@ -422,15 +423,25 @@ class MovementCreateView(BaseView):
                 ind_mov_caja=int(self.caja_dropdown.value)
             )
             
-            # Create movement
-            success = self.safe_api_call(
-                lambda: self.services.economic.create_movement(create_data),
+            # Create movement (sin conexión queda en la outbox con la misma clave)
+            key = new_idempotency_key()
+            success = self.call_or_queue(
+                lambda: self.services.economic.create_movement(create_data, key),
+                lambda: self.services.economic.queue_create_movement(create_data, key),
                 loading_message="Creando movimiento..."
             )
             
-            if success:
-                show_success_message(self.page, "Movimiento creado correctamente")
+            if success is QUEUED_OFFLINE:
                 self.router.navigate_to(Routes.ECONOMY_MOVEMENTS)
+            elif success:
+                show_success_message(self.page, "Movimiento creado correctamente")
+                if success.id is not None:
+                    # Ir directamente al detalle para añadir facturas y documentos
+                    self.page.session.set("selected_economy_movement_id", success.id)
+                    self.page.session.set("edit_mode", False)
+                    self.router.navigate_to(Routes.ECONOMY_MOVEMENT_DETAIL)
+                else:
+                    self.router.navigate_to(Routes.ECONOMY_MOVEMENTS)
             
         except ValueError:
             show_error_message(self.page, "Error en el formato de los datos")
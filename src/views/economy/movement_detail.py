@@ -2,13 +2,17 @@
 import flet as ft
 from datetime import datetime, date
 from typing import List, Optional
-from views.base.base_view import BaseView
+from views.base.base_view import BaseView, QUEUED_OFFLINE
+from services.outbox import new_idempotency_key
 from models.economic import EconomicMovementDetail, EconomicMovementUpdate, CategoriaSubvencion
 from models.invoice import FacturaListItem
 from models.accounting_docs import DocsContablesListItem
 from config.constants import Routes, MovementType, MovementState, CashBoxState, InvoiceComputable
 from utils.helpers import format_currency, format_datetime, create_responsive_columns, show_error_message, show_success_message
+from services.batch_upload import BatchUploadItem
 import os
+import threading
+import time
 
 
 class MovementDetailView(BaseView):
@@ -57,6 +61,10 @@ class MovementDetailView(BaseView):
         self.setup_page_config("Detalle Movimiento")
         self._load_initial_data()
         self._setup_content()
+        
+        # Redibujar al cambiar la caché (borrados/ediciones, incluso si luego se deshacen)
+        self.watch_resource("invoices", self._on_invoices_changed)
+        self.watch_resource("accounting_docs", self._on_docs_changed)
 
     def _load_initial_data(self):
         """Load movement details and related data"""
@@ -90,6 +98,19 @@ class MovementDetailView(BaseView):
         self._load_invoices()
         self._load_accounting_docs()
 
+    def _refresh_movement_from_cache(self):
+        """After saving: take the movement from the patched cache instead of requesting it again"""
+        movement = self.services.cache.peek_detail("movements", self.movement_id)
+        if movement is None:
+            self._load_initial_data()
+            return
+        previous_event = self.movement.id_evento if self.movement else None
+        self.movement = movement
+        if movement.id_evento != previous_event:
+            self._load_event_year()
+            self.selected_event_year = self.event_year_from_api or movement.ano_ejercicio
+            self._load_events()
+
     def _load_event_year(self):
         """Load the actual year of the event from the API"""
         if self.movement and self.movement.id_evento:
@@ -136,6 +157,24 @@ class MovementDetailView(BaseView):
         )
         self.accounting_docs = result or []
 
+    def _on_invoices_changed(self):
+        """Re-render invoices from the cache after a local mutation"""
+        invoices = self.services.cache.peek_list("invoices", self.movement_id)
+        if invoices is None or self.invoices_container is None:
+            return
+        self.invoices = invoices
+        self._update_invoices_display()
+        self.page.update()
+
+    def _on_docs_changed(self):
+        """Re-render accounting documents from the cache after a local mutation"""
+        docs = self.services.cache.peek_list("accounting_docs", self.movement_id)
+        if docs is None or self.docs_container is None:
+            return
+        self.accounting_docs = docs
+        self._update_docs_display()
+        self.page.update()
+
     def _setup_content(self):
         """Setup the main content"""
         if not self.movement:
@@ -841,15 +880,18 @@ class MovementDetailView(BaseView):
             # Solo incluir campos que han cambiado
             # (puedes mantener tu lógica actual de comparación si lo prefieres)
             
-            # Save changes
-            success = self.safe_api_call(
-                lambda: self.services.economic.update_movement(self.movement_id, update_data),
+            # Save changes (sin conexión quedan en la outbox con la misma clave)
+            key = new_idempotency_key()
+            success = self.call_or_queue(
+                lambda: self.services.economic.update_movement(self.movement_id, update_data, key),
+                lambda: self.services.economic.queue_update_movement(self.movement_id, update_data, key),
                 loading_message="Guardando cambios..."
             )
             
             if success:
-                show_success_message(self.page, "Movimiento actualizado correctamente")
-                self._load_initial_data()  # Esto actualizará self.movement con los nuevos valores
+                if success is not QUEUED_OFFLINE:
+                    show_success_message(self.page, "Movimiento actualizado correctamente")
+                self._refresh_movement_from_cache()
                 self.page.clean()
                 self._setup_content()
             
@@ -924,6 +966,20 @@ class MovementDetailView(BaseView):
         selected_emisor_name = ft.Text("", size=12, color=ft.Colors.GREY_600)
         selected_beneficiario_name = ft.Text("", size=12, color=ft.Colors.GREY_600)
         selected_file_name = ft.Text("Ningún archivo seleccionado", size=12, color=ft.Colors.GREY_600)
+        upload_progress_bar = ft.ProgressBar(value=0, width=400, visible=False)
+        upload_progress_text = ft.Text("", size=12, color=ft.Colors.GREY_600, visible=False)
+
+        def on_upload_progress(progress):
+            upload_progress_bar.visible = True
+            upload_progress_text.visible = True
+            upload_progress_bar.value = progress.fraction
+            status = f"Subiendo archivo... {progress.percent}%"
+            if progress.resumed:
+                status += " (reanudado)"
+            if progress.retries:
+                status += f" - reintentos: {progress.retries}"
+            upload_progress_text.value = status
+            self.page.update()
 
         # Create form fields for invoice
         nombre_field = ft.TextField(
@@ -980,17 +1036,11 @@ class MovementDetailView(BaseView):
                 fecha_button.text = "Seleccionar fecha de emisión"
             self.page.update()
 
-        date_picker = ft.DatePicker(
-            first_date=date(2020, 1, 1),
-            last_date=date(2030, 12, 31),
-            on_change=_change_invoice_date_text
-        )
-        self.page.overlay.append(date_picker)
-        
+        # Selectores reutilizados entre aperturas del diálogo
+        date_picker = self.overlays.date_picker(self, "invoice_date", on_change=_change_invoice_date_text)
         
         # File picker for invoice file
-        file_picker = ft.FilePicker()
-        self.page.overlay.append(file_picker)
+        file_picker = self.overlays.file_picker(self, "invoice_file")
         
         file_button = ft.ElevatedButton(
             text="Seleccionar archivo de factura",
@@ -1193,6 +1243,12 @@ class MovementDetailView(BaseView):
         
         # Función para guardar la factura
         def save_invoice(e):
+            # La subida del archivo (con sus reintentos) no bloquea el hilo del evento
+            save_button.disabled = True
+            self.page.update()
+            threading.Thread(target=save_invoice_task, daemon=True).start()
+        
+        def save_invoice_task():
             try:
                 # Validar campos obligatorios
                 if not nombre_field.value:  # ← NUEVA VALIDACIÓN
@@ -1251,7 +1307,9 @@ class MovementDetailView(BaseView):
                     # Si hay un nuevo archivo, actualizarlo
                     if success and selected_file:
                         success_file = self.safe_api_call(
-                            lambda: self.services.invoices.update_invoice_file(invoice_id, selected_file.path),
+                            lambda: self.services.invoices.update_invoice_file(
+                                invoice_id, selected_file.path, on_progress=on_upload_progress
+                            ),
                             loading_message="Subiendo archivo de factura..."
                         )
                         if not success_file:
@@ -1277,17 +1335,21 @@ class MovementDetailView(BaseView):
                     
                     # Si la factura se creó correctamente, subir el archivo
                     if success and selected_file:
-                        # Obtener el ID de la factura recién creada
-                        invoices = self.safe_api_call(
-                            lambda: self.services.invoices.get_invoices_by_movement(movement_id),
-                            loading_message="Obteniendo facturas..."
-                        )
+                        new_invoice_id = success.id
+                        if new_invoice_id is None:
+                            # El backend no devolvió el ID: buscar la factura más reciente
+                            invoices = self.safe_api_call(
+                                lambda: self.services.invoices.get_invoices_by_movement(movement_id),
+                                loading_message="Obteniendo facturas..."
+                            )
+                            if invoices:
+                                new_invoice_id = max(invoices, key=lambda x: x.id_factura).id_factura
                         
-                        if invoices:
-                            # Encontrar la factura más reciente (asumimos que es la que acabamos de crear)
-                            new_invoice = max(invoices, key=lambda x: x.id_factura)
+                        if new_invoice_id is not None:
                             success_file = self.safe_api_call(
-                                lambda: self.services.invoices.update_invoice_file(new_invoice.id_factura, selected_file.path),
+                                lambda: self.services.invoices.update_invoice_file(
+                                    new_invoice_id, selected_file.path, on_progress=on_upload_progress
+                                ),
                                 loading_message="Subiendo archivo de factura..."
                             )
                             
@@ -1297,8 +1359,11 @@ class MovementDetailView(BaseView):
                 if success:
                     action = "actualizada" if is_edit else "creada"
                     show_success_message(self.page, f"Factura {action} correctamente")
-                    self._load_invoices()
-                    self._update_invoices_display()
+                    if not is_edit:
+                        # El backend asigna id y archivo: la lista se pide una vez
+                        # (las ediciones ya se redibujaron desde la caché)
+                        self._load_invoices()
+                        self._update_invoices_display()
                     self.page.close(invoice_dialog)
                     self.page.update()
                 
@@ -1306,8 +1371,12 @@ class MovementDetailView(BaseView):
                 show_error_message(self.page, "Error en el formato de la cantidad")
             except Exception as ex:
                 show_error_message(self.page, f"Error al guardar la factura: {str(ex)}")
+            finally:
+                save_button.disabled = False
+                self.page.update()
         
         # Create modal dialog
+        save_button = ft.TextButton("Guardar", on_click=save_invoice)
         title = "Editar Operacion" if is_edit else "Nueva Operacion"
         invoice_dialog = ft.AlertDialog(
             modal=True,
@@ -1332,14 +1401,16 @@ class MovementDetailView(BaseView):
                     ft.Container(height=10),
                     ft.Text("Documento de factura", style="titleMedium", weight=ft.FontWeight.BOLD),
                     file_button,
-                    selected_file_name
+                    selected_file_name,
+                    upload_progress_bar,
+                    upload_progress_text
                 ], scroll=ft.ScrollMode.ALWAYS, spacing=15),
                 width=450,
                 height=550
             ),
             actions=[
                 ft.TextButton("Cancelar", on_click=lambda e: self.page.close(invoice_dialog)),
-                ft.TextButton("Guardar", on_click=save_invoice)
+                save_button
             ]
         )
         
@@ -1347,88 +1418,62 @@ class MovementDetailView(BaseView):
 
     def _download_invoice(self, invoice):
         """Handle the downloaded invoice file - compatible with web and desktop"""
-        try:
+        # La factura se sirve desde la caché local de documentos si ya se descargó
+        file_path = self.safe_api_call(
+            lambda: self.services.invoices.download_invoice(invoice.id_factura),
+            loading_message="Descargando factura..."
+        )
+        if not file_path:
+            return
 
-            file_path = self.safe_api_call(
-                lambda: self.services.invoices.download_invoice(invoice.id_factura),
-                loading_message="Descargando factura..."
-            )
+        self._save_downloaded_file(
+            file_path,
+            suggested_name=f"factura_{invoice.id_factura}{os.path.splitext(file_path)[1]}",
+            dialog_title="Guardar factura como..."
+        )
 
-            # Detectar si estamos en un entorno web
-            is_web = hasattr(self.page, 'web') and self.page.web
-            
-            if is_web:
-                # Para entorno web: usar un enfoque diferente
-                #self._web_invoice_download_flow(file_path, invoice)
-                show_error_message(self.page, f"La descarga desde web no esta implementada")
-            else:
-                # Para entorno de escritorio: usar FilePicker normal
-                self._handle_desktop_download(file_path= file_path, invoice=invoice)
-                
-        except Exception as e:
-            show_error_message(self.page, f"Error al manejar la descarga: {str(e)}")
-            # Limpiar el archivo temporal en caso de error
-            try:
-                os.unlink(file_path)
-            except:
-                pass
+    def _save_downloaded_file(self, file_path: str, suggested_name: str, dialog_title: str):
+        """Offer a downloaded (cached) file to the user"""
+        # Detectar si estamos en un entorno web
+        is_web = hasattr(self.page, 'web') and self.page.web
+        
+        if is_web:
+            # Para entorno web: usar un enfoque diferente
+            #self._web_invoice_download_flow(file_path, invoice)
+            show_error_message(self.page, f"La descarga desde web no esta implementada")
+        else:
+            # Para entorno de escritorio: usar FilePicker normal
+            self._handle_desktop_download(file_path, suggested_name, dialog_title)
 
-    def _handle_desktop_download(self, file_path: str, invoice):
-        """Handle the downloaded invoice file"""
+    def _handle_desktop_download(self, file_path: str, suggested_name: str, dialog_title: str):
+        """Copy a cached document to the location chosen by the user"""
         try:
             # Crear un file picker para guardar el archivo
             def on_save_result(e: ft.FilePickerResultEvent):
                 if e.path:
                     try:
-                        # Copiar el archivo temporal a la ubicación seleccionada por el usuario
+                        # Copiar el archivo de la caché a la ubicación seleccionada por el usuario
                         import shutil
                         shutil.copy2(file_path, e.path)
-                        show_success_message(self.page, f"Factura guardada en: {e.path}")
-                        
-                        # Limpiar el archivo temporal
-                        try:
-                            os.unlink(file_path)
-                        except:
-                            pass
-                            
+                        show_success_message(self.page, f"Archivo guardado en: {e.path}")
                     except Exception as ex:
                         show_error_message(self.page, f"Error al guardar el archivo: {str(ex)}")
-                else:
-                    # El usuario canceló la operación, limpiar el archivo temporal
-                    try:
-                        os.unlink(file_path)
-                    except:
-                        pass
 
-                # Remover el FilePicker del overlay después de usarlo
-                try:
-                    self.page.overlay.remove(save_file_dialog)
-                    self.page.update()
-                except:
-                    pass
-            
-            # Crear y añadir el FilePicker a la página
-            save_file_dialog = ft.FilePicker(on_result=on_save_result)
-            self.page.overlay.append(save_file_dialog)
+            # FilePicker reutilizado; se devuelve al pool al salir de la vista
+            save_file_dialog = self.overlays.file_picker(self, "save_file", on_result=on_save_result)
             self.page.update()  # Actualizar la página para que reconozca el nuevo overlay
             
-            # Sugerir un nombre de archivo basado en la factura
-            suggested_name = f"factura_{invoice.id_factura}.pdf"
+            extension = os.path.splitext(suggested_name)[1].lstrip(".")
             
             # Abrir el diálogo para guardar archivo
             save_file_dialog.save_file(
-                dialog_title="Guardar factura como...",
+                dialog_title=dialog_title,
                 file_name=suggested_name,
-                allowed_extensions=["pdf"]
+                allowed_extensions=[extension] if extension else None
             )
             
         except Exception as e:
             show_error_message(self.page, f"Error al manejar la descarga: {str(e)}")
-            # Limpiar el archivo temporal en caso de error
-            try:
-                os.unlink(file_path)
-            except:
-                pass
 
     def _edit_invoice(self, invoice):
         """Edit invoice"""
@@ -1447,9 +1492,8 @@ class MovementDetailView(BaseView):
             )
             
             if success:
+                # La lista ya se redibujó desde la caché (_on_invoices_changed)
                 show_success_message(self.page, "Factura eliminada correctamente")
-                self._load_invoices()
-                self._update_invoices_display()
             
             self.page.close(confirm_dialog)
 
@@ -1466,80 +1510,144 @@ class MovementDetailView(BaseView):
         self.page.open(confirm_dialog)
 
     def _add_accounting_doc(self, e):
-        """Add new accounting document"""
+        """Add new accounting documents (several files can be selected)"""
         # Create file picker
         def on_file_result(e: ft.FilePickerResultEvent):
             if e.files:
-                file = e.files[0]
-                self._upload_accounting_doc(file)
+                self._upload_accounting_docs(e.files)
 
-        file_picker = ft.FilePicker(on_result=on_file_result)
-        self.page.overlay.append(file_picker)
+        file_picker = self.overlays.file_picker(self, "accounting_docs", on_result=on_file_result)
+        self.page.update()
         
         # Show file picker
         file_picker.pick_files(
             allowed_extensions=["pdf", "jpg", "jpeg", "png", "doc", "docx"],
-            dialog_title="Seleccionar documento contable"
+            dialog_title="Seleccionar documentos contables",
+            allow_multiple=True
         )
-        self.page.update()
     
-    def _upload_accounting_doc(self, file):
-        """Upload accounting document"""
-        # Create dialog for document name
-        name_field = ft.TextField(
-            label="Nombre del documento",
-            value=file.name,
-            width=400
-        )
+    def _upload_accounting_docs(self, files):
+        """Upload a batch of accounting documents with per-file progress"""
+        items = [BatchUploadItem(file.path, file.name) for file in files]
+        rows = {}
+        
+        def create_row(item: BatchUploadItem):
+            name_field = ft.TextField(label="Nombre del documento", value=item.nombre, dense=True, expand=True)
+            progress_bar = ft.ProgressBar(value=0, width=120)
+            status_icon = ft.Icon(ft.Icons.SCHEDULE, color=ft.Colors.GREY_600, size=20, tooltip="Pendiente")
+            rows[id(item)] = (name_field, progress_bar, status_icon)
+            return ft.Row([status_icon, name_field, progress_bar], vertical_alignment=ft.CrossAxisAlignment.CENTER)
+        
+        summary_text = ft.Text(f"{len(items)} archivo(s) seleccionado(s)", size=12, color=ft.Colors.GREY_600)
+        
+        # Limitar los page.update() cuando hay muchos archivos subiendo a la vez
+        update_lock = threading.Lock()
+        last_update = [0.0]
+        
+        def refresh_ui(force: bool = False):
+            with update_lock:
+                now = time.monotonic()
+                if not force and now - last_update[0] < 0.2:
+                    return
+                last_update[0] = now
+            self.page.update()
         
-        def upload_doc(e):
-            if not name_field.value:
-                show_error_message(self.page, "El nombre del documento es obligatorio")
-                return
-                
-            # Here you would implement the actual file upload
-            # For now, we'll simulate it
-            success = True  # Replace with actual upload logic
+        def on_item_update(item: BatchUploadItem):
+            name_field, progress_bar, status_icon = rows[id(item)]
+            progress_bar.value = item.progress
+            if item.status == BatchUploadItem.UPLOADING:
+                status_icon.name = ft.Icons.CLOUD_UPLOAD
+                status_icon.color = ft.Colors.BLUE
+                status_icon.tooltip = f"Subiendo (reintentos: {item.retries})" if item.retries else "Subiendo"
+            elif item.status == BatchUploadItem.DONE:
+                status_icon.name = ft.Icons.CHECK_CIRCLE
+                status_icon.color = ft.Colors.GREEN
+                status_icon.tooltip = "Subido"
+            elif item.status == BatchUploadItem.FAILED:
+                status_icon.name = ft.Icons.ERROR
+                status_icon.color = ft.Colors.RED
+                status_icon.tooltip = item.error or "Error"
+            refresh_ui(force=item.finished)
+        
+        def upload_docs(e):
+            for item in items:
+                name_field = rows[id(item)][0]
+                if not name_field.value:
+                    show_error_message(self.page, "El nombre del documento es obligatorio")
+                    return
             
-            if success:
-                show_success_message(self.page, "Documento subido correctamente")
+            for item in items:
+                name_field = rows[id(item)][0]
+                item.nombre = name_field.value
+                name_field.disabled = True
+            upload_button.disabled = True
+            cancel_button.disabled = True
+            self.page.update()
+            # Las subidas (con sus reintentos) no bloquean el hilo del evento
+            threading.Thread(target=run_upload, daemon=True).start()
+        
+        def run_upload():
+            self.services.batch_uploads.upload(self.movement_id, items, on_item_update=on_item_update)
+            
+            failed = [item for item in items if item.status == BatchUploadItem.FAILED]
+            uploaded = len(items) - len(failed)
+            
+            # Una sola recarga de documentos al final del lote (el backend no devuelve los creados)
+            if uploaded:
                 self._load_accounting_docs()
                 self._update_docs_display()
-                self.page.close(upload_dialog)
             
+            if failed:
+                # Permitir reintentar solo los que han fallado
+                summary_text.value = f"{uploaded} subido(s), {len(failed)} con error"
+                summary_text.color = ft.Colors.RED
+                for item in failed:
+                    rows[id(item)][0].disabled = False
+                upload_button.text = "Reintentar"
+                upload_button.disabled = False
+                cancel_button.text = "Cerrar"
+                cancel_button.disabled = False
+                self.page.update()
+            else:
+                show_success_message(self.page, f"{uploaded} documento(s) subido(s) correctamente")
+                self.page.close(upload_dialog)
+        
+        upload_button = ft.TextButton("Subir", on_click=upload_docs)
+        cancel_button = ft.TextButton("Cancelar", on_click=lambda e: self.page.close(upload_dialog))
+        
         upload_dialog = ft.AlertDialog(
             modal=True,
-            title=ft.Text("Subir Documento Contable"),
-            content=ft.Column([
-                ft.Text(f"Archivo: {file.name}"),
-                name_field
-            ], tight=True),
-            actions=[
-                ft.TextButton("Cancelar", on_click=lambda e: self.page.close(upload_dialog)),
-                ft.TextButton("Subir", on_click=upload_doc)
-            ]
+            title=ft.Text("Subir Documentos Contables"),
+            content=ft.Container(
+                content=ft.Column(
+                    [summary_text] + [create_row(item) for item in items],
+                    scroll=ft.ScrollMode.AUTO,
+                    spacing=10
+                ),
+                width=500,
+                height=min(120 + 60 * len(items), 500)
+            ),
+            actions=[cancel_button, upload_button]
         )
         
         self.page.open(upload_dialog)
 
     def _download_document(self, doc):
         """Download accounting document"""
-        """
-        try:
-            response = self.safe_api_call(
-                lambda: self.services.accounting.download_accounting_doc(doc.id_docs_contables),
-                loading_message="Descargando documento..."
-            )
-            
-            if response:
-                show_success_message(self.page, f"Descargando {doc.nombre}")
-                # Here you would handle the actual file download
-                # This would depend on how Flet handles file downloads
-            
-        except Exception as e:
-            show_error_message(self.page, f"Error al descargar el documento: {str(e)}")
-        """
-        show_error_message(self.page, f"Esta funcionalidad no esta implementada aun")
+        file_path = self.safe_api_call(
+            lambda: self.services.accounting.download_accounting_doc(doc.id_docs_contables),
+            loading_message="Descargando documento..."
+        )
+        if not file_path:
+            return
+
+        extension = os.path.splitext(file_path)[1]
+        suggested_name = doc.nombre if doc.nombre.lower().endswith(extension) else f"{doc.nombre}{extension}"
+        self._save_downloaded_file(
+            file_path,
+            suggested_name=suggested_name,
+            dialog_title="Guardar documento como..."
+        )
 
     def _delete_document(self, doc):
         """Delete accounting document"""
@@ -1550,9 +1658,8 @@ class MovementDetailView(BaseView):
             )
             
             if success:
+                # La lista ya se redibujó desde la caché (_on_docs_changed)
                 show_success_message(self.page, "Documento eliminado correctamente")
-                self._load_accounting_docs()
-                self._update_docs_display()
             
             self.page.close(confirm_dialog)
 
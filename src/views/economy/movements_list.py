@@ -20,18 +20,9 @@ class MovementsListView(BaseView, FilterMixin, PaginationMixin):
         self.events = []
         self.selected_year = datetime.now().year
         
-        # Date pickers
-        self.date_picker_desde = ft.DatePicker(
-            first_date=date(2020, 1, 1),
-            last_date=date(2030, 12, 31),
-            on_change=self._on_date_desde_change
-        )
-        
-        self.date_picker_hasta = ft.DatePicker(
-            first_date=date(2020, 1, 1),
-            last_date=date(2030, 12, 31),
-            on_change=self._on_date_hasta_change
-        )
+        # Date pickers (del pool de la página, se asignan en show)
+        self.date_picker_desde = None
+        self.date_picker_hasta = None
         
         # Filter state
         self.filters = {
@@ -49,9 +40,9 @@ class MovementsListView(BaseView, FilterMixin, PaginationMixin):
     
     def show(self):
         """Show movements list view"""
-        # Add date pickers to page overlay
-        self.page.overlay.extend([self.date_picker_desde, self.date_picker_hasta])
-
+        # Date pickers reutilizados: volver a la vista no añade más al overlay
+        self.date_picker_desde = self.overlays.date_picker(self, "fecha_desde", on_change=self._on_date_desde_change)
+        self.date_picker_hasta = self.overlays.date_picker(self, "fecha_hasta", on_change=self._on_date_hasta_change)
             
         self.setup_page_config("Movimientos Económicos")
         self.is_mobile = self.page.width < 768 if self.page.width else False
@@ -289,14 +280,14 @@ class MovementsListView(BaseView, FilterMixin, PaginationMixin):
         """Handle date desde change"""
         if self.date_picker_desde.value:
             self.filters["fecha_desde"] = self.date_picker_desde.value
-            self.fecha_desde_btn.text = f"Desde: {self.filters["fecha_desde"].strftime("%d-%m-%Y")}"
+            self.fecha_desde_btn.text = f"Desde: {self.filters['fecha_desde'].strftime('%d-%m-%Y')}"
             self.page.update()
     
     def _on_date_hasta_change(self, e):
         """Handle date hasta change"""
         if self.date_picker_hasta.value:
             self.filters["fecha_hasta"] = self.date_picker_hasta.value
-            self.fecha_hasta_btn.text = f"Hasta: {self.filters["fecha_hasta"].strftime("%d-%m-%Y")}"
+            self.fecha_hasta_btn.text = f"Hasta: {self.filters['fecha_hasta'].strftime('%d-%m-%Y')}"
             self.page.update()
     
     def _create_desktop_table(self):
@@ -162,7 +162,14 @@ class EventFormView(BaseView):
         )
         
         if success:
-            self.router.navigate_to(Routes.EVENTS)
+            if success.id is not None:
+                # El detalle se construye con los datos enviados, sin volver a pedirlos
+                self.page.session.set("selected_event_id", success.id)
+                self.page.session.set("selected_event_data", {**event_data.model_dump(), "event_id": success.id})
+                self.page.session.set("edit_mode", False)
+                self.router.navigate_to(Routes.EVENT_DETAIL)
+            else:
+                self.router.navigate_to(Routes.EVENTS)
     
     def _validate_form(self) -> list:
         errors = []
@@ -1,3 +1,4 @@
+import threading
 import flet as ft
 from typing import Optional
 from views.base.base_view import BaseView
@@ -22,6 +23,22 @@ class ProfileView(BaseView):
         self.setup_page_config("Mi Perfil")
         self._load_profile_data()
         self._setup_content()
+        
+        # El perfil puede venir de la caché: revalidarlo sin bloquear
+        if self.user_profile:
+            threading.Thread(target=self._revalidate_profile, daemon=True).start()
+
+    def _revalidate_profile(self):
+        """Refresh the profile in the background and re-render if it changed"""
+        try:
+            fresh = self.services.auth.get_current_user(refresh=True)
+        except Exception:
+            return
+        if fresh != self.user_profile and self.router.current_view is self:
+            self.user_profile = fresh
+            self.page.clean()
+            self.setup_page_config("Mi Perfil")
+            self._setup_content()
 
     def _load_profile_data(self):
         """Load user profile data from API"""
@@ -169,7 +186,7 @@ class ProfileView(BaseView):
 
     def _create_profile_form(self):
         """Create the profile form using ResponsiveForm"""
-        self.profile_form = ResponsiveForm(self.page)
+        self.profile_form = ResponsiveForm(self.page, owner=self)
         
         # Personal Information Section
         personal_fields = [
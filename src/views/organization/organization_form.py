@@ -255,7 +255,12 @@ class OrganizationFormView(BaseView):
         )
         
         if success:
-            self.router.navigate_to(Routes.ORGANIZATIONS)
+            if success.id is not None:
+                self.page.session.set("selected_organization_id", success.id)
+                self.page.session.set("edit_mode", False)
+                self.router.navigate_to(Routes.ORGANIZATION_DETAIL)
+            else:
+                self.router.navigate_to(Routes.ORGANIZATIONS)
     
     def _validate_form(self) -> list:
         errors = []
@@ -61,6 +61,20 @@ class UserDetailView(BaseView):
         if all_roles_result:
             self.available_roles = all_roles_result
     
+    def _refresh_from_cache(self):
+        """After saving: take the user and their roles from the patched cache (request only what is missing)"""
+        cache = self.services.cache
+        user = cache.peek_detail("users", self.user_id)
+        if user is None:
+            self._load_user_data()
+        else:
+            self.user_data = user
+        user_roles = cache.peek_list("user_roles", self.user_id)
+        if user_roles is None:
+            self._load_roles_data()
+        else:
+            self.user_roles = user_roles
+
     def _load_user_data(self):
         """Load user data from API"""
         
@@ -493,8 +507,8 @@ class UserDetailView(BaseView):
             role_success = self._save_role_changes()
         
         if success and role_success:
-            # Reload user data and switch to view mode
-            self._load_user_data()
+            # Los servicios ya aplicaron los cambios en la caché: se redibuja desde ella
+            self._refresh_from_cache()
             self.is_editing = False
             self.roles_to_add.clear()
             self.roles_to_remove.clear()
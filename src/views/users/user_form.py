@@ -481,8 +481,13 @@ class UserFormView(BaseView):
         )
         
         if success:
-            # Navigate back to users list
-            self.router.navigate_to("/users")
+            if success.id is not None:
+                # Ir al detalle del nuevo usuario (p. ej. para asignarle roles)
+                self.page.session.set("selected_user_id", success.id)
+                self.router.navigate_to(Routes.USER_DETAIL)
+            else:
+                # Navigate back to users list
+                self.router.navigate_to("/users")
     
     def _validate_form(self) -> list:
         """Validate form data and return list of errors"""
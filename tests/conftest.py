@@ -0,0 +1,27 @@
+# tests/conftest.py
+import os
+import sys
+
+import httpx
+import pytest
+
+# Mismos valores por defecto que los benchmarks (backend simulado, ficheros en temp) y src en sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+import benchmarks  # noqa: E402,F401
+
+from services.api_client import APIClient  # noqa: E402
+from services.retry_policy import RetryPolicy  # noqa: E402
+from services.single_flight import SingleFlight  # noqa: E402
+
+
+@pytest.fixture
+def make_client():
+    """APIClient over httpx.MockTransport(handler), logged in, with retries that do not sleep"""
+    def make(handler, token="test-token", **kwargs):
+        kwargs.setdefault("retry_policy", RetryPolicy(sleep=lambda delay: None))
+        kwargs.setdefault("flights", SingleFlight(enabled=True))
+        client = APIClient(transport=httpx.MockTransport(handler), **kwargs)
+        if token:
+            client.set_token(token)
+        return client
+    return make
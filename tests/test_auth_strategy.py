@@ -0,0 +1,75 @@
+# tests/test_auth_strategy.py
+import httpx
+import pytest
+
+from config.settings import settings
+from core.exceptions import AuthenticationError
+from services import auth_strategy
+
+
+@pytest.fixture(autouse=True)
+def unknown_backend(monkeypatch):
+    # El esquema aceptado se recuerda por proceso: cada prueba empieza sin saberlo
+    monkeypatch.setattr(auth_strategy, "_ACCEPTED", {})
+
+
+def _backend(accepts: str):
+    """Handler that only reads the token from ``header`` or ``query``"""
+    seen = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        header = "authorization" in request.headers
+        query = "token" in request.url.params
+        seen.append("header" if header else "query" if query else "none")
+        ok = header if accepts == "header" else query
+        return httpx.Response(200 if ok else 401, json={} if ok else {"detail": "x"})
+    return handler, seen
+
+
+def test_bearer_is_confirmed_by_the_first_answer(make_client):
+    handler, seen = _backend("header")
+    client = make_client(handler)
+
+    client.request("GET", "/x")
+    client.request("GET", "/y")
+
+    assert seen == ["header", "header"]
+    assert auth_strategy.accepted_scheme(client.base_url) == "bearer"
+
+
+def test_a_query_only_backend_switches_every_session_to_query(make_client):
+    handler, seen = _backend("query")
+    first = make_client(handler)
+
+    assert first.request("GET", "/x").status_code == 200
+    assert seen == ["header", "query"]
+    assert first.auth.name == "query"
+
+    second = make_client(handler)
+    second.request("GET", "/x")
+    assert seen[2:] == ["query"]  # La sesión nueva ya no prueba la cabecera
+
+
+def test_an_invalid_token_is_not_taken_as_a_query_backend(make_client):
+    client = make_client(lambda request: httpx.Response(401, json={"detail": "x"}))
+
+    with pytest.raises(AuthenticationError):
+        client.request("GET", "/x")
+
+    assert auth_strategy.accepted_scheme(client.base_url) is None
+    assert client.auth.name == "bearer"
+
+
+def test_the_fallback_can_be_turned_off(make_client, monkeypatch):
+    monkeypatch.setattr(settings, "AUTH_SCHEME_FALLBACK", False)
+    handler, seen = _backend("query")
+
+    with pytest.raises(AuthenticationError):
+        make_client(handler).request("GET", "/x")
+    assert seen == ["header"]
+
+
+def test_token_subject_never_exposes_opaque_tokens():
+    subject = auth_strategy.token_subject("opaque-secret")
+
+    assert subject.startswith("token:") and "opaque-secret" not in subject
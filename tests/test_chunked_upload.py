@@ -0,0 +1,145 @@
+# tests/test_chunked_upload.py
+import os
+
+import httpx
+import pytest
+
+from core.exceptions import APIError, NetworkError
+from services.chunked_upload import ChunkedUploader, HTTPUploadProtocol, StubUploadProtocol, UploadJournal
+
+CHUNK = 100
+
+
+@pytest.fixture
+def upload_file(tmp_path):
+    path = tmp_path / "factura.pdf"
+    path.write_bytes(os.urandom(CHUNK * 5 + 50))
+    return str(path)
+
+
+def _uploader(protocol, tmp_path, **kwargs):
+    return ChunkedUploader(protocol, journal=UploadJournal(str(tmp_path / "uploads.json")),
+                           chunk_size=CHUNK, retry_delay=0, **kwargs)
+
+
+def _uploaded(protocol) -> bytes:
+    (content,) = protocol.completed.values()
+    return content
+
+
+def test_upload_sends_every_chunk(tmp_path, upload_file):
+    protocol = StubUploadProtocol()
+
+    assert _uploader(protocol, tmp_path).upload("/invoices/update_invoice_file", upload_file, {"factura_id": 1})
+
+    assert _uploaded(protocol) == open(upload_file, "rb").read()
+    assert protocol.chunk_requests == 6
+
+
+def test_failed_chunks_are_retried(tmp_path, upload_file):
+    protocol = StubUploadProtocol(fail_chunks={CHUNK * 2})
+    progress = []
+
+    assert _uploader(protocol, tmp_path).upload("/x", upload_file, on_progress=progress.append)
+
+    assert protocol.chunk_requests == 7
+    assert progress[-1].done and progress[-1].retries == 1
+
+
+def test_an_interrupted_upload_resumes_from_the_server_offset(tmp_path, upload_file):
+    protocol = StubUploadProtocol(interrupt_after=3)
+    uploader = _uploader(protocol, tmp_path, max_retries=0)
+    with pytest.raises(NetworkError):
+        uploader.upload("/x", upload_file)
+
+    protocol.interrupt_after = None
+    progress = []
+    assert uploader.upload("/x", upload_file, on_progress=progress.append)
+
+    assert progress[0].resumed and progress[0].sent_bytes == CHUNK * 3
+    assert _uploaded(protocol) == open(upload_file, "rb").read()
+
+
+class _LostChunkProtocol(StubUploadProtocol):
+    """The server drops the stored bytes after ``lose_at`` once (a chunk it never kept)"""
+
+    def __init__(self, lose_at: int):
+        super().__init__()
+        self.lose_at = lose_at
+
+    def send_chunk(self, upload_id, offset, data, total_size):
+        if offset == self.lose_at:
+            self.lose_at = None
+            with self._lock:
+                del self.uploads[upload_id]["data"][offset - CHUNK:]
+        return super().send_chunk(upload_id, offset, data, total_size)
+
+
+class _LostResponseProtocol(StubUploadProtocol):
+    """The chunk at ``lose_at`` is stored but its response never arrives (once)"""
+
+    def __init__(self, lose_at: int):
+        super().__init__()
+        self.lose_at = lose_at
+
+    def send_chunk(self, upload_id, offset, data, total_size):
+        super().send_chunk(upload_id, offset, data, total_size)
+        if offset == self.lose_at:
+            self.lose_at = None
+            raise NetworkError("Network error: response lost")
+
+
+def test_409_behind_resends_from_the_server_offset(tmp_path, upload_file):
+    protocol = _LostChunkProtocol(lose_at=CHUNK * 3)
+
+    assert _uploader(protocol, tmp_path).upload("/x", upload_file)
+
+    assert _uploaded(protocol) == open(upload_file, "rb").read()
+
+
+def test_409_ahead_skips_the_chunk_the_server_already_has(tmp_path, upload_file):
+    protocol = _LostResponseProtocol(lose_at=CHUNK)
+
+    assert _uploader(protocol, tmp_path).upload("/x", upload_file)
+
+    assert _uploaded(protocol) == open(upload_file, "rb").read()
+    assert protocol.chunk_requests == 7  # El reintento del chunk 1 recibe 409 y se continúa desde el 2
+
+
+def test_409_at_the_same_offset_is_raised(tmp_path, upload_file):
+    class Stuck(StubUploadProtocol):
+        def send_chunk(self, upload_id, offset, data, total_size):
+            raise APIError("API error 409: conflict", 409)
+
+    with pytest.raises(APIError):
+        _uploader(Stuck(), tmp_path).upload("/x", upload_file)
+
+
+def test_http_protocol_resumes_after_a_409(make_client, tmp_path, upload_file):
+    """Same resume logic over the /uploads/* endpoints (httpx.MockTransport)"""
+    stored = bytearray()
+    lost = {"done": False}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        path = request.url.path
+        if path == "/uploads/start":
+            return httpx.Response(200, json={"upload_id": "u1"})
+        if path == "/uploads/status":
+            return httpx.Response(200, json={"offset": len(stored)})
+        if path == "/uploads/chunk":
+            start = int(request.headers["Content-Range"].split()[1].split("-")[0])
+            if start == CHUNK * 2 and not lost["done"]:
+                lost["done"] = True
+                del stored[CHUNK:]  # El servidor perdió el chunk anterior
+            if start != len(stored):
+                return httpx.Response(409, json={"detail": "unexpected offset"})
+            stored.extend(request.content)
+            return httpx.Response(200, json={})
+        if path == "/uploads/complete":
+            return httpx.Response(200, json={})
+        return httpx.Response(404)
+
+    uploader = _uploader(HTTPUploadProtocol(make_client(handler)), tmp_path)
+
+    assert uploader.upload("/invoices/update_invoice_file", upload_file, {"factura_id": 1})
+    assert bytes(stored) == open(upload_file, "rb").read()
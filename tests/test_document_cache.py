@@ -0,0 +1,95 @@
+# tests/test_document_cache.py
+import time
+
+import httpx
+import pytest
+
+from services.document_cache import DocumentCache
+from services.invoice_service import InvoiceService
+
+
+def _wait_for(condition, timeout: float = 5.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return condition()
+
+
+@pytest.fixture
+def scope():
+    return [("1", 7)]
+
+
+@pytest.fixture
+def documents(tmp_path, scope):
+    return DocumentCache(str(tmp_path), scope=lambda: scope[0], revalidate_after=60)
+
+
+def _backend(body=b"%PDF-1", etag=None, status=200):
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        if etag and request.headers.get("If-None-Match") == etag:
+            return httpx.Response(304)
+        return httpx.Response(status, content=body, headers={"ETag": etag} if etag else {})
+    return handler, requests
+
+
+def test_a_cached_document_is_served_without_a_request(make_client, documents):
+    handler, requests = _backend()
+    service = InvoiceService(make_client(handler), documents=documents)
+
+    first = service.download_invoice(1)
+    second = service.download_invoice(1)
+
+    assert first == second and open(first, "rb").read() == b"%PDF-1"
+    assert len(requests) == 1
+
+
+def test_an_old_copy_is_served_and_revalidated_in_the_background(make_client, documents):
+    handler, requests = _backend(etag='"v1"')
+    service = InvoiceService(make_client(handler), documents=documents)
+    path = service.download_invoice(1)
+    documents.revalidate_after = 0
+
+    assert service.download_invoice(1) == path
+    assert _wait_for(lambda: len(requests) == 2)
+    assert requests[1].headers["If-None-Match"] == '"v1"'
+
+
+def test_background_revalidation_replaces_a_changed_document(make_client, documents):
+    handler, requests = _backend(body=b"old")
+    service = InvoiceService(make_client(handler), documents=documents)
+    service.download_invoice(1)
+    documents.revalidate_after = 0
+    service.api.transport = httpx.MockTransport(_backend(body=b"new")[0])
+
+    service.download_invoice(1)
+
+    assert _wait_for(lambda: open(documents.get_path("invoice", 1), "rb").read() == b"new")
+
+
+def test_background_revalidation_drops_a_deleted_document(make_client, documents):
+    service = InvoiceService(make_client(_backend()[0]), documents=documents)
+    service.download_invoice(1)
+    documents.revalidate_after = 0
+    service.api.transport = httpx.MockTransport(lambda r: httpx.Response(404, json={"detail": "x"}))
+
+    service.download_invoice(1)
+
+    assert _wait_for(lambda: documents.get_path("invoice", 1) is None)
+
+
+def test_clear_only_forgets_the_current_scope(documents, scope):
+    documents.put("invoice", 1, b"user 1")
+    scope[0] = ("2", 7)
+    documents.put("invoice", 1, b"user 2")
+
+    documents.clear()
+
+    assert documents.get_path("invoice", 1) is None
+    scope[0] = ("1", 7)
+    assert open(documents.get_path("invoice", 1), "rb").read() == b"user 1"
@@ -0,0 +1,166 @@
+# tests/test_outbox.py
+import threading
+import time
+
+import httpx
+import pytest
+
+from config.settings import settings
+from models.economic import EconomicMovementCreate, EconomicMovementUpdate
+from services.economic_service import EconomicService
+from services.outbox import MutationOutbox, OutboxEntry
+
+
+def _wait_for(condition, timeout: float = 5.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return condition()
+
+
+@pytest.fixture
+def outbox(tmp_path):
+    box = MutationOutbox(path=str(tmp_path / "outbox.sqlite3"), enabled=True)
+    yield box
+    box.stop()
+
+
+def _backend(*statuses):
+    """MockTransport handler answering with the given statuses in order, then 200"""
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        status = statuses[len(requests) - 1] if len(requests) <= len(statuses) else 200
+        return httpx.Response(status, json={} if status == 200 else {"detail": "x"})
+    return handler, requests
+
+
+def test_replay_sends_the_queued_update_with_its_key(make_client, outbox):
+    handler, requests = _backend()
+    service = EconomicService(make_client(handler), outbox=outbox)
+    outbox.owner = "1"
+    assert service.queue_update_movement(3, EconomicMovementUpdate(concepto="x"), "key-1")
+
+    assert outbox.replay() == 1
+
+    assert requests[0].url.params["movement_id"] == "3"
+    assert requests[0].headers["Idempotency-Key"] == "key-1"
+    assert outbox.pending_count() == 0
+
+
+def test_creates_are_not_queued_without_backend_dedupe(make_client, outbox, monkeypatch):
+    monkeypatch.setattr(settings, "BACKEND_IDEMPOTENCY_KEYS", False)
+    service = EconomicService(make_client(_backend()[0]), outbox=outbox)
+    outbox.owner = "1"
+    create = EconomicMovementCreate(id_evento=1, concepto="Alta", cantidad_total_ctm=100, ano_ejercicio=2024,
+                                    categorias_subvencion_id=1, ind_movimiento=12)
+
+    assert not service.queue_create_movement(create, "key-1")
+    assert outbox.pending_count() == 0
+
+
+def test_network_errors_back_off_and_keep_the_order(make_client, outbox):
+    handler, requests = _backend(503, 503, 503)  # RetryPolicy agota sus intentos con la primera
+    service = EconomicService(make_client(handler), outbox=outbox)
+    outbox.owner = "1"
+    service.queue_update_movement(1, EconomicMovementUpdate(concepto="a"), "key-1")
+    service.queue_update_movement(2, EconomicMovementUpdate(concepto="b"), "key-2")
+
+    assert outbox.replay() == 0
+
+    first, second = outbox.entries()
+    assert first.attempts == 1 and first.next_attempt_at > time.time()
+    assert second.attempts == 0  # No se envía: puede depender de la primera
+    assert {r.url.params["movement_id"] for r in requests} == {"1"}
+
+
+def test_forbidden_and_missing_movements_are_kept_as_conflicts(make_client, outbox):
+    handler, requests = _backend(403, 404)
+    service = EconomicService(make_client(handler), outbox=outbox)
+    outbox.owner = "1"
+    for movement_id in (1, 2, 3):
+        service.queue_update_movement(movement_id, EconomicMovementUpdate(concepto="x"), f"key-{movement_id}")
+
+    assert outbox.replay() == 1
+
+    assert [e.state for e in outbox.entries()] == [OutboxEntry.CONFLICT, OutboxEntry.CONFLICT]
+    assert len(requests) == 3
+
+
+def test_a_401_stops_the_replay_until_the_next_login(make_client, outbox):
+    handler, requests = _backend(401)
+    service = EconomicService(make_client(handler), outbox=outbox)
+    outbox.owner = "1"
+    service.queue_update_movement(1, EconomicMovementUpdate(concepto="a"), "key-1")
+    service.queue_update_movement(2, EconomicMovementUpdate(concepto="b"), "key-2")
+
+    assert outbox.replay() == 0
+
+    assert len(requests) == 1
+    assert [e.state for e in outbox.entries()] == [OutboxEntry.PENDING, OutboxEntry.PENDING]
+
+
+def test_start_replays_in_the_background(outbox):
+    applied = []
+    outbox.register("op", lambda payload, key: applied.append(payload["n"]))
+    outbox.owner = "1"
+    outbox.enqueue("op", {"n": 1})
+    outbox.enqueue("op", {"n": 2})
+
+    outbox.start("1")
+
+    assert _wait_for(lambda: applied == [1, 2])
+    assert _wait_for(lambda: outbox.pending_count() == 0)
+
+
+def test_entries_belong_to_their_owner(outbox):
+    applied = []
+    outbox.register("op", lambda payload, key: applied.append(payload["n"]))
+    outbox.owner = "other"
+    outbox.enqueue("op", {"n": 1})
+
+    outbox.owner = "1"
+    assert outbox.replay() == 0
+    assert applied == []
+
+
+def test_stop_then_start_replays_with_a_new_thread(outbox):
+    applied = []
+    release = threading.Event()
+
+    def handler(payload, key):
+        release.wait(5)
+        applied.append(payload["n"])
+
+    outbox.register("op", handler)
+    outbox.start("1")
+    outbox.enqueue("op", {"n": 1})
+    first_thread = outbox._thread
+
+    # Parada y arranque inmediatos mientras el hilo anterior sigue en una petición
+    outbox.stop()
+    outbox.start("1")
+    release.set()
+
+    assert outbox._thread is not first_thread
+    assert _wait_for(lambda: applied == [1])
+    outbox.enqueue("op", {"n": 2})
+    assert _wait_for(lambda: applied == [1, 2])
+    first_thread.join(5)
+    assert not first_thread.is_alive()
+
+
+def test_stop_keeps_the_queue_on_disk(tmp_path):
+    path = str(tmp_path / "outbox.sqlite3")
+    box = MutationOutbox(path=path, enabled=True)
+    box.register("op", lambda payload, key: None)
+    box.owner = "1"
+    box.enqueue("op", {"n": 1})
+    box.stop()
+
+    reopened = MutationOutbox(path=path, enabled=True)
+    reopened.owner = "1"
+    assert reopened.pending_count() == 1
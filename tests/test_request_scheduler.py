@@ -0,0 +1,84 @@
+# tests/test_request_scheduler.py
+import time
+
+import pytest
+
+from services import request_scheduler
+from services.request_scheduler import Priority, RequestScheduler, TokenBucket
+
+
+def test_bucket_allows_a_burst_then_asks_to_wait():
+    bucket = TokenBucket(rate=10, burst=3)
+
+    assert [bucket.try_take() for _ in range(3)] == [0.0, 0.0, 0.0]
+    wait = bucket.try_take()
+    assert 0 < wait <= 0.1
+
+
+def test_bucket_refills_at_its_rate():
+    bucket = TokenBucket(rate=50, burst=1)
+    assert bucket.try_take() == 0.0
+    assert bucket.try_take() > 0
+
+    time.sleep(0.05)
+
+    assert bucket.try_take() == 0.0
+
+
+def test_bucket_keeps_a_reserve():
+    bucket = TokenBucket(rate=1, burst=5)
+
+    taken = 0
+    while bucket.try_take(keep=3) == 0.0:
+        taken += 1
+
+    assert taken == 2  # Quedan 3 para quien no pide reserva
+    assert bucket.try_take() == 0.0
+
+
+def test_take_waits_for_a_token():
+    bucket = TokenBucket(rate=20, burst=1)
+    bucket.take()
+
+    started = time.monotonic()
+    bucket.take()
+
+    assert time.monotonic() - started >= 0.04
+
+
+@pytest.fixture
+def host():
+    # Los buckets son por host y de todo el proceso: cada prueba usa uno propio
+    name = f"test-{time.monotonic_ns()}"
+    yield name
+    request_scheduler._BUCKETS.pop(name, None)
+
+
+def test_sessions_share_the_host_bucket(host):
+    first = RequestScheduler(rate=1, burst=2, reserve=0)
+    second = RequestScheduler(rate=1, burst=2, reserve=0)
+    with first.slot(host):
+        pass
+    with second.slot(host):
+        pass
+
+    assert request_scheduler._BUCKETS[host].try_take() > 0  # Las dos sesiones gastaron la ráfaga
+
+
+def test_background_work_leaves_the_reserve_to_the_ui(host):
+    scheduler = RequestScheduler(rate=1, burst=4, reserve=2)
+    for _ in range(2):
+        with scheduler.slot(host, Priority.BACKGROUND):
+            pass
+
+    bucket = request_scheduler._BUCKETS[host]
+    assert bucket.try_take(keep=2) > 0  # Otra petición en segundo plano tendría que esperar
+    with scheduler.slot(host, Priority.INTERACTIVE):
+        pass
+    assert scheduler.admitted == {Priority.INTERACTIVE: 1, Priority.PREFETCH: 0, Priority.BACKGROUND: 2}
+
+
+def test_unknown_priorities_are_rejected(host):
+    with pytest.raises(ValueError):
+        with RequestScheduler().slot(host, "urgent"):
+            pass
@@ -0,0 +1,100 @@
+# tests/test_resource_cache.py
+from datetime import datetime
+
+import httpx
+import pytest
+
+from core.exceptions import ServerError
+from models.invoice import FacturaListItem, FacturaUpdate
+from services.invoice_service import InvoiceService
+from services.resource_cache import ResourceCache
+
+
+def _invoice(invoice_id: int, nombre: str = "Factura") -> FacturaListItem:
+    return FacturaListItem(id_factura=invoice_id, nombre=nombre, ind_computable=10, cantidad_ctm=100,
+                           id_movimiento_economico=1, fecha_creacion=datetime(2024, 1, 1), usuaio_creacion=1)
+
+
+def _service(make_client, status: int):
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(status, json={"detail": "error"} if status >= 400 else {})
+
+    cache = ResourceCache(ttl=0)
+    cache.set_list("invoices", 1, [_invoice(1), _invoice(2)])
+    return InvoiceService(make_client(handler), cache=cache), cache, requests
+
+
+def test_optimistic_patch_is_kept_on_success(make_client):
+    service, cache, requests = _service(make_client, 200)
+
+    assert service.update_invoice_data(1, FacturaUpdate(nombre="Nueva"))
+
+    assert len(requests) == 1
+    assert [i.nombre for i in cache.peek_list("invoices", 1)] == ["Nueva", "Factura"]
+
+
+def test_optimistic_patch_is_rolled_back_when_the_request_fails(make_client):
+    service, cache, _ = _service(make_client, 500)
+    changes = []
+    cache.subscribe("invoices", changes.append)
+
+    with pytest.raises(ServerError):
+        service.update_invoice_data(1, FacturaUpdate(nombre="Nueva"))
+
+    assert [i.nombre for i in cache.peek_list("invoices", 1)] == ["Factura", "Factura"]
+    assert changes == ["invoices", "invoices"]  # Parche y deshacer: la vista se redibuja dos veces
+
+
+def test_optimistic_remove_is_rolled_back_on_a_non_200_answer(make_client):
+    service, cache, _ = _service(make_client, 202)
+
+    assert not service.delete_invoice(2)
+
+    assert [i.id_factura for i in cache.peek_list("invoices", 1)] == [1, 2]
+
+
+def test_rollback_only_restores_the_resources_it_touched():
+    cache = ResourceCache(ttl=0)
+    cache.set_list("invoices", 1, [_invoice(1)])
+    with cache.optimistic() as update:
+        cache.patch("invoices", "id_factura", 1, {"nombre": "Nueva"})
+        cache.set_list("accounting_docs", 1, [])  # Otro recurso, fuera de la actualización
+        update.rollback()
+
+    assert cache.peek_list("invoices", 1)[0].nombre == "Factura"
+    assert cache.peek_list("accounting_docs", 1) == []
+
+
+def test_entries_are_dropped_when_the_scope_changes():
+    scope = [("1", 7)]
+    cache = ResourceCache(ttl=60, scope=lambda: scope[0])
+    cache.set_list("invoices", 1, [_invoice(1)])
+    cache.set_detail("invoices", 1, _invoice(1))
+    assert cache.get_list("invoices", 1) is not None
+
+    scope[0] = ("2", 7)  # Otro usuario en la misma sesión
+
+    assert cache.get_list("invoices", 1) is None
+    assert cache.peek_list("invoices", 1) is None
+    assert cache.peek_detail("invoices", 1) is None
+
+
+def test_a_new_permission_scope_also_drops_entries():
+    scope = [("1", 7)]
+    cache = ResourceCache(ttl=60, scope=lambda: scope[0])
+    cache.set_list("roles", None, [])
+
+    scope[0] = ("1", 3)
+
+    assert cache.peek_list("roles") is None
+
+
+def test_peek_ignores_the_ttl_but_get_does_not():
+    cache = ResourceCache(ttl=0)
+    cache.set_detail("invoices", 1, _invoice(1))
+
+    assert cache.get_detail("invoices", 1) is None
+    assert cache.peek_detail("invoices", 1).id_factura == 1
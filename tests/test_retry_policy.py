@@ -0,0 +1,91 @@
+# tests/test_retry_policy.py
+import httpx
+import pytest
+
+from config.settings import settings
+from core.exceptions import ServerError
+from models.economic import EconomicMovementCreate, EconomicMovementUpdate
+from services.economic_service import EconomicService
+from services.retry_policy import RetryPolicy
+
+
+def _flaky(*statuses):
+    """Handler answering with the given statuses in order, then 200"""
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        status = statuses[len(requests) - 1] if len(requests) <= len(statuses) else 200
+        return httpx.Response(status, json={"id_movimiento_economico": 5} if status == 200 else {"detail": "x"})
+    return handler, requests
+
+
+def _create() -> EconomicMovementCreate:
+    return EconomicMovementCreate(id_evento=1, concepto="Alta", cantidad_total_ctm=100, ano_ejercicio=2024,
+                                  categorias_subvencion_id=1, ind_movimiento=12)
+
+
+def test_can_retry_defaults_to_safe_methods():
+    policy = RetryPolicy()
+
+    assert policy.can_retry("GET")
+    assert not policy.can_retry("POST")
+    assert policy.can_retry("POST", idempotent=True)
+    assert not policy.can_retry("GET", idempotent=False)
+
+
+def test_get_is_retried_after_a_503(make_client):
+    handler, requests = _flaky(503)
+
+    response = make_client(handler).request("GET", "/x")
+
+    assert response.status_code == 200
+    assert len(requests) == 2
+
+
+def test_post_is_not_retried_unless_marked_idempotent(make_client):
+    handler, requests = _flaky(503)
+    with pytest.raises(ServerError):
+        make_client(handler).request("POST", "/x", json_data={"a": 1})
+    assert len(requests) == 1
+
+    handler, requests = _flaky(503)
+    make_client(handler).request("POST", "/x", json_data={"a": 1}, idempotent=True)
+    assert len(requests) == 2
+
+
+def test_create_sends_the_key_but_is_not_retried_without_backend_dedupe(make_client, monkeypatch):
+    monkeypatch.setattr(settings, "BACKEND_IDEMPOTENCY_KEYS", False)
+    handler, requests = _flaky(503)
+
+    with pytest.raises(ServerError):
+        EconomicService(make_client(handler)).create_movement(_create(), idempotency_key="k1")
+
+    assert len(requests) == 1
+    assert requests[0].headers["Idempotency-Key"] == "k1"
+
+
+def test_create_is_retried_when_the_backend_dedupes(make_client, monkeypatch):
+    monkeypatch.setattr(settings, "BACKEND_IDEMPOTENCY_KEYS", True)
+    handler, requests = _flaky(503)
+
+    created = EconomicService(make_client(handler)).create_movement(_create(), idempotency_key="k1")
+
+    assert created.id == 5
+    assert [r.headers["Idempotency-Key"] for r in requests] == ["k1", "k1"]
+
+
+def test_update_is_retried(make_client):
+    handler, requests = _flaky(503)
+
+    assert EconomicService(make_client(handler)).update_movement(1, EconomicMovementUpdate(concepto="x"),
+                                                                 idempotency_key="k2")
+    assert len(requests) == 2
+
+
+def test_update_without_a_key_is_not_retried(make_client):
+    handler, requests = _flaky(503)
+
+    with pytest.raises(ServerError):
+        EconomicService(make_client(handler)).update_movement(1, EconomicMovementUpdate(concepto="x"))
+    assert len(requests) == 1
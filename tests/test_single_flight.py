@@ -0,0 +1,160 @@
+# tests/test_single_flight.py
+import threading
+import time
+
+import httpx
+import pytest
+
+from core.exceptions import AuthenticationError
+from services.single_flight import SingleFlight
+
+
+def _run_concurrently(*calls):
+    """Start every call in its own thread (each slightly after the previous) and collect results"""
+    results = [None] * len(calls)
+
+    def run(index, call):
+        try:
+            results[index] = call()
+        except Exception as e:
+            results[index] = e
+
+    threads = []
+    for index, call in enumerate(calls):
+        thread = threading.Thread(target=run, args=(index, call))
+        thread.start()
+        threads.append(thread)
+        time.sleep(0.05)
+    for thread in threads:
+        thread.join(5)
+    return results
+
+
+def _slow(value=None, error=None, delay=0.2):
+    calls = []
+
+    def fn():
+        calls.append(1)
+        time.sleep(delay)
+        if error is not None:
+            raise error
+        return value
+    return fn, calls
+
+
+def test_concurrent_calls_with_the_same_key_run_once():
+    flights = SingleFlight(enabled=True)
+    fn, calls = _slow("ok")
+
+    results = _run_concurrently(lambda: flights.do("k", fn), lambda: flights.do("k", fn))
+
+    assert results == ["ok", "ok"]
+    assert len(calls) == 1
+    assert flights.shared == 1 and flights.in_flight() == 0
+
+
+def test_different_keys_do_not_share():
+    flights = SingleFlight(enabled=True)
+    fn, calls = _slow("ok")
+
+    _run_concurrently(lambda: flights.do("a", fn), lambda: flights.do("b", fn))
+
+    assert len(calls) == 2
+
+
+def test_the_leader_error_reaches_the_waiters():
+    flights = SingleFlight(enabled=True)
+    fn, calls = _slow(error=ValueError("boom"))
+
+    results = _run_concurrently(lambda: flights.do("k", fn), lambda: flights.do("k", fn))
+
+    assert all(isinstance(r, ValueError) for r in results)
+    assert len(calls) == 1
+
+
+def test_without_shared_errors_each_waiter_runs_its_own_call():
+    flights = SingleFlight(enabled=True)
+    leader, _ = _slow(error=AuthenticationError("expired", status_code=401))
+    follower, follower_calls = _slow("mine", delay=0)
+
+    results = _run_concurrently(lambda: flights.do("k", leader, share_errors=False),
+                                lambda: flights.do("k", follower, share_errors=False))
+
+    assert isinstance(results[0], AuthenticationError)
+    assert results[1] == "mine"
+    assert len(follower_calls) == 1
+
+
+def test_cache_key_includes_the_user_unless_shared(make_client):
+    alice = make_client(lambda r: httpx.Response(200), token="alice")
+    bob = make_client(lambda r: httpx.Response(200), token="bob")
+    for client in (alice, bob):
+        client.set_permission_scope(7)
+
+    assert alice.cache_key("GET", "http://h/x") != bob.cache_key("GET", "http://h/x")
+    assert alice.cache_key("GET", "http://h/x", shared=True) == bob.cache_key("GET", "http://h/x", shared=True)
+
+    bob.set_permission_scope(3)
+    assert alice.cache_key("GET", "http://h/x", shared=True) != bob.cache_key("GET", "http://h/x", shared=True)
+
+
+def test_cache_key_ignores_query_order_and_the_token(make_client):
+    client = make_client(lambda r: httpx.Response(200))
+
+    assert (client.cache_key("GET", "http://h/x", {"a": 1, "b": 2})
+            == client.cache_key("GET", "http://h/x", {"b": 2, "a": 1}))
+    assert "test-token" not in repr(client.cache_key("GET", "http://h/x", {"a": 1}))
+
+
+@pytest.fixture
+def gated_backend():
+    """Categories endpoint that holds the first request until released; 401 for an expired token"""
+    release = threading.Event()
+    seen = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        token = request.headers.get("Authorization", "").removeprefix("Bearer ") or request.url.params.get("token")
+        seen.append(token)
+        if len(seen) == 1:
+            release.wait(5)
+        if token == "expired":
+            return httpx.Response(401, json={"detail": "expired"})
+        return httpx.Response(200, json=[])
+    return handler, release, seen
+
+
+def test_shared_endpoint_auth_error_is_not_passed_to_other_users(make_client, gated_backend):
+    handler, release, seen = gated_backend
+    flights = SingleFlight(enabled=True)
+    expired = make_client(handler, token="expired", flights=flights)
+    valid = make_client(handler, token="valid", flights=flights)
+
+    def release_later():
+        time.sleep(0.1)
+        release.set()
+
+    threading.Thread(target=release_later).start()
+    results = _run_concurrently(lambda: expired.request("GET", "/categories/categories_list"),
+                                lambda: valid.request("GET", "/categories/categories_list"))
+
+    assert isinstance(results[0], AuthenticationError)
+    assert results[1].status_code == 200
+    assert seen[0] == "expired" and seen[-1] == "valid"
+
+
+def test_shared_endpoint_success_is_shared_across_users(make_client, gated_backend):
+    handler, release, seen = gated_backend
+    flights = SingleFlight(enabled=True)
+    first = make_client(handler, token="first", flights=flights)
+    second = make_client(handler, token="second", flights=flights)
+
+    def release_later():
+        time.sleep(0.1)
+        release.set()
+
+    threading.Thread(target=release_later).start()
+    results = _run_concurrently(lambda: first.request("GET", "/categories/categories_list"),
+                                lambda: second.request("GET", "/categories/categories_list"))
+
+    assert [r.status_code for r in results] == [200, 200]
+    assert len(seen) == 1
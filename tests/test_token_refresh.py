@@ -0,0 +1,96 @@
+# tests/test_token_refresh.py
+import time
+
+import httpx
+import pytest
+
+from benchmarks.fake_page import FakePage
+from benchmarks.stub_backend import StubBackend
+from config.settings import settings
+from core.session_manager import SessionManager
+from core.token_refresh import TokenRefreshScheduler
+from services.auth_service import AuthService
+
+
+@pytest.fixture
+def session(make_client):
+    """Logged-in session whose /auth/refresh answers with the statuses in ``statuses`` (then a new token)"""
+    statuses = []
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request.url.path)
+        if statuses:
+            return httpx.Response(statuses.pop(0), json={"detail": "x"})
+        return httpx.Response(200, json=StubBackend._token())
+
+    page = FakePage()
+    session_manager = SessionManager(page)
+    token = StubBackend._token()
+    session_manager.set_session(token, session_manager.decode_token(token["access_token"]), persist=False)
+    api = make_client(handler, token=None)
+    api.set_session_manager(session_manager)
+    scheduler = TokenRefreshScheduler(session_manager, api, AuthService(api).refresh_token, enabled=True)
+    yield scheduler, statuses, requests
+    scheduler.stop()
+    page.close()
+
+
+def test_refresh_stores_the_new_token(session):
+    scheduler, _, requests = session
+    old = scheduler.session_manager.get_token()
+    time.sleep(1)  # exp con resolución de segundos: el token nuevo es distinto
+
+    assert scheduler.refresh_now()
+
+    assert scheduler.session_manager.get_token() != old
+    assert requests == [settings.TOKEN_REFRESH_ENDPOINT]
+
+
+def test_transient_failures_back_off(session, monkeypatch):
+    monkeypatch.setattr(settings, "TOKEN_REFRESH_RETRY_DELAY", 0.2)
+    scheduler, statuses, requests = session
+    statuses.append(503)
+
+    assert not scheduler.refresh_now()
+    assert not scheduler.refresh_now(scheduler.session_manager.get_token())  # Un 401 durante la espera
+
+    assert len(requests) == 1
+    time.sleep(0.25)
+    assert scheduler.refresh_now()
+
+
+def test_retries_stop_after_the_limit(session, monkeypatch):
+    monkeypatch.setattr(settings, "TOKEN_REFRESH_RETRY_DELAY", 0.001)
+    monkeypatch.setattr(settings, "TOKEN_REFRESH_MAX_RETRIES", 1)
+    scheduler, statuses, requests = session
+    statuses.extend([503, 503, 503])
+
+    assert not scheduler.refresh_now()
+    time.sleep(0.01)
+    assert not scheduler.refresh_now()
+    time.sleep(0.01)
+
+    assert not scheduler.refresh_now()
+    assert len(requests) == 2  # El tercero ya no llega al backend
+
+
+def test_a_rejected_refresh_is_not_retried_for_that_token(session):
+    scheduler, statuses, requests = session
+    statuses.append(422)
+
+    assert not scheduler.refresh_now()
+    assert not scheduler.refresh_now()
+
+    assert len(requests) == 1
+
+
+def test_a_missing_endpoint_disables_renewals(session):
+    scheduler, statuses, requests = session
+    statuses.append(404)
+
+    assert not scheduler.refresh_now()
+
+    assert not scheduler._supported
+    assert not scheduler.refresh_now()
+    assert len(requests) == 1